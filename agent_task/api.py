@@ -1,17 +1,323 @@
 """
 API integration for TaskHub marketplace.
 """
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import asyncio
+import datetime
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 import yaml
 
+from .http_cache import ResponseCache, cache_key
+from .jsonstream import iter_task_items
+from .profiling import count, recording, span
+from .store import HashCache, hash_file
+from .tarstream import CONTENT_ENCODINGS, iter_tar, task_entries
+
+DEFAULT_BASE_URL = "https://hackbay-backend-staging.sisung-kim1.workers.dev"
+
+# Connection pool size, (connect, read) timeouts in seconds and retry budget;
+# each can be overridden through the environment
+DEFAULT_POOL_SIZE = int(os.environ.get("AGENT_TASK_HTTP_POOL_SIZE", "10"))
+DEFAULT_TIMEOUT = (
+    float(os.environ.get("AGENT_TASK_HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.environ.get("AGENT_TASK_HTTP_READ_TIMEOUT", "60")),
+)
+DEFAULT_MAX_RETRIES = int(os.environ.get("AGENT_TASK_HTTP_RETRIES", "3"))
+
+# Responses that are retried with backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Longest wait between attempts, including waits requested by Retry-After
+BACKOFF_MAX = 30.0
+
+# Read size of streamed responses and how many chunks may be read ahead of
+# the consumer
+STREAM_CHUNK_SIZE = 64 * 1024
+PREFETCH_DEPTH = 16
+
+# Sentinel meaning "raise on 404" in TaskHubAPI._send
+_RAISE = object()
+
+# Session shared by every client of a long-lived process (see ``keep_session``)
+_resident_session: Optional[requests.Session] = None
+
+def keep_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Share one pooled session between all clients created from now on.
+    
+    Used by the daemon, so keep-alive connections to TaskHub outlive the
+    individual commands. Clients on the shared session leave it open when
+    they are closed.
+    
+    Args:
+        pool_size: Maximum number of pooled connections per host
+        
+    Returns:
+        The shared session
+    """
+    global _resident_session
+    if _resident_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _resident_session = session
+    return _resident_session
+
+def _prefetch(chunks: Iterable[bytes], depth: int = PREFETCH_DEPTH) -> Iterator[bytes]:
+    """Read chunks on a background thread, up to ``depth`` ahead of the consumer.
+    
+    Lets the download continue while the consumer is busy writing to disk.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce() -> None:
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+        except BaseException as e:
+            put(e)
+        else:
+            put(done)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+    
+    thread = threading.Thread(target=produce, name="taskhub-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # The producer notices within one chunk and exits; a consumer that
+        # stops early does not wait for it
+        stop.set()
+
+def _timed_chunks(chunks: Iterable[bytes], name: str) -> Iterator[bytes]:
+    """Record reading a response body as an ``http`` span."""
+    with span("http", name) as body_span:
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            count("http.bytes_down", len(chunk))
+            yield chunk
+        body_span.set(bytes=size)
+
+def _counted(chunks: Iterable[bytes], counter: str) -> Iterator[bytes]:
+    """Add the size of each chunk of a streamed body to a counter."""
+    for chunk in chunks:
+        count(counter, len(chunk))
+        yield chunk
+
+def _read_chunks(path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file in chunks."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def _tee(chunks: Iterable[bytes], path: str) -> Iterator[bytes]:
+    """Pass chunks through while writing a copy of them to a file."""
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            yield chunk
+
+def _read_text(path: Path, rel_path: str) -> str:
+    """Read a task file for a JSON publish, which can only carry UTF-8 text."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except UnicodeDecodeError:
+        raise ValueError(f"Cannot publish binary file '{rel_path}' as JSON; "
+                         "publish it as a streamed archive (--stream) instead")
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Get the delay requested by a response's Retry-After header, in seconds."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
 class TaskHubAPI:
-    """Client for interacting with the TaskHub API."""
+    """Client for interacting with the TaskHub API.
+    
+    The client owns a pooled ``requests.Session``, so consecutive calls
+    reuse keep-alive connections. Failed connections and 429/5xx responses
+    are retried with exponential backoff and full jitter, honouring
+    ``Retry-After``.
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_factor: float = 0.5,
+                 cache: Optional[ResponseCache] = None, offline: bool = False):
+        """Initialize the API client.
+        
+        Args:
+            base_url: TaskHub backend URL (default: ``TASKHUB_API_URL`` or the staging backend)
+            pool_size: Maximum number of pooled connections per host
+            timeout: (connect, read) timeouts in seconds
+            max_retries: Retries after the first attempt
+            backoff_factor: Base delay in seconds of the exponential backoff
+            cache: Response cache for task downloads
+            offline: Answer task downloads from the cache only
+        """
+        if offline and cache is None:
+            raise ValueError("Offline mode requires a response cache")
+        self.base_url = (base_url or os.environ.get("TASKHUB_API_URL", DEFAULT_BASE_URL)).rstrip('/')
+        self.cache = cache
+        self.offline = offline
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.stats = {"requests": 0, "retries": 0}
+        # AsyncTaskHubAPI calls in from its executor threads
+        self._stats_lock = threading.Lock()
+        
+        # Reuse the process-wide session if there is one
+        self._owns_session = _resident_session is None
+        if self._owns_session:
+            self.session = requests.Session()
+            self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self.session.mount("https://", self._adapter)
+            self.session.mount("http://", self._adapter)
+        else:
+            self.session = _resident_session
+            self._adapter = self.session.get_adapter("https://")
+    
+    def close(self) -> None:
+        """Close all pooled connections (unless the session is shared)."""
+        if self._owns_session:
+            self.session.close()
+        if self.cache is not None:
+            self.cache.close()
     
-    def __init__(self, base_url: str = "https://hackbay-backend-staging.sisung-kim1.workers.dev"):
-        """Initialize the API client."""
-        self.base_url = base_url.rstrip('/')
+    def __enter__(self) -> "TaskHubAPI":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def connection_stats(self) -> Dict[str, int]:
+        """Report how often pooled connections were reused.
+        
+        Returns:
+            Dictionary with the number of requests sent, connections opened,
+            requests served over a reused connection and retries
+        """
+        opened = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "requests": stats["requests"],
+            "connections": opened,
+            "reused": max(0, served - opened),
+            "retries": stats["retries"],
+        }
+    
+    def _backoff(self, attempt: int) -> float:
+        """Get the delay before a retry: exponential backoff with full jitter."""
+        return random.uniform(0, min(BACKOFF_MAX, self.backoff_factor * (2 ** attempt)))
+    
+    def _request(self, method: str, url: str,
+                 data: Union[None, bytes, Callable[[], Any]] = None, **kwargs) -> requests.Response:
+        """Send a request through the pooled session, retrying transient failures.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            data: Request body, or a factory producing a fresh body for each attempt
+            **kwargs: Arguments passed to ``requests.Session.request``
+            
+        Returns:
+            The final response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method.upper() in ("GET", "HEAD")
+        attempt = 0
+        while True:
+            body = data() if callable(data) else data
+            if hasattr(body, "__next__") and recording():
+                body = _counted(body, "http.bytes_up")
+            with self._stats_lock:
+                self.stats["requests"] += 1
+            count("http.requests")
+            try:
+                with span("http", f"{method.upper()} {url.split('?')[0]}", attempt=attempt) as request_span:
+                    response = self.session.request(method.upper(), url, data=body, **kwargs)
+                    request_span.set(status=response.status_code)
+                if recording():
+                    sent = response.request.body
+                    if isinstance(sent, (bytes, str)):
+                        count("http.bytes_up", len(sent))
+                    # Streamed bodies are counted as they are read
+                    if not kwargs.get("stream"):
+                        count("http.bytes_down", len(response.content))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A read timeout may mean a non-idempotent request was processed
+                retryable = idempotent or not isinstance(e, requests.exceptions.ReadTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = _retry_after(response)
+                delay = self._backoff(attempt) if delay is None else min(delay, BACKOFF_MAX)
+                response.close()
+            attempt += 1
+            with self._stats_lock:
+                self.stats["retries"] += 1
+            count("http.retries")
+            time.sleep(delay)
     
     def publish_task(self, task_dir: Path, user_id: str) -> Dict:
         """Upload a task to the TaskHub marketplace."""
@@ -24,42 +330,175 @@ class TaskHubAPI:
             
         # Collect all files except README.md and taskhub.yaml
         files = {}
+        with span("serialize", "collect task files"):
+            for rel_path, file_path in self._collect_files(task_dir).items():
+                files[rel_path] = _read_text(file_path, rel_path)
+        
+        # Prepare request data
+        task_data = {
+            "userId": user_id,
+            "taskName": task_dir.name,
+            "readme": readme_content,
+            "taskhubYaml": taskhub_content,
+            "files": files
+        }
+        
+        return self._send(
+            "post",
+            f"{self.base_url}/api/tasks",
+            json=task_data,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": "Bearer your-api-token"
+            }
+        )
+    
+    def _collect_files(self, task_dir: Path) -> Dict[str, Path]:
+        """Map the relative paths of a task's files (except README.md and taskhub.yaml) to paths."""
+        files = {}
         for file_path in task_dir.rglob("*"):
             if file_path.is_file() and file_path.name not in ["README.md", "taskhub.yaml"]:
                 rel_path = str(file_path.relative_to(task_dir)).replace("\\", "/")
-                with open(file_path, "r", encoding="utf-8") as f:
-                    files[rel_path] = f.read()
+                files[rel_path] = file_path
+        return files
+    
+    def publish_task_delta(self, task_dir: Path, user_id: str,
+                           hash_cache: Optional[HashCache] = None) -> Dict:
+        """Upload only the files the TaskHub marketplace does not have yet.
+        
+        The client first sends a manifest of per-file content hashes to
+        ``/api/tasks/negotiate``; the server replies with the hashes it is
+        missing, and only those blobs are uploaded. Servers without the
+        negotiate endpoint get a full upload instead.
+        
+        Args:
+            task_dir: Directory of the task to publish
+            user_id: User ID for publishing
+            hash_cache: Cache used to skip hashing unchanged files
+            
+        Returns:
+            Response of the publish request
+        """
+        with open(task_dir / "README.md", "r", encoding="utf-8") as f:
+            readme_content = f.read()
+            
+        with open(task_dir / "taskhub.yaml", "r", encoding="utf-8") as f:
+            taskhub_content = f.read()
+        
+        # Build the manifest of content hashes
+        files = self._collect_files(task_dir)
+        manifest = {}
+        with span("hash", "hash task files", files=len(files)):
+            for rel_path, file_path in files.items():
+                if hash_cache is not None:
+                    manifest[rel_path] = hash_cache.hash(file_path, rel_path)
+                else:
+                    manifest[rel_path] = hash_file(file_path)
+        
+        negotiation = self._send(
+            "post",
+            f"{self.base_url}/api/tasks/negotiate",
+            json={"userId": user_id, "taskName": task_dir.name, "manifest": manifest},
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": "Bearer your-api-token"
+            },
+            not_found=None
+        )
+        if negotiation is None:
+            # Server does not support delta publishes
+            return self.publish_task(task_dir, user_id)
+        
+        # Upload only the blobs the server is missing
+        missing = set(negotiation.get("missing", []))
+        blobs = {}
+        with span("serialize", "collect missing blobs"):
+            for rel_path, digest in manifest.items():
+                if digest in missing and digest not in blobs:
+                    blobs[digest] = _read_text(files[rel_path], rel_path)
         
-        # Prepare request data
         task_data = {
             "userId": user_id,
             "taskName": task_dir.name,
             "readme": readme_content,
             "taskhubYaml": taskhub_content,
-            "files": files
+            "manifest": manifest,
+            "blobs": blobs
         }
+        return self._send(
+            "post",
+            f"{self.base_url}/api/tasks",
+            json=task_data,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": "Bearer your-api-token"
+            }
+        )
+    
+    def publish_task_stream(self, task_dir: Path, user_id: str, compression: str = "gzip") -> Dict:
+        """Upload a task as a streamed, compressed tar archive.
+        
+        The archive is produced by a generator and sent with chunked
+        transfer encoding, so memory use stays bounded regardless of task
+        size and binary files are uploaded unchanged. Servers without the
+        upload endpoint get a full JSON upload instead.
         
+        Args:
+            task_dir: Directory of the task to publish
+            user_id: User ID for publishing
+            compression: One of ``tarstream.COMPRESSIONS``
+            
+        Returns:
+            Response of the upload request
+        """
+        if compression not in CONTENT_ENCODINGS:
+            raise ValueError(f"Unknown compression '{compression}'")
+        
+        result = self._send(
+            "post",
+            f"{self.base_url}/api/tasks/upload",
+            params={"userId": user_id, "taskName": task_dir.name},
+            data=lambda: iter_tar(task_entries(task_dir), compression),
+            headers={
+                "Content-Type": "application/x-tar",
+                "Content-Encoding": CONTENT_ENCODINGS[compression],
+                "Authorization": "Bearer your-api-token"
+            },
+            not_found=None
+        )
+        if result is None:
+            # Server does not support streamed uploads
+            return self.publish_task(task_dir, user_id)
+        return result
+    
+    def _send(self, method: str, url: str, not_found: Any = _RAISE, decode: bool = True,
+              **kwargs) -> Any:
+        """Send a request and decode its JSON response.
+        
+        Args:
+            method: HTTP method (``get`` or ``post``)
+            url: Request URL
+            not_found: Value returned on 404 instead of raising
+            decode: Decode the JSON body; if False the checked response is returned
+            **kwargs: Arguments passed to ``_request``
+            
+        Returns:
+            Decoded JSON response
+        """
         try:
-            # Make API request
-            url = f"{self.base_url}/api/tasks"
-            response = requests.post(
-                url,
-                json=task_data,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": "Bearer your-api-token"
-                }
-            )
+            response = self._request(method, url, **kwargs)
             
             # Handle common error cases
             if response.status_code == 404:
+                if not_found is not _RAISE:
+                    return not_found
                 raise ValueError(f"API endpoint not found: {url}")
             elif response.status_code == 400:
                 error_data = response.json()
                 raise ValueError(f"Bad request: {error_data.get('error', 'Unknown error')}")
             
             response.raise_for_status()
-            return response.json()
+            return response.json() if decode else response
             
         except requests.exceptions.RequestException as e:
             if hasattr(e, 'response') and e.response is not None:
@@ -71,32 +510,172 @@ class TaskHubAPI:
             raise ValueError(f"API request failed: {str(e)}")
     
     def get_task(self, user_id: str, task_name: str, include_files: bool = False) -> Dict:
-        """Get task details from the marketplace."""
-        try:
-            url = f"{self.base_url}/api/tasks/{user_id}/{task_name}"
-            response = requests.get(
-                url,
-                params={'files': str(include_files).lower()},
-                headers={
-                    "Content-Type": "application/json"
-                }
+        """Get task details from the marketplace.
+        
+        With a response cache, cached tasks are revalidated with a
+        conditional request and served from disk on 304 Not Modified; in
+        offline mode they are served from the cache without any request.
+        """
+        url = f"{self.base_url}/api/tasks/{user_id}/{task_name}"
+        params = {'files': str(include_files).lower()}
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        key = cache_key(url, params)
+        entry = self.cache.lookup(key) if self.cache is not None else None
+        if self.offline:
+            if entry is None:
+                raise ValueError(f"Task not in offline cache: {user_id}/{task_name}")
+            self.cache.record(hit=True)
+            return json.loads(self.cache.read(key))
+        headers.update(ResponseCache.validators(entry))
+        
+        response = self._send(
+            "get",
+            url,
+            params=params,
+            headers=headers,
+            not_found=None,
+            decode=False
+        )
+        if response is None:
+            raise ValueError(f"Task not found: {user_id}/{task_name}")
+        
+        if response.status_code == 304 and entry is not None:
+            self.cache.record(hit=True)
+            return json.loads(self.cache.read(key))
+        
+        task_data = response.json()
+        if self.cache is not None:
+            self.cache.record(hit=False)
+            self.cache.store(
+                key, url, response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
             )
+        return task_data
+
+    def stream_task(self, user_id: str, task_name: str) -> Iterator[Tuple[str, str, Any]]:
+        """Download a task with its files, decoding the payload as it arrives.
+        
+        Unlike ``get_task`` the response is never held in memory as a whole:
+        it is read on a background thread and each file is yielded as soon
+        as it has been parsed, so the caller's disk writes overlap the rest
+        of the download. Caching and offline mode work as in ``get_task``.
+        
+        Args:
+            user_id: Owner of the task
+            task_name: Name of the task
             
-            # Handle common error cases
-            if response.status_code == 404:
-                raise ValueError(f"Task not found: {user_id}/{task_name}")
-            elif response.status_code == 400:
-                error_data = response.json()
-                raise ValueError(f"Bad request: {error_data.get('error', 'Unknown error')}")
-                
-            response.raise_for_status()
-            return response.json()
+        Yields:
+            ``("file", path, content)`` and ``("field", name, value)`` items
+            (see ``iter_task_items``)
+        """
+        url = f"{self.base_url}/api/tasks/{user_id}/{task_name}"
+        params = {'files': 'true'}
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        key = cache_key(url, params)
+        entry = self.cache.lookup(key) if self.cache is not None else None
+        if self.offline:
+            if entry is None:
+                raise ValueError(f"Task not in offline cache: {user_id}/{task_name}")
+            self.cache.record(hit=True)
+            self.cache.touch(key)
+            yield from iter_task_items(_read_chunks(entry["path"]))
+            return
+        headers.update(ResponseCache.validators(entry))
+        
+        response = self._send(
+            "get",
+            url,
+            params=params,
+            headers=headers,
+            not_found=None,
+            decode=False,
+            stream=True
+        )
+        if response is None:
+            raise ValueError(f"Task not found: {user_id}/{task_name}")
+        
+        tmp_path = None
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.cache.record(hit=True)
+                self.cache.touch(key)
+                yield from iter_task_items(_read_chunks(entry["path"]))
+                return
             
-        except requests.exceptions.RequestException as e:
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_data = e.response.json()
-                    raise ValueError(error_data.get('error', str(e)))
-                except ValueError:
-                    pass
-            raise ValueError(f"API request failed: {str(e)}") 
\ No newline at end of file
+            chunks = _timed_chunks(response.iter_content(STREAM_CHUNK_SIZE), f"GET {url} body")
+            if self.cache is not None:
+                self.cache.record(hit=False)
+                tmp_path = self.cache.temp_file()
+                chunks = _tee(chunks, tmp_path)
+            try:
+                yield from iter_task_items(_prefetch(chunks))
+            except requests.exceptions.RequestException as e:
+                raise ValueError(f"API request failed: {str(e)}")
+            
+            if tmp_path is not None:
+                self.cache.commit(
+                    key, url, tmp_path,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
+                tmp_path = None
+        finally:
+            response.close()
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+class AsyncTaskHubAPI:
+    """asyncio client for the TaskHub API.
+    
+    Requests run on a bounded thread pool that shares one pooled
+    ``TaskHubAPI`` session, so at most ``concurrency`` requests are in
+    flight and connections are reused across them.
+    """
+    
+    def __init__(self, concurrency: int = 8, api: Optional[TaskHubAPI] = None):
+        """Initialize the API client.
+        
+        Args:
+            concurrency: Maximum number of simultaneous requests
+            api: Synchronous client to use (default: a new client with a
+                pool large enough for ``concurrency``)
+        """
+        self.concurrency = concurrency
+        self.api = api or TaskHubAPI(pool_size=max(concurrency, DEFAULT_POOL_SIZE))
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="taskhub")
+    
+    async def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous client method on the request pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+    
+    async def get_task(self, user_id: str, task_name: str, include_files: bool = False) -> Dict:
+        """Get task details from the marketplace."""
+        return await self._call(self.api.get_task, user_id, task_name, include_files)
+    
+    async def publish_task(self, task_dir: Path, user_id: str) -> Dict:
+        """Upload a task to the TaskHub marketplace."""
+        return await self._call(self.api.publish_task, task_dir, user_id)
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run blocking work that uses the client, such as consuming
+        ``stream_task``, on the request pool."""
+        return await self._call(fn, *args, **kwargs)
+    
+    async def close(self) -> None:
+        """Shut down the request pool and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.api.close()
+    
+    async def __aenter__(self) -> "AsyncTaskHubAPI":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,276 @@
+"""
+Crash-safe replacement of files and directories.
+
+Writers build new content under a temporary name on the same filesystem
+and swap it into place with a single rename, so concurrent readers and
+interrupted processes only ever see the complete old or the complete new
+version. Existing directories are exchanged with
+``renameat2(RENAME_EXCHANGE)`` where the kernel supports it, and replaced
+with two renames otherwise.
+
+How much is flushed to disk is set by ``AGENT_TASK_FSYNC``:
+
+- ``none``: rely on the renames alone; a power loss may lose recent writes
+- ``data``: fsync file contents before they are renamed into place (default)
+- ``full``: also fsync parent directories so the renames themselves are durable
+"""
+from pathlib import Path
+from typing import Optional, Union
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import shutil
+import stat
+import uuid
+
+FSYNC_POLICIES = ("none", "data", "full")
+
+FSYNC_POLICY = os.environ.get("AGENT_TASK_FSYNC", "data")
+
+# Suffix of staging directories; directories ending in it are never tasks
+STAGING_SUFFIX = ".stage"
+
+# Name of a staging directory (or of the previous contents it replaced):
+# .<target>.<pid>-<random>.stage[.old]
+_STAGING_NAME = re.compile(r"^\..*\.(\d+)-[0-9a-f]{8}\.stage(\.old)?$")
+
+# renameat2 flags and the "current directory" file descriptor
+_RENAME_NOREPLACE = 1
+_RENAME_EXCHANGE = 2
+_AT_FDCWD = -100
+
+_renameat2 = None
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    _renameat2 = _libc.renameat2
+    _renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p,
+                           ctypes.c_uint]
+    _renameat2.restype = ctypes.c_int
+except (OSError, AttributeError):  # pragma: no cover - not Linux/glibc
+    _renameat2 = None
+
+
+def _policy() -> str:
+    """Get the configured fsync policy."""
+    if FSYNC_POLICY not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy '{FSYNC_POLICY}'. "
+                         f"Expected one of: {', '.join(FSYNC_POLICIES)}")
+    return FSYNC_POLICY
+
+
+def sync_file(fd: int) -> None:
+    """Flush a file's contents to disk unless the policy is ``none``."""
+    if _policy() != "none":
+        os.fsync(fd)
+
+
+def sync_dir(path: Path) -> None:
+    """Flush a directory's entries to disk if the policy is ``full``."""
+    if _policy() != "full":
+        return
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_tree(path: Path) -> None:
+    """Flush every file (and with ``full``, every directory) under a tree."""
+    if _policy() == "none":
+        return
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if os.path.islink(file_path):
+                continue
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        sync_dir(Path(root))
+
+
+def atomic_write(path: Path, data: Union[str, bytes], mode: Optional[int] = None) -> None:
+    """Replace a file's contents atomically.
+
+    Args:
+        path: File to write
+        data: New contents; text is encoded as UTF-8
+        mode: Permission bits of the file (default: those of the file being
+            replaced, or 0o644)
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o644
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            sync_file(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    sync_dir(path.parent)
+
+
+def _rename2(src: Path, dst: Path, flags: int) -> bool:
+    """Call ``renameat2``; return False if it is unavailable for these paths."""
+    if _renameat2 is None:
+        return False
+    if _renameat2(_AT_FDCWD, os.fsencode(src), _AT_FDCWD, os.fsencode(dst), flags) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+        return False
+    raise OSError(err, os.strerror(err), str(dst))
+
+
+def rename_noreplace(src: Path, dst: Path) -> None:
+    """Rename a path, failing with ``FileExistsError`` if the target exists."""
+    if _rename2(src, dst, _RENAME_NOREPLACE):
+        return
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+    os.rename(src, dst)
+
+
+def _remove_tree(path: Path) -> None:
+    """Remove a directory tree, clearing read-only bits as needed."""
+    def make_writable(func, failed, exc_info):
+        os.chmod(failed, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
+        func(failed)
+    shutil.rmtree(path, onerror=make_writable)
+
+
+def replace_dir(staged: Path, final: Path) -> None:
+    """Swap a fully built directory into place.
+
+    If ``final`` exists it is exchanged with ``staged`` in one atomic step
+    where supported; otherwise it is moved aside first, leaving a short
+    window in which ``final`` is missing but never partially written. The
+    previous contents are then removed.
+
+    Args:
+        staged: Directory holding the new contents
+        final: Directory to replace
+    """
+    staged = Path(staged)
+    final = Path(final)
+    try:
+        rename_noreplace(staged, final)
+        sync_dir(final.parent)
+        return
+    except FileExistsError:
+        pass
+
+    if _rename2(staged, final, _RENAME_EXCHANGE):
+        old = staged
+    else:
+        old = staged.with_name(f"{staged.name}.old")
+        os.rename(final, old)
+        os.rename(staged, final)
+    sync_dir(final.parent)
+    _remove_tree(old)
+
+
+class StagedDir:
+    """Context manager that builds a directory aside and swaps it in on success.
+
+    The staging directory is created next to the target, so the final rename
+    never crosses filesystems. If the block raises, the staging directory is
+    removed and the target is left untouched.
+
+    Example::
+
+        with StagedDir(task_dir) as stage:
+            write_files(stage)
+    """
+
+    def __init__(self, final: Path, overwrite: bool = True):
+        """Initialize the staged directory.
+
+        Args:
+            final: Directory that is replaced when the block succeeds
+            overwrite: Replace an existing ``final``; if False the swap fails
+                with ``FileExistsError`` instead
+        """
+        self.final = Path(final)
+        self.overwrite = overwrite
+        self.path = self.final.parent / (
+            f".{self.final.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}{STAGING_SUFFIX}"
+        )
+
+    def __enter__(self) -> Path:
+        self.final.parent.mkdir(parents=True, exist_ok=True)
+        self.path.mkdir()
+        return self.path
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            _remove_tree(self.path)
+            return
+        try:
+            sync_tree(self.path)
+            if self.overwrite:
+                replace_dir(self.path, self.final)
+            else:
+                rename_noreplace(self.path, self.final)
+                sync_dir(self.final.parent)
+        except BaseException:
+            if self.path.exists():
+                _remove_tree(self.path)
+            raise
+
+
+def is_staging_dir(name: str) -> bool:
+    """Check whether a directory name belongs to a staging directory."""
+    return _STAGING_NAME.match(name) is not None
+
+
+def remove_stale_staging(parent: Path) -> int:
+    """Remove staging directories left behind by processes that died.
+
+    Args:
+        parent: Directory to clean up
+
+    Returns:
+        Number of removed directories
+    """
+    removed = 0
+    try:
+        entries = list(os.scandir(parent))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        match = _STAGING_NAME.match(entry.name)
+        if match is None or not entry.is_dir(follow_symlinks=False):
+            continue
+        if _pid_alive(int(match.group(1))):
+            continue
+        _remove_tree(Path(entry.path))
+        removed += 1
+    return removed
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,357 @@
+"""
+Packed task bundles (``.atask`` files).
+
+A bundle holds a whole task in a single file, which spares large archives
+the inodes and syscalls of loose files and is easy to move between
+machines. The layout is::
+
+    header   b"ATASK" + NUL + format version (little-endian uint16)
+    data     file contents back to back, each stored raw or compressed
+             on its own
+    index    JSON: the task information shown by ``agent-task tasks``, its
+             MCP servers, directories, and per-file offset, stored size,
+             size, compression, mode and content hash
+    trailer  index offset and length (little-endian uint64s) + b"ATASKIDX"
+
+The index comes last, so bundles are written in one pass. Readers ``mmap``
+the file and go from the trailer to the index: listing a bundle touches
+only its index, and one file can be extracted without reading the others.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+import json
+import mmap
+import os
+import stat
+import struct
+import uuid
+import zlib
+
+from .atomic import sync_dir, sync_file
+from .paths import check_task_name, safe_mode, safe_path
+from .profiling import count, timed
+
+MAGIC = b"ATASK\0"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<6sH")
+_TRAILER = struct.Struct("<QQ8s")
+TRAILER_MAGIC = b"ATASKIDX"
+
+COMPRESSIONS = ("zlib", "zstd", "none")
+
+# Files smaller than this are stored raw; compression would not pay off
+MIN_COMPRESS_SIZE = 128
+
+# Compressed entries must be at most this fraction of their size, or they are stored raw
+COMPRESS_RATIO = 0.9
+
+
+def _compress(data: bytes, compression: str) -> Optional[bytes]:
+    """Compress one entry, or return None if ``compression`` is ``none``."""
+    if compression == "zlib":
+        return zlib.compress(data, 6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package "
+                             "(pip install agent-task[zstd])")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compression == "none":
+        return None
+    raise ValueError(f"Unknown compression '{compression}'. "
+                     f"Expected one of: {', '.join(COMPRESSIONS)}")
+
+
+def _decompress(data: bytes, method: str, size: int) -> bytes:
+    """Decompress one entry."""
+    if method == "zlib":
+        return zlib.decompress(data)
+    if method == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package "
+                             "(pip install agent-task[zstd])")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    raise ValueError(f"Unknown bundle compression '{method}'")
+
+
+def _task_servers(task_dir: Path) -> List[Dict[str, Any]]:
+    """Extract the MCP servers of a task directory, ordered by script path."""
+    from .mcp_manifest import extract_server
+    
+    servers = []
+    mcp_dir = task_dir / "mcp"
+    if not mcp_dir.is_dir():
+        return servers
+    for script in sorted(mcp_dir.glob("*.py")):
+        with open(script, "r", encoding="utf-8", errors="replace") as f:
+            server = extract_server(f.read())
+        server["name"] = server["name"] or script.stem
+        server["source"] = f"mcp/{script.name}"
+        servers.append(server)
+    return servers
+
+
+@timed("serialize", "write bundle")
+def write_bundle(task_dir: Path, path: Path, compression: str = "zlib",
+                 name: Optional[str] = None) -> Dict[str, Any]:
+    """Pack a task directory into a bundle.
+
+    The bundle is written next to ``path`` and renamed into place, so
+    readers never see a partial bundle.
+
+    Args:
+        task_dir: Task directory to pack
+        path: Bundle file to write
+        compression: Compression of the entries (one of ``COMPRESSIONS``);
+            entries that do not shrink are stored raw
+        name: Name of the task (default: the directory name)
+
+    Returns:
+        Index of the written bundle
+    """
+    from .scanner import scan_task_dir
+    
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'. "
+                         f"Expected one of: {', '.join(COMPRESSIONS)}")
+    task_dir = Path(task_dir)
+    path = Path(path)
+    info = scan_task_dir(task_dir)
+    info.pop("path", None)
+    index: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "name": name or task_dir.name,
+        "info": info,
+        "servers": _task_servers(task_dir),
+        "dirs": [],
+        "files": [],
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "wb") as out:
+            out.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+            offset = _HEADER.size
+            for root, dirs, files in os.walk(task_dir):
+                dirs.sort()
+                rel_root = Path(root).relative_to(task_dir).as_posix()
+                prefix = "" if rel_root == "." else f"{rel_root}/"
+                index["dirs"].extend(f"{prefix}{d}" for d in dirs)
+                for file_name in sorted(files):
+                    file_path = os.path.join(root, file_name)
+                    with open(file_path, "rb") as f:
+                        data = f.read()
+                    stored, method = data, "none"
+                    if len(data) >= MIN_COMPRESS_SIZE:
+                        packed = _compress(data, compression)
+                        if packed is not None and len(packed) <= len(data) * COMPRESS_RATIO:
+                            stored, method = packed, compression
+                    out.write(stored)
+                    index["files"].append({
+                        "path": f"{prefix}{file_name}",
+                        "offset": offset,
+                        "stored": len(stored),
+                        "size": len(data),
+                        "method": method,
+                        # Archived files are read-only blob links; extracted ones are private copies
+                        "mode": stat.S_IMODE(os.stat(file_path).st_mode) | stat.S_IWUSR,
+                        "hash": hashlib.sha256(data).hexdigest(),
+                    })
+                    offset += len(stored)
+            encoded = json.dumps(index, separators=(",", ":")).encode("utf-8")
+            out.write(encoded)
+            out.write(_TRAILER.pack(offset, len(encoded), TRAILER_MAGIC))
+            out.flush()
+            sync_file(out.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    sync_dir(path.parent)
+    return index
+
+
+class Bundle:
+    """Read access to a task bundle through ``mmap``."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Open a bundle and read its index.
+
+        Args:
+            path: Bundle file
+
+        Raises:
+            ValueError: If the file is not a readable task bundle
+        """
+        self.path = Path(path)
+        self._mm: Optional[mmap.mmap] = None
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size + _TRAILER.size:
+                raise ValueError(f"Not a task bundle: {self.path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.index = self._read_index(size)
+        except BaseException:
+            self.close()
+            raise
+        self._entries = {entry["path"]: entry for entry in self.index["files"]}
+
+    @timed("parse", "read bundle index")
+    def _read_index(self, size: int) -> Dict[str, Any]:
+        """Locate and decode the index from the trailer."""
+        mm = self._mm
+        magic, version = _HEADER.unpack_from(mm, 0)
+        offset, length, trailer_magic = _TRAILER.unpack_from(mm, size - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != TRAILER_MAGIC:
+            raise ValueError(f"Not a task bundle: {self.path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported task bundle version {version}: {self.path}")
+        if offset + length != size - _TRAILER.size:
+            raise ValueError(f"Corrupt task bundle index: {self.path}")
+        try:
+            index = json.loads(mm[offset:offset + length])
+        except ValueError:
+            raise ValueError(f"Corrupt task bundle index: {self.path}")
+        for entry in index["files"]:
+            safe_path(entry["path"])
+            entry["mode"] = safe_mode(entry["mode"])
+            if entry["offset"] + entry["stored"] > offset:
+                raise ValueError(f"Corrupt task bundle entry {entry['path']}: {self.path}")
+        for rel in index["dirs"]:
+            safe_path(rel)
+        check_task_name(index["name"])
+        return index
+
+    def close(self) -> None:
+        """Unmap the bundle."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        """Name of the packed task."""
+        return self.index["name"]
+
+    @property
+    def servers(self) -> List[Dict[str, Any]]:
+        """MCP server manifests extracted when the task was packed."""
+        return self.index["servers"]
+
+    def task_info(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Get the task information of the bundle, as listed by ``list_tasks``.
+
+        Args:
+            name: Name the task is listed under (default: its packed name)
+        """
+        info = dict(self.index["info"])
+        info["name"] = name or self.name
+        info["path"] = str(self.path)
+        return info
+
+    def files(self) -> List[str]:
+        """Paths of the packed files, in bundle order."""
+        return [entry["path"] for entry in self.index["files"]]
+
+    def entry(self, rel: str) -> Dict[str, Any]:
+        """Get the index entry of a packed file."""
+        try:
+            return self._entries[rel]
+        except KeyError:
+            raise ValueError(f"File '{rel}' not found in {self.path}")
+
+    def read(self, rel: str) -> bytes:
+        """Read one packed file without touching the others.
+
+        Args:
+            rel: Path of the file in the bundle
+
+        Returns:
+            Contents of the file
+        """
+        entry = self.entry(rel)
+        data = self._mm[entry["offset"]:entry["offset"] + entry["stored"]]
+        if entry["method"] != "none":
+            data = _decompress(data, entry["method"], entry["size"])
+        if len(data) != entry["size"]:
+            raise ValueError(f"Corrupt task bundle entry {rel}: {self.path}")
+        return data
+
+    def verify(self) -> List[str]:
+        """Check every packed file against its hash.
+
+        Returns:
+            Paths of the files whose contents do not match
+        """
+        bad = []
+        for rel in self._entries:
+            try:
+                if hashlib.sha256(self.read(rel)).hexdigest() != self._entries[rel]["hash"]:
+                    bad.append(rel)
+            except (ValueError, zlib.error):
+                bad.append(rel)
+        return bad
+
+    @timed("copy", "extract bundle")
+    def extract(self, dest: Path, prefix: str = "") -> List[Path]:
+        """Write packed files to a directory.
+
+        Args:
+            dest: Destination directory (created if missing)
+            prefix: Only extract files under this directory of the bundle
+                (e.g. ``rules/``), relative to it
+
+        Returns:
+            Paths of the written files, relative to ``dest``
+        """
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        for rel in self.index["dirs"]:
+            if rel.startswith(prefix):
+                (dest / rel[len(prefix):]).mkdir(parents=True, exist_ok=True)
+        written = []
+        for entry in self.index["files"]:
+            rel = entry["path"]
+            if not rel.startswith(prefix):
+                continue
+            target = dest / rel[len(prefix):]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "wb") as f:
+                if entry["method"] == "none":
+                    # Stored entries go from the mapping to the file without a copy
+                    with memoryview(self._mm) as view, \
+                            view[entry["offset"]:entry["offset"] + entry["stored"]] as data:
+                        f.write(data)
+                else:
+                    f.write(self.read(rel))
+            os.chmod(target, entry["mode"])
+            count("files.copied")
+            written.append(Path(rel[len(prefix):]))
+        return written
+
+
+def read_task_info(path: Path, name: Optional[str] = None) -> Dict[str, Any]:
+    """Get the listing of a bundle from its index.
+
+    Args:
+        path: Bundle file
+        name: Name the task is listed under (default: its packed name)
+
+    Returns:
+        Task information dictionary, as returned by ``list_tasks``
+    """
+    with Bundle(path) as bundle:
+        return bundle.task_info(name)
@@ -0,0 +1,304 @@
+"""
+Persistent catalog index of archived tasks.
+
+The catalog stores the parsed ``task_info`` record of every task directory
+in a small SQLite database under ``CACHE_DIR``. Each record is keyed by a
+stat signature of the files ``list_tasks`` looks at, so only task
+directories that changed since the last listing are read and parsed again.
+Packed bundles (``<name>.atask``) are listed from their index; a task
+directory takes precedence over a bundle of the same name.
+
+Decoded records are also kept in memory for the life of the process. A
+one-shot CLI call barely notices, but a long-lived process (the daemon)
+answers repeat listings from memory after stat-ing each task, without
+touching SQLite or decoding JSON.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import copy
+import json
+import multiprocessing
+import os
+import sqlite3
+
+from .atomic import is_staging_dir
+from .bundle import read_task_info
+from .paths import BUNDLE_SUFFIX, CATALOG_FILE, TASKS_DIR
+from .profiling import count
+from .scanner import (DEFAULT_SCAN_PROCESSES, DEFAULT_SCAN_WORKERS, PARALLEL_THRESHOLD, PROCESS_THRESHOLD,
+                      ordered_map, parse_task_info, read_task_dir, scan_task_dir)
+
+# Bump when the layout of cached task_info records changes
+CATALOG_VERSION = 1
+
+# Entries whose stat data make up a task's signature
+_SIGNATURE_ENTRIES = ("", "README.md", "taskhub.yaml", "rules", "mcp")
+
+# Signature of a task that is neither a directory nor a bundle
+MISSING_SIGNATURE = "|".join("-" for _ in _SIGNATURE_ENTRIES)
+
+# Prefix of the signatures of packed bundles
+_BUNDLE_PREFIX = "bundle:"
+
+# Decoded (signature, task_info) records of this process, per catalog file
+_resident: Dict[str, Dict[str, Tuple[str, Dict]]] = {}
+
+
+def task_signature(task_dir: Path) -> str:
+    """Compute the stat signature of a task directory.
+
+    Directory mtimes cover files being added to or removed from ``rules/``
+    and ``mcp/``; README.md and taskhub.yaml are tracked by mtime and size.
+    A task without a directory is looked up as a packed bundle, tracked by
+    the bundle's mtime and size.
+
+    Args:
+        task_dir: Path to the task directory
+
+    Returns:
+        Signature string that changes whenever the task listing would
+    """
+    parts = []
+    for entry in _SIGNATURE_ENTRIES:
+        try:
+            st = os.stat(os.path.join(task_dir, entry))
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            if not parts:
+                return _bundle_signature(task_dir)
+            parts.append("-")
+    return "|".join(parts)
+
+
+def _bundle_signature(task_dir: Path) -> str:
+    """Compute the signature of the bundle packed from a task directory."""
+    try:
+        st = os.stat(f"{task_dir}{BUNDLE_SUFFIX}")
+    except OSError:
+        return MISSING_SIGNATURE
+    return f"{_BUNDLE_PREFIX}{st.st_mtime_ns}:{st.st_size}"
+
+
+class TaskCatalog:
+    """Incrementally maintained index of the tasks in ``TASKS_DIR``."""
+
+    def __init__(self, tasks_dir: Path = TASKS_DIR, db_path: Path = CATALOG_FILE):
+        """Initialize the catalog.
+
+        Args:
+            tasks_dir: Directory holding the archived tasks
+            db_path: Location of the SQLite catalog file
+        """
+        self.tasks_dir = Path(tasks_dir)
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the catalog database, or return None if it is unusable."""
+        if self._conn is not None:
+            return self._conn
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != CATALOG_VERSION:
+                conn.execute("DROP TABLE IF EXISTS tasks")
+                conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "name TEXT PRIMARY KEY, signature TEXT NOT NULL, info TEXT NOT NULL)"
+            )
+            conn.commit()
+        except sqlite3.Error:
+            # A broken or read-only cache must never break listing
+            return None
+        self._conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def task_names(self) -> List[str]:
+        """List the names of all task directories and bundles, sorted by name."""
+        if not self.tasks_dir.exists():
+            return []
+        names = set()
+        with os.scandir(self.tasks_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    if not is_staging_dir(entry.name):
+                        names.add(entry.name)
+                elif entry.name.endswith(BUNDLE_SUFFIX) and entry.is_file():
+                    names.add(entry.name[:-len(BUNDLE_SUFFIX)])
+        return sorted(names)
+
+    def _load_cached(self, conn: Optional[sqlite3.Connection]) -> Dict[str, Tuple[str, str]]:
+        """Load all cached (signature, info) pairs keyed by task name."""
+        if conn is None:
+            return {}
+        try:
+            rows = conn.execute("SELECT name, signature, info FROM tasks").fetchall()
+        except sqlite3.Error:
+            return {}
+        return {name: (signature, info) for name, signature, info in rows}
+
+    def iter_tasks(self, names: Optional[List[str]] = None,
+                   workers: Optional[int] = None) -> Iterator[Dict]:
+        """Yield task information for each task, re-reading only changed ones.
+
+        Tasks are stat-ed, checked against the catalog and, if stale, read
+        in a pipeline with a bounded window, so the first tasks are yielded
+        before the rest of a large archive has been looked at.
+
+        Args:
+            names: Task names to look up (default: every task in the catalog)
+            workers: Scanner threads for stale tasks (default: ``DEFAULT_SCAN_WORKERS``)
+
+        Yields:
+            Task information dictionaries in name order
+        """
+        full_listing = names is None
+        if names is None:
+            names = self.task_names()
+        workers = workers or DEFAULT_SCAN_WORKERS
+        resident = _resident.setdefault(str(self.db_path), {})
+
+        conn: Optional[sqlite3.Connection] = None
+        cached: Optional[Dict[str, Tuple[str, str]]] = None
+        parsers: Optional[ProcessPoolExecutor] = None
+        updates = []
+
+        def classify(signatures: Iterator[Tuple[str, str]]) -> Iterator[Tuple[str, str, Optional[Dict]]]:
+            """Attach current records to tasks; None marks a stale task."""
+            nonlocal conn, cached, parsers
+            for name, signature in signatures:
+                record = resident.get(name)
+                if record is not None and record[0] == signature:
+                    count("catalog.hits")
+                    yield name, signature, record[1]
+                    continue
+                if signature == MISSING_SIGNATURE:
+                    continue
+                # Only open the database once some record is not resident and current
+                if cached is None:
+                    conn = self._connect()
+                    cached = self._load_cached(conn)
+                    if (not cached and not resident and DEFAULT_SCAN_PROCESSES > 0
+                            and len(names) >= PROCESS_THRESHOLD):
+                        # Cold build: parse outside the GIL
+                        parsers = stack.enter_context(ProcessPoolExecutor(
+                            max_workers=DEFAULT_SCAN_PROCESSES,
+                            mp_context=multiprocessing.get_context("spawn")))
+                row = cached.get(name)
+                if row is not None and row[0] == signature:
+                    count("catalog.hits")
+                    yield name, signature, json.loads(row[1])
+                else:
+                    count("catalog.misses")
+                    yield name, signature, None
+
+        def resolve(item: Tuple[str, str, Optional[Dict]]) -> Tuple[str, str, Optional[Dict], bool]:
+            """Read a stale task; returns the record and whether it was read."""
+            name, signature, task_info = item
+            if task_info is not None:
+                return name, signature, task_info, False
+            if signature.startswith(_BUNDLE_PREFIX):
+                # Bundles are listed from their index
+                try:
+                    return name, signature, read_task_info(self.tasks_dir / f"{name}{BUNDLE_SUFFIX}", name), True
+                except (OSError, ValueError):
+                    # Unreadable bundles are left out, like vanished directories
+                    return name, signature, None, True
+            if parsers is not None:
+                raw = read_task_dir(self.tasks_dir / name)
+                return name, signature, parsers.submit(parse_task_info, raw).result(), True
+            return name, signature, scan_task_dir(self.tasks_dir / name), True
+
+        stack = ExitStack()
+        results = None
+        try:
+            task_dirs = [self.tasks_dir / name for name in names]
+            if workers > 1 and len(names) >= PARALLEL_THRESHOLD:
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers,
+                                                              thread_name_prefix="task-scan"))
+                signatures = ordered_map(task_signature, task_dirs, pool, workers * 4)
+                results = ordered_map(resolve, classify(zip(names, signatures)), pool, workers * 4)
+            else:
+                results = (resolve(item) for item in classify(zip(names, map(task_signature, task_dirs))))
+
+            for name, signature, task_info, read in results:
+                if task_info is None:
+                    continue
+                if read:
+                    updates.append((name, signature, json.dumps(task_info)))
+                resident[name] = (signature, task_info)
+                # Callers may modify what they get; the resident record stays intact
+                yield copy.deepcopy(task_info)
+        finally:
+            # Stop reading ahead when the caller stops early
+            if results is not None:
+                results.close()
+            stack.close()
+            if full_listing:
+                for name in set(resident) - set(names):
+                    del resident[name]
+            removed = set(cached or ()) - set(names) if full_listing else set()
+            self._store(conn, updates, removed)
+
+    def _store(self, conn: Optional[sqlite3.Connection], updates: List[Tuple[str, str, str]],
+               removed: set) -> None:
+        """Persist refreshed records and drop records of deleted tasks."""
+        if conn is None or not (updates or removed):
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tasks (name, signature, info) VALUES (?, ?, ?)",
+                    updates
+                )
+                conn.executemany("DELETE FROM tasks WHERE name = ?", [(n,) for n in removed])
+        except sqlite3.Error:
+            pass
+
+    def get(self, task_name: str) -> Optional[Dict]:
+        """Look up a single task.
+
+        Args:
+            task_name: Name of the task
+
+        Returns:
+            Task information dictionary, or None if the task does not exist
+        """
+        for task_info in self.iter_tasks([task_name]):
+            return task_info
+        return None
+
+    def invalidate(self, task_name: Optional[str] = None) -> None:
+        """Drop cached records so they are re-read on the next lookup.
+
+        Args:
+            task_name: Task to invalidate (default: the whole catalog)
+        """
+        resident = _resident.get(str(self.db_path), {})
+        if task_name is None:
+            resident.clear()
+        else:
+            resident.pop(task_name, None)
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                if task_name is None:
+                    conn.execute("DELETE FROM tasks")
+                else:
+                    conn.execute("DELETE FROM tasks WHERE name = ?", (task_name,))
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,866 @@
+"""
+Commands of the agent-task CLI.
+
+Commands import their heavy dependencies (rich, the task manager and
+through it requests and yaml) inside ``handle``, so only the command that
+runs pays for them.
+"""
+from functools import lru_cache
+from pathlib import Path
+import json
+import os
+import sys
+
+from cleo.commands.command import Command
+from cleo.helpers import argument, option
+
+
+@lru_cache(maxsize=None)
+def _console():
+    """Get the shared rich console."""
+    from rich.console import Console
+    return Console()
+
+# Options controlling the tree of loaded files
+TREE_OPTIONS = [
+    option("max-depth", None, "Show the loaded files only this many levels deep", flag=False),
+    option("summary", None, "Collapse large directories to file counts")
+]
+
+def _show_loaded(command: Command, task_name: str, task_dir: Path, files: list) -> None:
+    """Report a loaded task with a tree of its files.
+    
+    Args:
+        command: Running command, providing output and the tree options
+        task_name: Name of the loaded task
+        task_dir: Directory the task was loaded into
+        files: Loaded file paths relative to ``task_dir``, as returned by the loader
+    """
+    from .profiling import span
+    from .tree import build_tree
+    
+    with span("render", "loaded files tree", files=len(files)):
+        max_depth = command.option("max-depth")
+        tree = build_tree(
+            f"[bold cyan]{task_name}/[/]",
+            files,
+            max_depth=int(max_depth) if max_depth else None,
+            summary=command.option("summary")
+        )
+        
+        command.line(f"\nLoaded task: <info>{task_name}</info>")
+        command.line(f"Location: {task_dir}")
+        command.line("\nTask structure:")
+        _console().print(tree)
+    
+    # Show cursor integration message
+    command.line("\nCursor AI Integration:")
+    command.line("- Rules and MCP servers configured in .cursor directory")
+    command.line("- AI assistance ready to use")
+
+class InitCommand(Command):
+    """
+    Create new task structure.
+    
+    init
+        {task_name : Name of the task to create (alphanumeric and hyphens only)}
+    """
+    
+    name = "init"
+    description = "Create new task structure"
+    arguments = [
+        argument("task_name", "Name of the task to create (alphanumeric and hyphens only)")
+    ]
+    
+    def handle(self) -> int:
+        from rich.tree import Tree
+        from .task_manager import TaskManager
+        
+        task_name = self.argument("task_name")
+        try:
+            project_dir = TaskManager.init_task(task_name)
+            
+            # Create tree view of the structure
+            tree = Tree(f"[bold cyan]{task_name}/[/]")
+            tree.add("[bold green]README.md[/]")
+            
+            rules_tree = tree.add("[bold yellow]rules/[/]")
+            rules_tree.add("[bold green]rule.mdc[/]")
+            
+            mcp_tree = tree.add("[bold yellow]mcp/[/]")
+            
+            self.line(f"\nCreated new task: <info>{task_name}</info>")
+            self.line(f"Location: {project_dir}")
+            self.line("\nProject structure:")
+            _console().print(tree)
+            return 0
+        except Exception as e:
+            self.line_error(f"Error creating task: {e}")
+            return 1
+
+class TasksCommand(Command):
+    """
+    Show saved tasks.
+    
+    tasks
+        {--detail : Show detailed information about each task}
+        {--workers= : Number of parallel scanner threads}
+        {--stream : Print tasks as they are found instead of a table}
+        {--json : Print one JSON object per task (NDJSON)}
+        {--limit= : Maximum number of tasks to show}
+        {--offset=0 : Number of tasks to skip}
+    """
+    
+    name = "tasks"
+    description = "Show saved tasks"
+    options = [
+        option("detail", "d", "Show detailed information about each task"),
+        option("workers", "w", "Number of parallel scanner threads", flag=False),
+        option("stream", "s", "Print tasks as they are found instead of a table"),
+        option("json", "j", "Print one JSON object per task (NDJSON)"),
+        option("limit", None, "Maximum number of tasks to show", flag=False),
+        option("offset", None, "Number of tasks to skip", flag=False, default="0")
+    ]
+    
+    @staticmethod
+    def _components(task: dict, markup: bool = False) -> list:
+        """Get the component labels of a task."""
+        components = []
+        if task['has_readme']:
+            components.append("[green]README[/]" if markup else "README")
+        if task['has_rules']:
+            components.append("[yellow]Rules[/]" if markup else "Rules")
+        if task['has_mcp']:
+            components.append("[blue]MCP[/]" if markup else "MCP")
+        return components
+    
+    def handle(self) -> int:
+        from rich.markup import escape
+        from rich.table import Table
+        from .profiling import span
+        from .task_manager import TaskManager
+        
+        try:
+            workers = self.option("workers")
+            limit = self.option("limit")
+            tasks = TaskManager.iter_tasks(
+                workers=int(workers) if workers else None,
+                offset=int(self.option("offset") or 0),
+                limit=int(limit) if limit is not None else None
+            )
+            
+            if self.option("json"):
+                # Stream NDJSON so pipelines get the first rows immediately
+                for task in tasks:
+                    sys.stdout.write(json.dumps(task) + "\n")
+                    sys.stdout.flush()
+                return 0
+            
+            show_detail = self.option("detail")
+            found = False
+            
+            if show_detail:
+                # Show detailed view
+                for task in tasks:
+                    found = True
+                    _console().print(f"\n[bold cyan]{task['name']}[/]")
+                    _console().print("=" * len(task['name']))
+                    
+                    if task.get('description'):
+                        _console().print(f"Description: {task['description']}")
+                    
+                    # Show metadata if available
+                    if 'version' in task:
+                        _console().print(f"Version: {task['version']}")
+                    if 'author' in task:
+                        _console().print(f"Author: {task['author']}")
+                    if 'license' in task:
+                        _console().print(f"License: {task['license']}")
+                    if 'tags' in task and task['tags']:
+                        _console().print(f"Tags: {', '.join(task['tags'])}")
+                    
+                    # Show components
+                    components = self._components(task, markup=True)
+                    if components:
+                        _console().print("Components:", ", ".join(components))
+                    
+                    # Show files
+                    if task['files']:
+                        _console().print("\nFiles:")
+                        for file in task['files']:
+                            _console().print(f"  - {file}")
+                            
+                    _console().print(f"Path: {task['path']}\n")
+            elif self.option("stream"):
+                # Show one line per task as soon as it is scanned
+                for task in tasks:
+                    found = True
+                    _console().print(
+                        f"[cyan]{escape(task['name'])}[/]  "
+                        f"[green]{escape(task['description'] or '(no description)')}[/]  "
+                        f"[yellow]{', '.join(self._components(task)) or '(empty)'}[/]",
+                        soft_wrap=True
+                    )
+            else:
+                # Show simple table view
+                table = Table(title="Available Tasks")
+                table.add_column("Name", style="cyan")
+                table.add_column("Description", style="green")
+                table.add_column("Components", style="yellow")
+                
+                for task in tasks:
+                    found = True
+                    table.add_row(
+                        task["name"],
+                        task["description"] or "(no description)",
+                        ", ".join(self._components(task)) or "(empty)"
+                    )
+                
+                if found:
+                    with span("render", "tasks table"):
+                        _console().print(table)
+            
+            if not found:
+                self.line("No tasks found.")
+            return 0
+        except BrokenPipeError:
+            # Reader went away (e.g. `| head`); silence the final flush at exit
+            try:
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, sys.stdout.fileno())
+            except (OSError, ValueError):
+                # Output relayed by the daemon has no file descriptor
+                pass
+            return 0
+        except Exception as e:
+            self.line_error(f"Error listing tasks: {str(e)}")
+            return 1
+
+class LoadCommand(Command):
+    """
+    Import task to current project.
+    
+    load
+        {task_name : Name of the task to load (must exist in tasks directory)}
+        {--strategy=auto : How files are materialized (auto, reflink, hardlink, symlink, copy)}
+        {--max-depth= : Show the loaded files only this many levels deep}
+        {--summary : Collapse large directories to file counts}
+    """
+    
+    name = "load"
+    description = "Import task to current project"
+    arguments = [
+        argument("task_name", "Name of the task to load (must exist in tasks directory)")
+    ]
+    options = [
+        option("strategy", None, "How files are materialized (auto, reflink, hardlink, symlink, copy)",
+               flag=False, default="auto"),
+        *TREE_OPTIONS
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        task_name = self.argument("task_name")
+        try:
+            # Get current directory for feedback
+            current_dir = Path.cwd()
+            
+            loaded_files = TaskManager.load_task(task_name, strategy=self.option("strategy"))
+            _show_loaded(self, task_name, current_dir / task_name, loaded_files)
+            
+            return 0
+        except Exception as e:
+            self.line_error(f"Error loading task: {e}")
+            return 1
+
+class ArchiveCommand(Command):
+    """
+    Archive task to Cursor AI configuration.
+    
+    archive
+        {task_name : Name of the task to archive (must exist in tasks directory)}
+        {--remove-current : Remove the task files from current directory after archiving}
+    """
+    
+    name = "archive"
+    description = "Archive task to Cursor AI configuration"
+    arguments = [
+        argument("task_name", "Name of the task to archive (must exist in tasks directory)")
+    ]
+    options = [
+        option("remove-current", None, "Remove the task files from current directory after archiving")
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        task_name = self.argument("task_name")
+        remove_current = self.option("remove-current")
+        try:
+            report = TaskManager.archive_task(task_name, remove_current=remove_current)
+            self.line(f"Archived task: <info>{task_name}</info>")
+            self.line(
+                f"Transferred {report['files_transferred']} files "
+                f"({report['bytes_transferred']} bytes), "
+                f"removed {report['files_removed']}, "
+                f"unchanged {report['files_unchanged']}"
+            )
+            if remove_current:
+                self.line("Removed task files from current directory")
+            return 0
+        except Exception as e:
+            self.line_error(f"Error archiving task: {e}")
+            return 1
+
+class PublishCommand(Command):
+    """
+    Share task publicly.
+    
+    publish
+        {task_name : Name of the task to publish (must exist in tasks directory)}
+        {--user-id=default : User ID for publishing (default: 'default')}
+        {--full : Upload every file instead of only the ones the marketplace is missing}
+        {--stream : Upload a streamed, compressed archive (default for large or binary tasks)}
+        {--compression=gzip : Compression of streamed uploads (gzip, zstd, none)}
+    """
+    
+    name = "publish"
+    description = "Share task publicly"
+    arguments = [
+        argument("task_name", "Name of the task to publish (must exist in tasks directory)")
+    ]
+    options = [
+        option("user-id", "u", "User ID for publishing", flag=False, default="default"),
+        option("full", None, "Upload every file instead of only the ones the marketplace is missing"),
+        option("stream", None, "Upload a streamed, compressed archive (default for large or binary tasks)"),
+        option("compression", None, "Compression of streamed uploads (gzip, zstd, none)",
+               flag=False, default="gzip")
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        task_name = self.argument("task_name")
+        user_id = self.option("user-id")
+        
+        try:
+            url = TaskManager.publish_task(
+                task_name,
+                user_id,
+                delta=not self.option("full"),
+                stream=True if self.option("stream") else None,
+                compression=self.option("compression")
+            )
+            self.line(f"Published task: <info>{task_name}</info>")
+            self.line(f"Task URL: {url}")
+            return 0
+            
+        except Exception as e:
+            self.line_error(f"Error publishing task: {str(e)}")
+            return 1
+
+class CloneCommand(Command):
+    """
+    Download from marketplace.
+    
+    clone
+        {url?* : URLs or paths of the tasks to clone (e.g., user/task-name)}
+        {--load : Load the task into current directory after cloning}
+        {--strategy=auto : How files are materialized when loading (auto, reflink, hardlink, symlink, copy)}
+        {--from-file= : Read task URLs from a file, one per line}
+        {--concurrency=8 : Maximum number of simultaneous downloads}
+        {--offline : Answer from the local response cache only}
+        {--max-depth= : Show the loaded files only this many levels deep}
+        {--summary : Collapse large directories to file counts}
+    """
+    
+    name = "clone"
+    description = "Download from marketplace"
+    arguments = [
+        argument("url", "URLs or paths of the tasks to clone (e.g., user/task-name)",
+                 optional=True, multiple=True)
+    ]
+    options = [
+        option("load", "l", "Load the task into current directory after cloning"),
+        option("strategy", None, "How files are materialized when loading (auto, reflink, hardlink, symlink, copy)",
+               flag=False, default="auto"),
+        option("from-file", "f", "Read task URLs from a file, one per line", flag=False),
+        option("concurrency", "c", "Maximum number of simultaneous downloads", flag=False, default="8"),
+        option("offline", None, "Answer from the local response cache only"),
+        *TREE_OPTIONS
+    ]
+    
+    def _urls(self) -> list:
+        """Collect task URLs from the arguments and --from-file."""
+        urls = list(self.argument("url") or [])
+        from_file = self.option("from-file")
+        if from_file:
+            with open(from_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        urls.append(line)
+        return urls
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        should_load = self.option("load")
+        
+        try:
+            urls = self._urls()
+            if not urls:
+                self.line_error("Error cloning task: no task URLs given")
+                return 1
+            
+            # Clone the tasks first
+            if len(urls) == 1:
+                task_name = TaskManager.clone_task(urls[0], offline=self.option("offline"))
+                self.line(f"Cloned task: <info>{task_name}</info>")
+                cloned = [task_name]
+            else:
+                def report(url, task_name, error):
+                    if error is None:
+                        self.line(f"Cloned task: <info>{task_name}</info>")
+                    else:
+                        self.line_error(f"Error cloning {url}: {error}")
+                
+                results = TaskManager.clone_tasks(
+                    urls,
+                    concurrency=int(self.option("concurrency")),
+                    on_cloned=report,
+                    offline=self.option("offline")
+                )
+                cloned = [result["task_name"] for result in results if result["error"] is None]
+                self.line(f"\nCloned {len(cloned)} of {len(results)} tasks")
+            
+            # If --load flag is set, load the tasks into current directory
+            for task_name in cloned if should_load else []:
+                self.line("\nLoading task into current directory...")
+                
+                # Get current directory for feedback
+                current_dir = Path.cwd()
+                
+                loaded_files = TaskManager.load_task(task_name, strategy=self.option("strategy"))
+                _show_loaded(self, task_name, current_dir / task_name, loaded_files)
+            
+            return 0 if len(cloned) == len(urls) else 1
+        except Exception as e:
+            self.line_error(f"Error cloning task: {e}")
+            return 1
+
+class PathCommand(Command):
+    """
+    Show the path to the task archive directory.
+    
+    path
+    """
+    
+    name = "path"
+    description = "Show the path to the task archive directory"
+    
+    def handle(self) -> int:
+        from .paths import TASKS_DIR
+        
+        try:
+            self.line(f"Task archive directory: <info>{TASKS_DIR}</info>")
+            return 0
+        except Exception as e:
+            self.line_error(f"Error showing path: {e}")
+            return 1
+
+class ImportCommand(Command):
+    """
+    Import task to current project.
+    
+    import
+        {task_name* : Names of the tasks to import (must exist in tasks directory)}
+        {--strategy=auto : How rule files are materialized (auto, reflink, hardlink, symlink, copy)}
+        {--instant-mcp : Export MCP servers with the instant-mcp CLI instead of in-process}
+    """
+    
+    name = "import"
+    description = "Import task to current project"
+    arguments = [
+        argument("task_name", "Names of the tasks to import (must exist in tasks directory)",
+                 multiple=True)
+    ]
+    options = [
+        option("strategy", None, "How rule files are materialized (auto, reflink, hardlink, symlink, copy)",
+               flag=False, default="auto"),
+        option("instant-mcp", None, "Export MCP servers with the instant-mcp CLI instead of in-process")
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        failed = 0
+        for task_name in self.argument("task_name"):
+            try:
+                TaskManager.import_task(task_name, strategy=self.option("strategy"),
+                                        instant_mcp=self.option("instant-mcp"))
+                self.line(f"Imported task: <info>{task_name}</info>")
+            except Exception as e:
+                self.line_error(f"Error importing task {task_name}: {e}")
+                failed += 1
+        return 1 if failed else 0
+
+class PackCommand(Command):
+    """
+    Pack archived tasks into single-file bundles.
+    
+    pack
+        {task_name* : Names of the tasks to pack (must exist in tasks directory)}
+        {--output= : Write the bundle to this file and keep the task unpacked}
+        {--compression=zlib : Compression of the bundle entries (zlib, zstd, none)}
+    """
+    
+    name = "pack"
+    description = "Pack archived tasks into single-file bundles"
+    arguments = [
+        argument("task_name", "Names of the tasks to pack (must exist in tasks directory)",
+                 multiple=True)
+    ]
+    options = [
+        option("output", "o", "Write the bundle to this file and keep the task unpacked", flag=False),
+        option("compression", None, "Compression of the bundle entries (zlib, zstd, none)",
+               flag=False, default="zlib")
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        task_names = self.argument("task_name")
+        output = self.option("output")
+        if output and len(task_names) > 1:
+            self.line_error("--output can only be used with a single task")
+            return 1
+        
+        failed = 0
+        for task_name in task_names:
+            try:
+                bundle_path = TaskManager.pack_task(task_name, Path(output) if output else None,
+                                                    compression=self.option("compression"))
+                self.line(f"Packed task <info>{task_name}</info> into {bundle_path} "
+                          f"({bundle_path.stat().st_size} bytes)")
+            except Exception as e:
+                self.line_error(f"Error packing task {task_name}: {e}")
+                failed += 1
+        return 1 if failed else 0
+
+class UnpackCommand(Command):
+    """
+    Unpack task bundles into the tasks directory.
+    
+    unpack
+        {bundle* : Bundle files, or names of packed tasks to unpack in place}
+        {--name= : Name of the unpacked task (default: the name it was packed under)}
+    """
+    
+    name = "unpack"
+    description = "Unpack task bundles into the tasks directory"
+    arguments = [
+        argument("bundle", "Bundle files, or names of packed tasks to unpack in place", multiple=True)
+    ]
+    options = [
+        option("name", None, "Name of the unpacked task (default: the name it was packed under)",
+               flag=False)
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        sources = self.argument("bundle")
+        if self.option("name") and len(sources) > 1:
+            self.line_error("--name can only be used with a single bundle")
+            return 1
+        
+        failed = 0
+        for source in sources:
+            try:
+                task_name = TaskManager.unpack_task(source, self.option("name"))
+                self.line(f"Unpacked task: <info>{task_name}</info>")
+            except Exception as e:
+                self.line_error(f"Error unpacking {source}: {e}")
+                failed += 1
+        return 1 if failed else 0
+
+class MirrorExportCommand(Command):
+    """
+    Export tasks into one archive for machines without TaskHub access.
+    
+    mirror export
+        {output : Archive file to write}
+        {pattern?* : Glob patterns selecting the tasks to export (default: all)}
+        {--compression=gzip : Compression of the archive (gzip, zstd, none)}
+    """
+    
+    name = "mirror export"
+    description = "Export tasks into one archive for machines without TaskHub access"
+    arguments = [
+        argument("output", "Archive file to write"),
+        argument("pattern", "Glob patterns selecting the tasks to export (default: all)",
+                 optional=True, multiple=True)
+    ]
+    options = [
+        option("compression", None, "Compression of the archive (gzip, zstd, none)",
+               flag=False, default="gzip")
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        try:
+            report = TaskManager.export_mirror(Path(self.argument("output")),
+                                               self.argument("pattern") or None,
+                                               compression=self.option("compression"))
+            self.line(
+                f"Exported <info>{report['tasks']}</info> tasks ({report['files']} files, "
+                f"{report['blobs']} distinct, {report['bytes']} bytes) "
+                f"to {self.argument('output')} ({report['archive_bytes']} bytes)"
+            )
+            return 0
+        except Exception as e:
+            self.line_error(f"Error exporting mirror: {e}")
+            return 1
+
+class MirrorImportCommand(Command):
+    """
+    Import tasks from a mirror archive.
+    
+    mirror import
+        {archive : Archive file written by mirror export}
+        {pattern?* : Glob patterns selecting the tasks to import (default: all)}
+        {--overwrite : Update tasks that already exist instead of skipping them}
+        {--workers= : Number of threads storing files and checking out tasks}
+    """
+    
+    name = "mirror import"
+    description = "Import tasks from a mirror archive"
+    arguments = [
+        argument("archive", "Archive file written by mirror export"),
+        argument("pattern", "Glob patterns selecting the tasks to import (default: all)",
+                 optional=True, multiple=True)
+    ]
+    options = [
+        option("overwrite", None, "Update tasks that already exist instead of skipping them"),
+        option("workers", "w", "Number of threads storing files and checking out tasks", flag=False)
+    ]
+    
+    def handle(self) -> int:
+        from .task_manager import TaskManager
+        
+        try:
+            workers = self.option("workers")
+            report = TaskManager.import_mirror(Path(self.argument("archive")),
+                                               self.argument("pattern") or None,
+                                               overwrite=self.option("overwrite"),
+                                               workers=int(workers) if workers else None)
+        except Exception as e:
+            self.line_error(f"Error importing mirror: {e}")
+            return 1
+        
+        self.line(
+            f"Imported <info>{len(report['imported'])}</info> tasks "
+            f"({report['blobs_written']} files written, {report['blobs_present']} already stored)"
+        )
+        if report["skipped"]:
+            self.line(f"Skipped {len(report['skipped'])} existing tasks "
+                      f"(use --overwrite to update them): {', '.join(report['skipped'])}")
+        for task_name, error in report["failed"].items():
+            self.line_error(f"Error importing task {task_name}: {error}")
+        return 1 if report["failed"] else 0
+
+class GcCommand(Command):
+    """
+    Remove unreferenced blobs from the task store.
+    
+    gc
+        {--dry-run : Only report what would be removed}
+    """
+    
+    name = "gc"
+    description = "Remove unreferenced blobs from the task store"
+    options = [
+        option("dry-run", None, "Only report what would be removed")
+    ]
+    
+    def handle(self) -> int:
+        from .locks import catalog_lock
+        from .store import BlobStore
+        
+        dry_run = self.option("dry-run")
+        try:
+            # gc may delete blobs of any task, so it excludes all other operations
+            with catalog_lock(shared=False):
+                result = BlobStore().gc(dry_run=dry_run)
+            verb = "Would remove" if dry_run else "Removed"
+            self.line(
+                f"{verb} <info>{result['blobs_removed']}</info> blobs "
+                f"({result['bytes_freed']} bytes) and "
+                f"<info>{result['manifests_removed']}</info> stale manifests"
+            )
+            return 0
+        except Exception as e:
+            self.line_error(f"Error collecting garbage: {e}")
+            return 1
+
+class McpHostCommand(Command):
+    """
+    Serve all task MCP servers of a project from one process.
+    
+    mcp-host
+        {--workspace= : Project directory whose servers are served (default: current directory)}
+    """
+    
+    name = "mcp-host"
+    description = "Serve all task MCP servers of a project from one process"
+    options = [
+        option("workspace", "w", "Project directory whose servers are served (default: current directory)",
+               flag=False)
+    ]
+    
+    def handle(self) -> int:
+        from .mcp_host import McpHost
+        
+        # stdout carries the MCP protocol, so nothing else may be written to it
+        workspace = Path(self.option("workspace") or os.getcwd())
+        McpHost(workspace).serve(sys.stdin, sys.stdout)
+        return 0
+
+class DaemonCommand(Command):
+    """
+    Keep agent-task resident so later calls return quickly.
+    
+    daemon
+        {--status : Show whether a daemon is running}
+        {--stop : Stop the running daemon}
+    """
+    
+    name = "daemon"
+    description = "Keep agent-task resident so later calls return quickly"
+    options = [
+        option("status", None, "Show whether a daemon is running"),
+        option("stop", None, "Stop the running daemon")
+    ]
+    
+    def handle(self) -> int:
+        import signal
+        from .daemon import Daemon, request
+        
+        try:
+            if self.option("status") or self.option("stop"):
+                reply = request({"command": "stop" if self.option("stop") else "status"})
+                if reply is None:
+                    self.line("No agent-task daemon is running")
+                    return 1
+                if self.option("stop"):
+                    self.line("Stopped the agent-task daemon")
+                else:
+                    self.line(
+                        f"agent-task daemon running (pid <info>{reply['pid']}</info>, "
+                        f"up {reply['uptime']:.0f}s, {reply['requests']} calls served)"
+                    )
+                    self.line(f"Socket: {reply['socket']}")
+                return 0
+            
+            daemon = Daemon()
+            daemon.bind()
+            signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+            daemon.warm()
+            self.line(f"agent-task daemon listening on <info>{daemon.socket_path}</info>")
+            try:
+                daemon.serve_forever()
+            except KeyboardInterrupt:
+                daemon.close()
+            return 0
+        except Exception as e:
+            self.line_error(f"Error running daemon: {e}")
+            return 1
+
+class StatsCommand(Command):
+    """
+    Show latency percentiles and transfer totals of recorded commands.
+    
+    stats
+        {--command= : Only show this command}
+        {--days= : Only include calls from the last N days}
+        {--phases : Show percentiles of the time spent per phase}
+        {--json : Print one JSON object per command (NDJSON)}
+    """
+    
+    name = "stats"
+    description = "Show latency percentiles and transfer totals of recorded commands"
+    options = [
+        option("command", "c", "Only show this command", flag=False),
+        option("days", None, "Only include calls from the last N days", flag=False),
+        option("phases", "p", "Show percentiles of the time spent per phase"),
+        option("json", "j", "Print one JSON object per command (NDJSON)")
+    ]
+    
+    @staticmethod
+    def _size(size: int) -> str:
+        """Format a byte count."""
+        for unit in ("B", "KiB", "MiB", "GiB"):
+            if size < 1024 or unit == "GiB":
+                return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+    
+    def handle(self) -> int:
+        import time
+        from rich.table import Table
+        from .metrics import metrics_file, read_records, summarize
+        
+        try:
+            days = self.option("days")
+            since = time.time() - float(days) * 86400 if days else None
+            records = read_records(since=since)
+            if self.option("command"):
+                records = (record for record in records if record["command"] == self.option("command"))
+            summaries = summarize(records)
+            
+            if self.option("json"):
+                for summary in summaries:
+                    sys.stdout.write(json.dumps(summary) + "\n")
+                return 0
+            
+            if not summaries:
+                self.line(f"No metrics recorded in {metrics_file()}")
+                return 0
+            
+            table = Table(title="Command latency (ms)")
+            table.add_column("Command", style="cyan")
+            table.add_column("Calls", justify="right")
+            table.add_column("Failed", justify="right", style="red")
+            for pct in ("p50", "p95", "p99"):
+                table.add_column(pct, justify="right", style="green")
+            table.add_column("Sent", justify="right")
+            table.add_column("Received", justify="right")
+            table.add_column("Cache hit rate", style="yellow")
+            
+            for summary in summaries:
+                counters = summary["counters"]
+                table.add_row(
+                    summary["command"],
+                    str(summary["calls"]),
+                    str(summary["failures"]),
+                    *(f"{summary['ms'][pct]:.1f}" for pct in ("p50", "p95", "p99")),
+                    self._size(counters.get("http.bytes_up", 0)),
+                    self._size(counters.get("http.bytes_down", 0)),
+                    ", ".join(f"{cache} {rate:.0%}" for cache, rate in summary["hit_rates"].items())
+                )
+                
+                if self.option("phases") and summary["phases"]:
+                    for phase, values in summary["phases"].items():
+                        table.add_row(
+                            f"  [dim]{phase}[/]", "", "",
+                            *(f"[dim]{values[pct]:.1f}[/]" for pct in ("p50", "p95", "p99")),
+                            "", "", ""
+                        )
+            
+            _console().print(table)
+            return 0
+        except Exception as e:
+            self.line_error(f"Error reading metrics: {e}")
+            return 1
@@ -0,0 +1,418 @@
+"""
+Resident daemon answering CLI calls over a Unix socket.
+
+``agent-task daemon`` keeps the imported commands, the catalog's decoded
+task records and a pooled TaskHub session in memory. While it runs, the
+``agent-task`` entry point forwards each call to it and only relays the
+output, so a call costs one interpreter start and a socket round trip
+instead of importing and rebuilding everything. Without a daemon, or with
+``AGENT_TASK_NO_DAEMON`` set, commands run in-process as before.
+
+The protocol is newline-delimited JSON over ``DAEMON_SOCKET``. A client
+sends one request (``run``, ``status`` or ``stop``); for ``run`` the daemon
+answers with ``{"out": text}`` and ``{"err": text}`` frames and a final
+``{"exit": code}``. Each connection is served on its own thread, but
+calls run one at a time, in the client's working directory and with its
+terminal settings; a call arriving while another one runs is refused, so
+a long publish or clone never holds up other commands. Refused clients,
+and clients whose ``AGENT_TASK_*`` or ``TASKHUB_*`` settings differ from
+the daemon's (those settings are read when modules are imported), run
+in-process instead.
+"""
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+
+from . import __version__
+from .paths import DAEMON_SOCKET, TASKS_DIR
+
+# Bump when requests or frames change; mismatched clients run in-process
+PROTOCOL_VERSION = 1
+
+# Commands that always run in the calling process: they are long-running
+# or talk over the caller's stdin
+LOCAL_COMMANDS = frozenset({"daemon", "mcp-host"})
+
+# Prefixes of environment variables that must match between client and daemon
+SETTINGS_PREFIXES = ("AGENT_TASK_", "TASKHUB_")
+
+# Terminal settings applied while a forwarded call runs
+TERMINAL_VARIABLES = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS", "LINES")
+
+# Seconds between checks of TASKS_DIR for added or removed tasks
+WATCH_INTERVAL = float(os.environ.get("AGENT_TASK_DAEMON_WATCH_INTERVAL", "1.0"))
+
+
+def _settings(environ: Dict[str, str]) -> Dict[str, str]:
+    """Get the environment variables that configure agent-task."""
+    return {key: value for key, value in environ.items() if key.startswith(SETTINGS_PREFIXES)}
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """Send one newline-delimited JSON message."""
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _connect(socket_path: Path, timeout: Optional[float] = None) -> Optional[socket.socket]:
+    """Connect to the daemon, or return None if none is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(message: Dict[str, Any], socket_path: Path = DAEMON_SOCKET,
+            timeout: Optional[float] = 5.0) -> Optional[Dict[str, Any]]:
+    """Send a control request (``status`` or ``stop``) to the daemon.
+
+    Returns:
+        The daemon's reply, or None if no daemon is running
+    """
+    sock = _connect(socket_path, timeout)
+    if sock is None:
+        return None
+    try:
+        _send(sock, {"version": PROTOCOL_VERSION, **message})
+        line = sock.makefile("rb").readline()
+        return json.loads(line) if line else None
+    finally:
+        sock.close()
+
+
+def forward(argv: List[str], socket_path: Path = DAEMON_SOCKET,
+            stdout: Optional[IO[str]] = None, stderr: Optional[IO[str]] = None) -> Optional[int]:
+    """Run a CLI call in the daemon.
+
+    Args:
+        argv: Command line arguments, without the program name
+        socket_path: Socket of the daemon
+        stdout: Stream the call's output is relayed to (default: ``sys.stdout``)
+        stderr: Stream the call's errors are relayed to (default: ``sys.stderr``)
+
+    Returns:
+        Exit code of the call, or None if it must run in-process (no daemon
+        is running, or it runs with different settings)
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+
+    tty = stdout.isatty()
+    terminal = {key: os.environ[key] for key in TERMINAL_VARIABLES if key in os.environ}
+    if tty:
+        size = shutil.get_terminal_size()
+        terminal.setdefault("COLUMNS", str(size.columns))
+        terminal.setdefault("LINES", str(size.lines))
+    try:
+        with sock, sock.makefile("rb") as frames:
+            _send(sock, {
+                "version": PROTOCOL_VERSION,
+                "agent_task": __version__,
+                "command": "run",
+                "argv": argv,
+                "cwd": os.getcwd(),
+                "tty": tty,
+                "terminal": terminal,
+                "settings": _settings(os.environ),
+            })
+            for line in frames:
+                frame = json.loads(line)
+                if "out" in frame:
+                    stdout.write(frame["out"])
+                    stdout.flush()
+                elif "err" in frame:
+                    stderr.write(frame["err"])
+                    stderr.flush()
+                elif "exit" in frame:
+                    return frame["exit"]
+                elif "refused" in frame:
+                    return None
+    except BrokenPipeError:
+        # Our reader went away (e.g. `| head`); dropping the connection
+        # stops the call in the daemon
+        return 0
+    except OSError as e:
+        stderr.write(f"Lost connection to the agent-task daemon: {e}\n")
+        return 1
+    # The daemon died while the call was running; it may have had effects,
+    # so it is not retried in-process
+    stderr.write("The agent-task daemon exited before the command finished\n")
+    return 1
+
+
+class _Frames:
+    """Text stream that sends everything written to it as frames to a client."""
+
+    def __init__(self, sock: socket.socket, key: str, tty: bool):
+        self.sock = sock
+        self.key = key
+        self.tty = tty
+        self.broken = False
+        self.encoding = "utf-8"
+        self.errors = "strict"
+
+    def write(self, text: str) -> int:
+        if text and not self.broken:
+            try:
+                _send(self.sock, {self.key: text})
+            except OSError:
+                # Report the lost client once, so commands can stop early
+                self.broken = True
+                raise BrokenPipeError("agent-task client disconnected")
+        return len(text)
+
+    def writelines(self, lines) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return self.tty
+
+    def fileno(self) -> int:
+        raise io.UnsupportedOperation("daemon output has no file descriptor")
+
+    def writable(self) -> bool:
+        return True
+
+
+class Daemon:
+    """Server running CLI calls for ``agent-task`` clients."""
+
+    def __init__(self, socket_path: Path = DAEMON_SOCKET, tasks_dir: Path = TASKS_DIR):
+        """Initialize the daemon.
+
+        Args:
+            socket_path: Unix socket to listen on
+            tasks_dir: Task archive watched for added and removed tasks
+        """
+        self.socket_path = Path(socket_path)
+        self.tasks_dir = Path(tasks_dir)
+        self.started = time.time()
+        self.requests = 0
+        self.settings = _settings(os.environ)
+        self._server: Optional[socket.socket] = None
+        self._stopping = threading.Event()
+        # Calls change the working directory and sys.stdout, so they run one at a time
+        self._run_lock = threading.Lock()
+
+    def bind(self) -> None:
+        """Listen on the socket, replacing a stale one left by a dead daemon.
+
+        Raises:
+            ValueError: If another daemon is already listening
+        """
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists() or self.socket_path.is_symlink():
+            sock = _connect(self.socket_path, timeout=1.0)
+            if sock is not None:
+                sock.close()
+                raise ValueError(f"An agent-task daemon is already running on {self.socket_path}")
+            self.socket_path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the owner may connect: the daemon runs commands as its user
+        umask = os.umask(0o177)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(umask)
+        server.listen(16)
+        self._server = server
+
+    def warm(self) -> None:
+        """Import the commands and load the catalog ahead of the first call."""
+        from . import commands  # noqa: F401
+        from .api import keep_session
+        from .task_manager import TaskManager
+
+        keep_session()
+        for _ in TaskManager.iter_tasks():
+            pass
+
+    def _watch(self) -> None:
+        """Refresh the resident catalog when tasks are added or removed."""
+        from .task_manager import TaskManager
+
+        last = None
+        while not self._stopping.wait(WATCH_INTERVAL):
+            try:
+                signature = os.stat(self.tasks_dir).st_mtime_ns
+            except OSError:
+                continue
+            if signature == last:
+                continue
+            # Skip a round rather than wait behind a running call
+            if not self._run_lock.acquire(blocking=False):
+                continue
+            try:
+                for _ in TaskManager.iter_tasks():
+                    pass
+                last = signature
+            except Exception:
+                pass
+            finally:
+                self._run_lock.release()
+
+    def serve_forever(self) -> None:
+        """Bind the socket and serve clients until stopped."""
+        if self._server is None:
+            self.bind()
+        watcher = threading.Thread(target=self._watch, name="agent-task-watch", daemon=True)
+        watcher.start()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = self._server.accept()
+                except OSError:
+                    if self._stopping.is_set():
+                        break
+                    raise
+                threading.Thread(target=self._serve_connection, args=(conn,),
+                                 name="agent-task-client", daemon=True).start()
+        finally:
+            self.close()
+            # Let a running call finish before the process exits
+            with self._run_lock:
+                pass
+
+    def stop(self) -> None:
+        """Stop serving; a running call finishes first."""
+        self._stopping.set()
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Close the socket and remove its file."""
+        self._stopping.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the running daemon."""
+        return {
+            "pid": os.getpid(),
+            "version": __version__,
+            "uptime": round(time.time() - self.started, 3),
+            "requests": self.requests,
+            "socket": str(self.socket_path),
+        }
+
+    def _serve_connection(self, conn: socket.socket) -> None:
+        """Answer one client connection and close it."""
+        with conn:
+            self._handle(conn)
+
+    def _handle(self, conn: socket.socket) -> None:
+        """Answer one client connection."""
+        try:
+            line = conn.makefile("rb").readline()
+            message = json.loads(line)
+        except (OSError, ValueError):
+            return
+        try:
+            if not isinstance(message, dict) or message.get("version") != PROTOCOL_VERSION:
+                _send(conn, {"refused": "protocol version mismatch"})
+            elif message.get("command") == "status":
+                _send(conn, self.status())
+            elif message.get("command") == "stop":
+                _send(conn, {"stopping": True})
+                self.stop()
+            elif message.get("command") == "run":
+                if message.get("agent_task") != __version__:
+                    _send(conn, {"refused": "agent-task version mismatch"})
+                elif message.get("settings") != self.settings:
+                    _send(conn, {"refused": "settings differ from the daemon's"})
+                else:
+                    exit_code = self.run(message, conn)
+                    if exit_code is None:
+                        _send(conn, {"refused": "daemon is busy with another call"})
+                    else:
+                        _send(conn, {"exit": exit_code})
+            else:
+                _send(conn, {"refused": f"unknown command {message.get('command')!r}"})
+        except OSError:
+            # The client went away
+            pass
+
+    def run(self, message: Dict[str, Any], conn: socket.socket) -> Optional[int]:
+        """Run a forwarded CLI call, unless another call is running.
+
+        Args:
+            message: ``run`` request with the call's arguments, working
+                directory and terminal settings
+            conn: Client connection the output is sent to
+
+        Returns:
+            Exit code of the call, or None if the daemon is busy
+        """
+        from cleo.io.inputs.argv_input import ArgvInput
+        from cleo.io.outputs.stream_output import StreamOutput
+        from .cli import create_application
+        from .commands import _console
+
+        tty = bool(message.get("tty"))
+        out = _Frames(conn, "out", tty)
+        err = _Frames(conn, "err", tty)
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        self.requests += 1
+        try:
+            cwd = os.getcwd()
+            saved = {key: os.environ.get(key) for key in TERMINAL_VARIABLES}
+            try:
+                os.chdir(message["cwd"])
+                for key in TERMINAL_VARIABLES:
+                    os.environ.pop(key, None)
+                os.environ.update(message.get("terminal") or {})
+                # Rich decides on colors and width when the console is created
+                _console.cache_clear()
+
+                app = create_application()
+                app.auto_exits(False)
+                with redirect_stdout(out), redirect_stderr(err):
+                    return app.run(
+                        ArgvInput(["agent-task", *message["argv"]]),
+                        StreamOutput(out, decorated=tty),
+                        StreamOutput(err, decorated=tty),
+                    )
+            except Exception as e:
+                try:
+                    err.write(f"Error: {e}\n")
+                except OSError:
+                    pass
+                return 1
+            finally:
+                os.chdir(cwd)
+                for key, value in saved.items():
+                    if value is None:
+                        os.environ.pop(key, None)
+                    else:
+                        os.environ[key] = value
+                _console.cache_clear()
+        finally:
+            self._run_lock.release()
@@ -0,0 +1,212 @@
+"""
+Local HTTP response cache for TaskHub downloads.
+
+Response bodies are stored as files under ``HTTP_CACHE_DIR`` together with
+their ``ETag``/``Last-Modified`` validators in a small SQLite index. The
+client revalidates cached entries with conditional requests, so refreshing
+an unchanged task costs one small 304 round-trip, and the cache can answer
+on its own in offline mode. Entries are evicted least recently used first
+once the cache grows past its size limit.
+"""
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .paths import HTTP_CACHE_DIR
+from .profiling import count
+
+# Total size of cached bodies before the least recently used are evicted
+DEFAULT_MAX_BYTES = int(os.environ.get("AGENT_TASK_HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """Compute the cache key of a request.
+
+    Args:
+        url: Request URL
+        params: Query parameters
+
+    Returns:
+        Hex digest identifying the request
+    """
+    canonical = json.dumps([url, sorted((params or {}).items())])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of HTTP response bodies and validators."""
+
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the index and bodies
+            max_bytes: Size limit of the cached bodies
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index database."""
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_dir / "index.sqlite3"), timeout=10,
+                                   check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record(self, hit: bool) -> None:
+        """Count a cache hit or miss; downloads may run on several threads."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        count("http_cache.hits" if hit else "http_cache.misses")
+
+    def body_path(self, key: str) -> Path:
+        """Get the path of a cached body."""
+        return self.cache_dir / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Find a cached entry.
+
+        Args:
+            key: Cache key of the request
+
+        Returns:
+            Entry with ``etag``, ``last_modified`` and ``path``, or None
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not self.body_path(key).exists():
+            return None
+        return {"etag": row[0], "last_modified": row[1], "path": self.body_path(key)}
+
+    @staticmethod
+    def validators(entry: Optional[Dict]) -> Dict[str, str]:
+        """Build conditional request headers for a cached entry."""
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as recently used."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+    def read(self, key: str) -> bytes:
+        """Read a cached body and mark it as recently used."""
+        with open(self.body_path(key), "rb") as f:
+            body = f.read()
+        self.touch(key)
+        return body
+
+    def temp_file(self) -> str:
+        """Create a temporary file for a body that is being downloaded."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    def commit(self, key: str, url: str, tmp_path: str, etag: Optional[str] = None,
+               last_modified: Optional[str] = None) -> None:
+        """Move a downloaded body into the cache.
+
+        Args:
+            key: Cache key of the request
+            url: Request URL
+            tmp_path: Temporary file holding the body (see ``temp_file``)
+            etag: ETag of the response
+            last_modified: Last-Modified of the response
+        """
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.unlink(tmp_path)
+            return
+        path = self.body_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, url, etag, last_modified, size, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, etag, last_modified, size, time.time())
+                )
+        self.evict()
+
+    def store(self, key: str, url: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> None:
+        """Cache a response body.
+
+        Args:
+            key: Cache key of the request
+            url: Request URL
+            body: Response body
+            etag: ETag of the response
+            last_modified: Last-Modified of the response
+        """
+        tmp_path = self.temp_file()
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        self.commit(key, url, tmp_path, etag, last_modified)
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its limit.
+
+        Returns:
+            Number of evicted entries
+        """
+        evicted = 0
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+            with conn:
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        self.body_path(key).unlink()
+                    except FileNotFoundError:
+                        pass
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= size
+                    evicted += 1
+        return evicted
@@ -0,0 +1,182 @@
+"""
+Incremental decoding of TaskHub task payloads.
+
+``iter_task_items`` parses a task JSON document from a stream of byte
+chunks and yields each entry of its ``files`` object as soon as that entry
+has been parsed. A clone can therefore write files while the rest of the
+payload is still downloading, and only one value is held in memory at a
+time instead of the whole document.
+"""
+from typing import Any, Iterable, Iterator, Optional, Tuple
+import codecs
+import json
+import re
+
+_WHITESPACE = " \t\n\r"
+
+# Characters that end an unescaped run inside a JSON string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_decoder = json.JSONDecoder()
+
+
+def _find_string_end(text: str, pos: int, escaped: bool) -> Tuple[int, bool]:
+    """Find the closing quote of a JSON string.
+
+    Args:
+        text: Text to scan
+        pos: Position to start scanning at
+        escaped: Whether the previous character was an unconsumed backslash
+
+    Returns:
+        (index of the closing quote or -1, whether the text ends mid-escape)
+    """
+    if escaped:
+        if pos >= len(text):
+            return -1, True
+        pos += 1
+    while True:
+        match = _STRING_SPECIAL.search(text, pos)
+        if match is None:
+            return -1, False
+        if match.group() == '"':
+            return match.start(), False
+        pos = match.start() + 2
+        if pos > len(text):
+            return -1, True
+
+
+class _Reader:
+    """Buffered reader of decoded text over a stream of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _next_text(self) -> Optional[str]:
+        """Decode the next non-empty piece of text, or None at end of stream."""
+        if self.eof:
+            return None
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                return text
+        self.eof = True
+        return self._utf8.decode(b"", final=True) or None
+
+    def fill(self) -> bool:
+        """Append more text to the buffer, dropping consumed text.
+
+        Returns:
+            False if the stream is exhausted
+        """
+        text = self._next_text()
+        if text is None:
+            return False
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of ``chars``."""
+        char = self.peek()
+        if char is None or char not in chars:
+            found = "end of data" if char is None else repr(char)
+            raise ValueError(f"Invalid task data: expected one of {chars!r}, found {found}")
+        self.pos += 1
+        return char
+
+    def string(self) -> str:
+        """Read a JSON string.
+
+        Long strings are collected piecewise so each chunk is scanned and
+        copied once.
+        """
+        self.expect('"')
+        start = self.pos
+        end, escaped = _find_string_end(self.buf, start, False)
+        if end >= 0:
+            literal = self.buf[start - 1:end + 1]
+        else:
+            pieces = ['"', self.buf[start:]]
+            while True:
+                text = self._next_text()
+                if text is None:
+                    raise ValueError("Invalid task data: unterminated string")
+                end, escaped = _find_string_end(text, 0, escaped)
+                if end >= 0:
+                    pieces.append(text[:end + 1])
+                    break
+                pieces.append(text)
+            self.buf = text
+            literal = "".join(pieces)
+        self.pos = end + 1
+        return json.loads(literal)
+
+    def value(self) -> Any:
+        """Read any JSON value."""
+        if self.peek() == '"':
+            return self.string()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if not self.fill():
+                    raise ValueError(f"Invalid task data: {e}")
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_task_items(chunks: Iterable[bytes]) -> Iterator[Tuple[str, str, Any]]:
+    """Decode a task payload incrementally.
+
+    Args:
+        chunks: Byte chunks of a JSON task object
+
+    Yields:
+        ``("file", path, content)`` for each entry of ``files`` and
+        ``("field", name, value)`` for every other top-level field, in
+        document order
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            name = reader.string()
+            reader.expect(":")
+            if name == "files" and reader.peek() == "{":
+                reader.pos += 1
+                if reader.peek() == "}":
+                    reader.pos += 1
+                else:
+                    while True:
+                        path = reader.string()
+                        reader.expect(":")
+                        yield "file", path, reader.value()
+                        if reader.expect(",}") == "}":
+                            break
+            else:
+                yield "field", name, reader.value()
+            if reader.expect(",}") == "}":
+                break
+    if reader.peek() is not None:
+        raise ValueError("Invalid task data: unexpected data after the task object")
@@ -0,0 +1,174 @@
+"""
+Cross-process locking for the shared task archive.
+
+Many ``agent-task`` processes may work on one ``TASKS_DIR`` at once. Two
+kinds of ``fcntl.flock`` reader/writer locks coordinate them:
+
+- a per-task lock: loading, importing and publishing a task take it shared,
+  so any number of readers run in parallel; archiving and cloning take it
+  exclusive while they swap in the new checkout and manifest
+- a catalog lock over the whole store: every task operation takes it
+  shared, and only ``gc``, which deletes blobs and manifests of any task,
+  takes it exclusive
+
+Updates of a project's ``.cursor/mcp.json`` are serialized by a
+per-workspace lock.
+
+Locks are always taken in that order (catalog, then task) so processes
+cannot deadlock. Lock files live under ``LOCKS_DIR`` and are never removed,
+which keeps flock semantics race-free. On platforms without ``fcntl`` the
+locks are no-ops.
+"""
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .paths import LOCKS_DIR
+from .profiling import timed
+
+# Seconds to wait for a lock before giving up (default: wait indefinitely)
+_timeout = os.environ.get("AGENT_TASK_LOCK_TIMEOUT")
+DEFAULT_LOCK_TIMEOUT: Optional[float] = float(_timeout) if _timeout else None
+
+# Polling interval bounds while waiting for a lock with a timeout
+_POLL_MIN = 0.01
+_POLL_MAX = 0.5
+
+
+class FileLock:
+    """Shared or exclusive ``flock`` on a lock file.
+
+    Each instance opens its own file description, so locks also exclude
+    each other between threads of one process.
+    """
+
+    def __init__(self, path: Path, shared: bool = False,
+                 timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT, description: str = ""):
+        """Initialize the lock.
+
+        Args:
+            path: Lock file (created if missing)
+            shared: Take a shared (reader) lock instead of an exclusive one
+            timeout: Seconds to wait before raising ``ValueError``
+                (None waits indefinitely)
+            description: What is being locked, for error messages
+        """
+        self.path = Path(path)
+        self.shared = shared
+        self.timeout = timeout
+        self.description = description or str(self.path)
+        self._fd: Optional[int] = None
+
+    @timed("lock", "acquire lock")
+    def acquire(self) -> None:
+        """Take the lock, waiting for conflicting holders to release it."""
+        if fcntl is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        try:
+            if self.timeout is None:
+                fcntl.flock(fd, operation)
+            else:
+                deadline = time.monotonic() + self.timeout
+                delay = _POLL_MIN
+                while True:
+                    try:
+                        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise ValueError(f"Timed out waiting for the lock on {self.description}")
+                        time.sleep(min(delay, remaining))
+                        delay = min(delay * 2, _POLL_MAX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is not None:
+            # Closing the descriptor releases the flock
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        """Whether this instance holds the lock."""
+        return self._fd is not None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def task_lock(task_name: str, shared: bool = False, locks_dir: Optional[Path] = None,
+              timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT) -> FileLock:
+    """Get the reader/writer lock of a task.
+
+    Args:
+        task_name: Name of the task
+        shared: Take a reader lock instead of a writer lock
+        locks_dir: Directory holding the lock files (default: ``LOCKS_DIR``)
+        timeout: Seconds to wait before giving up (None waits indefinitely)
+
+    Returns:
+        Unacquired lock, to be used as a context manager
+    """
+    return FileLock(Path(locks_dir or LOCKS_DIR) / "tasks" / f"{task_name}.lock", shared, timeout,
+                    f"task '{task_name}'")
+
+
+def catalog_lock(shared: bool = True, locks_dir: Optional[Path] = None,
+                 timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT) -> FileLock:
+    """Get the lock over the whole task archive and blob store.
+
+    Args:
+        shared: Take a shared lock (task operations) instead of an
+            exclusive one (garbage collection)
+        locks_dir: Directory holding the lock files (default: ``LOCKS_DIR``)
+        timeout: Seconds to wait before giving up (None waits indefinitely)
+
+    Returns:
+        Unacquired lock, to be used as a context manager
+    """
+    return FileLock(Path(locks_dir or LOCKS_DIR) / "catalog.lock", shared, timeout, "the task catalog")
+
+
+def workspace_lock(workspace: Path, locks_dir: Optional[Path] = None,
+                   timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT) -> FileLock:
+    """Get the lock serializing config updates in a project directory.
+
+    The lock file is kept under ``locks_dir``, keyed by the directory's
+    resolved path, so projects are not littered with lock files.
+
+    Args:
+        workspace: Project (or ``.cursor``) directory
+        locks_dir: Directory holding the lock files (default: ``LOCKS_DIR``)
+        timeout: Seconds to wait before giving up (None waits indefinitely)
+
+    Returns:
+        Unacquired lock, to be used as a context manager
+    """
+    key = hashlib.sha256(str(Path(workspace).resolve()).encode("utf-8")).hexdigest()[:32]
+    return FileLock(Path(locks_dir or LOCKS_DIR) / "workspaces" / f"{key}.lock", False, timeout,
+                    f"workspace '{workspace}'")
+
+
+def instant_mcp_lock(locks_dir: Optional[Path] = None,
+                     timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT) -> FileLock:
+    """Get the lock serializing uses of instant-mcp's global target path."""
+    return FileLock(Path(locks_dir or LOCKS_DIR) / "instant-mcp.lock", False, timeout, "instant-mcp")
@@ -0,0 +1,183 @@
+"""
+Materialization of archived task trees into projects.
+
+A task tree can be placed into a project in several ways, from cheapest to
+most expensive:
+
+- ``reflink``: copy-on-write clone of each file (Linux ``FICLONE`` on
+  btrfs, XFS, and other CoW filesystems). Independent copies that share
+  disk blocks until one side is modified.
+- ``hardlink``: link each file to the archived copy. No data is written;
+  archived files are links into the read-only blob store, so the loaded
+  files are read-only too.
+- ``symlink``: link each file to the archived copy by path.
+- ``copy``: plain byte copy.
+
+``auto`` picks the cheapest strategy that still gives independent files
+(reflink, falling back to copy). The sharing strategies are opt-in.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List
+import errno
+import os
+import shutil
+import stat
+
+from .profiling import count, timed
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+STRATEGIES = ("auto", "reflink", "hardlink", "symlink", "copy")
+
+# ioctl request number of FICLONE (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Errors meaning a strategy is not available for this source/destination pair
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EACCES, errno.EINVAL, errno.ENOTTY,
+    errno.EOPNOTSUPP, errno.ENOSYS, errno.EMLINK, errno.EBADF,
+}
+
+
+def _make_writable(path: str) -> None:
+    """Give the owner write access to a private copy of a read-only blob."""
+    mode = os.stat(path).st_mode
+    if not mode & stat.S_IWUSR:
+        os.chmod(path, stat.S_IMODE(mode) | stat.S_IWUSR)
+
+
+def _reflink_file(src: str, dst: str) -> None:
+    """Clone a file with a copy-on-write reflink."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform", dst)
+    with open(src, "rb") as fsrc:
+        try:
+            with open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+    _make_writable(dst)
+
+
+def _hardlink_file(src: str, dst: str) -> None:
+    """Hard link a file to its archived copy."""
+    os.link(src, dst)
+
+
+def _symlink_file(src: str, dst: str) -> None:
+    """Symlink a file to its archived copy."""
+    os.symlink(os.path.abspath(src), dst)
+
+
+def _copy_file(src: str, dst: str) -> None:
+    """Copy a file's contents and metadata."""
+    shutil.copy2(src, dst)
+    _make_writable(dst)
+
+
+_PLACERS: Dict[str, Callable[[str, str], None]] = {
+    "reflink": _reflink_file,
+    "hardlink": _hardlink_file,
+    "symlink": _symlink_file,
+    "copy": _copy_file,
+}
+
+
+def _fallback_chain(strategy: str) -> List[str]:
+    """Get the strategies to try, in order, for a requested strategy."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown materialization strategy '{strategy}'. "
+                         f"Expected one of: {', '.join(STRATEGIES)}")
+    if strategy == "auto":
+        return ["reflink", "copy"]
+    if strategy == "copy":
+        return ["copy"]
+    return [strategy, "copy"]
+
+
+class Materializer:
+    """Places files using the best working strategy from a fallback chain.
+
+    Once a strategy fails with an "unsupported" error it is skipped for the
+    remaining files, so a tree on a non-CoW filesystem costs at most one
+    failed reflink attempt.
+    """
+
+    def __init__(self, strategy: str = "auto"):
+        """Initialize the materializer.
+
+        Args:
+            strategy: One of ``STRATEGIES``
+        """
+        self.chain = _fallback_chain(strategy)
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def strategy(self) -> str:
+        """The strategy currently in use."""
+        return self.chain[0]
+
+    def place(self, src: Path, dst: Path) -> str:
+        """Place a single file.
+
+        Args:
+            src: Source file
+            dst: Destination path (must not exist)
+
+        Returns:
+            Name of the strategy that placed the file
+        """
+        while True:
+            strategy = self.chain[0]
+            try:
+                _PLACERS[strategy](str(src), str(dst))
+            except OSError as e:
+                if len(self.chain) == 1 or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self.chain.pop(0)
+                continue
+            self.counts[strategy] = self.counts.get(strategy, 0) + 1
+            count("files.copied")
+            return strategy
+
+    @timed("copy", "materialize tree")
+    def tree(self, src: Path, dst: Path) -> List[Path]:
+        """Materialize a directory tree.
+
+        Args:
+            src: Source directory
+            dst: Destination directory (created if missing)
+
+        Returns:
+            Paths of the placed files, relative to ``dst``
+        """
+        placed = []
+        src = Path(src)
+        dst = Path(dst)
+        for root, dirs, files in os.walk(src):
+            rel_root = Path(root).relative_to(src)
+            (dst / rel_root).mkdir(parents=True, exist_ok=True)
+            dirs.sort()
+            for name in sorted(files):
+                self.place(Path(root) / name, dst / rel_root / name)
+                placed.append(rel_root / name)
+        return placed
+
+
+def materialize_tree(src: Path, dst: Path, strategy: str = "auto") -> List[Path]:
+    """Materialize a directory tree using the given strategy.
+
+    Args:
+        src: Source directory
+        dst: Destination directory (created if missing)
+        strategy: One of ``STRATEGIES``
+
+    Returns:
+        Paths of the placed files, relative to ``dst``
+    """
+    return Materializer(strategy).tree(src, dst)
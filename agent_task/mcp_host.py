@@ -0,0 +1,315 @@
+"""
+Shared MCP host serving every task MCP server of a workspace.
+
+Instead of one ``instant-mcp`` process per MCP script, ``load`` and
+``import`` register a workspace's scripts in ``.cursor/agent-task-host.json``
+and add a single ``agent-task mcp-host`` entry to ``.cursor/mcp.json``.
+The host speaks MCP (JSON-RPC 2.0 over stdio) and exposes each script's
+tools as ``<server>__<tool>``.
+
+Tool lists come from the scripts' ``ast`` manifests, so starting the host
+imports nothing. A script is imported on the first call of one of its
+tools, and re-imported when the file changes; the registry is re-read when
+it changes, and clients are notified when the tool list changes.
+"""
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Tuple
+import asyncio
+import contextlib
+import importlib.util
+import inspect
+import json
+import os
+import re
+import sys
+import traceback
+
+from .atomic import atomic_write
+from .mcp_manifest import extract_server
+
+# Registry of hosted servers, next to the workspace's mcp.json
+HOST_CONFIG_NAME = "agent-task-host.json"
+
+# Name of the host's entry in mcp.json
+HOST_SERVER_NAME = "agent-task"
+
+# Separator between server and tool names in namespaced tool names
+NAMESPACE_SEPARATOR = "__"
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Get the (mtime, size, inode) of a file, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def tool_name(server: str, tool: str) -> str:
+    """Build the namespaced name of a hosted tool."""
+    return _INVALID_NAME_CHARS.sub("_", f"{server}{NAMESPACE_SEPARATOR}{tool}")[:64]
+
+
+def register_servers(cursor_dir: Path, servers: List[Dict], scripts_root: Path) -> Path:
+    """Register MCP servers with a workspace's shared host.
+
+    Callers serialize updates with the workspace lock.
+
+    Args:
+        cursor_dir: ``.cursor`` directory of the workspace
+        servers: Server manifests (see ``mcp_manifest.task_servers``)
+        scripts_root: Directory the servers' ``source`` paths are relative to
+
+    Returns:
+        Path of the host registry
+    """
+    path = Path(cursor_dir) / HOST_CONFIG_NAME
+    registry = {"version": 1, "servers": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            registry = json.load(f)
+    except (OSError, ValueError):
+        pass
+    for server in servers:
+        registry.setdefault("servers", {})[server["name"]] = {
+            "script": str((Path(scripts_root) / server["source"]).resolve()),
+        }
+    atomic_write(path, json.dumps(registry, indent=2))
+    return path
+
+
+def host_config(workspace: Path) -> Dict[str, Any]:
+    """Get the mcp.json entry that starts the shared host of a workspace."""
+    return {
+        "command": "agent-task",
+        "args": ["mcp-host", "--workspace", str(Path(workspace).resolve())],
+    }
+
+
+class _Script:
+    """A hosted MCP script, parsed eagerly and imported on first use."""
+
+    def __init__(self, server: str, path: Path):
+        self.server = server
+        self.path = Path(path)
+        self.manifest: Dict[str, Any] = {"tools": []}
+        self.manifest_signature = None
+        self.module = None
+        self.module_signature = None
+        self.imports = 0
+
+    def refresh_manifest(self) -> bool:
+        """Re-parse the script if it changed; return whether it did."""
+        signature = _signature(self.path)
+        if signature == self.manifest_signature:
+            return False
+        self.manifest_signature = signature
+        if signature is None:
+            self.manifest = {"tools": [], "error": "script not found"}
+        else:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                self.manifest = extract_server(f.read(), self.server)
+        return True
+
+    def function(self, name: str):
+        """Get a tool function, importing or re-importing the script as needed."""
+        signature = _signature(self.path)
+        if self.module is None or signature != self.module_signature:
+            module_name = f"_agent_task_mcp_{_INVALID_NAME_CHARS.sub('_', self.server)}"
+            spec = importlib.util.spec_from_file_location(module_name, self.path)
+            if spec is None or spec.loader is None:
+                raise ValueError(f"Cannot import MCP script {self.path}")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.module = module
+            self.module_signature = signature
+            self.imports += 1
+        function = getattr(self.module, name, None)
+        if not callable(function):
+            raise ValueError(f"Tool '{name}' is not a function of {self.path.name}")
+        return function
+
+
+class McpHost:
+    """MCP server multiplexing the task MCP scripts of one workspace."""
+
+    def __init__(self, workspace: Path):
+        """Initialize the host.
+
+        Args:
+            workspace: Project directory whose ``.cursor`` registry is served
+        """
+        self.workspace = Path(workspace)
+        self.registry_path = self.workspace / ".cursor" / HOST_CONFIG_NAME
+        self.registry_signature = None
+        self.scripts: Dict[str, _Script] = {}
+        self._listed: Optional[List[str]] = None
+
+    def refresh(self) -> bool:
+        """Pick up registry and script changes.
+
+        Returns:
+            Whether the set of tools may have changed
+        """
+        changed = False
+        signature = _signature(self.registry_path)
+        if signature != self.registry_signature:
+            self.registry_signature = signature
+            servers = {}
+            try:
+                with open(self.registry_path, "r", encoding="utf-8") as f:
+                    servers = json.load(f).get("servers", {})
+            except (OSError, ValueError):
+                pass
+            scripts = {}
+            for server, entry in sorted(servers.items()):
+                script = self.scripts.get(server)
+                if script is None or str(script.path) != entry["script"]:
+                    script = _Script(server, Path(entry["script"]))
+                scripts[server] = script
+            changed = scripts.keys() != self.scripts.keys() or any(
+                scripts[name] is not self.scripts.get(name) for name in scripts)
+            self.scripts = scripts
+        for script in self.scripts.values():
+            changed = script.refresh_manifest() or changed
+        return changed
+
+    def _tools(self) -> Dict[str, Tuple[_Script, Dict]]:
+        """Map namespaced tool names to their script and tool manifest."""
+        tools = {}
+        for server, script in self.scripts.items():
+            for tool in script.manifest["tools"]:
+                tools[tool_name(server, tool["name"])] = (script, tool)
+        return tools
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """List the tools of every hosted server."""
+        self.refresh()
+        listed = []
+        for name, (script, tool) in self._tools().items():
+            description = tool.get("description") or ""
+            if script.manifest.get("instructions"):
+                description = f"[{script.server}] {script.manifest['instructions']}\n\n{description}"
+            listed.append({
+                "name": name,
+                "description": description.strip(),
+                "inputSchema": tool.get("inputSchema", {"type": "object", "properties": {}}),
+            })
+        self._listed = [tool["name"] for tool in listed]
+        return listed
+
+    def call_tool(self, name: str, arguments: Optional[Dict] = None) -> Dict[str, Any]:
+        """Call a hosted tool.
+
+        Args:
+            name: Namespaced tool name
+            arguments: Keyword arguments of the tool function
+
+        Returns:
+            MCP tool result; failures of the tool are reported in the result
+        """
+        self.refresh()
+        tools = self._tools()
+        if name not in tools:
+            raise KeyError(name)
+        script, tool = tools[name]
+        try:
+            # Scripts must not write to stdout, which carries the protocol
+            with contextlib.redirect_stdout(sys.stderr):
+                function = script.function(tool["name"])
+                result = function(**(arguments or {}))
+                if inspect.isawaitable(result):
+                    result = asyncio.run(_await(result))
+        except Exception:
+            return {"content": [{"type": "text", "text": traceback.format_exc(limit=5)}],
+                    "isError": True}
+        if result is None:
+            text = ""
+        elif isinstance(result, str):
+            text = result
+        else:
+            text = json.dumps(result, default=str)
+        return {"content": [{"type": "text", "text": text}], "isError": False}
+
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Handle one JSON-RPC message.
+
+        Returns:
+            The response, or None for notifications
+        """
+        method = message.get("method")
+        msg_id = message.get("id")
+        params = message.get("params") or {}
+        if "id" not in message:
+            return None
+
+        def error(code: int, text: str) -> Dict[str, Any]:
+            return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": text}}
+
+        if method == "initialize":
+            result = {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": {"name": HOST_SERVER_NAME, "version": "0.1.0"},
+            }
+        elif method == "ping":
+            result = {}
+        elif method == "tools/list":
+            result = {"tools": self.list_tools()}
+        elif method == "tools/call":
+            if not isinstance(params.get("name"), str):
+                return error(INVALID_PARAMS, "Missing tool name")
+            try:
+                result = self.call_tool(params["name"], params.get("arguments"))
+            except KeyError:
+                return error(INVALID_PARAMS, f"Unknown tool: {params['name']}")
+        else:
+            return error(METHOD_NOT_FOUND, f"Method not found: {method}")
+        return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+    def serve(self, stdin: IO[str], stdout: IO[str]) -> None:
+        """Serve newline-delimited JSON-RPC messages until stdin closes."""
+        def send(message: Dict[str, Any]) -> None:
+            stdout.write(json.dumps(message) + "\n")
+            stdout.flush()
+
+        for line in stdin:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                send({"jsonrpc": "2.0", "id": None,
+                      "error": {"code": PARSE_ERROR, "message": "Parse error"}})
+                continue
+            if not isinstance(message, dict):
+                send({"jsonrpc": "2.0", "id": None,
+                      "error": {"code": INVALID_REQUEST, "message": "Invalid request"}})
+                continue
+
+            # Tell clients that listed tools before when scripts change
+            if self._listed is not None and message.get("method") != "tools/list":
+                self.refresh()
+                if [name for name in self._tools()] != self._listed:
+                    self._listed = None
+                    send({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+
+            response = self.handle(message)
+            if response is not None:
+                send(response)
+
+
+async def _await(awaitable) -> Any:
+    """Wrap an awaitable so ``asyncio.run`` accepts it."""
+    return await awaitable
@@ -0,0 +1,292 @@
+"""
+MCP server manifests extracted from task scripts.
+
+Task MCP servers are plain Python scripts in the ``mcp/`` directory of a
+task (the instant-mcp convention): top-level functions are the tools, a
+module-level ``name = "..."`` names the server, an optional
+``instructions = "..."`` describes it, and an optional list of function
+names (``tools = [...]`` or a bare ``[...]`` expression) selects which
+functions are exposed.
+
+Scripts are parsed with ``ast`` and never imported. The extracted manifest
+of each script is cached by the script's content hash, and archive and
+clone precompute a per-task manifest so loading a task only reads one
+small JSON file.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import ast
+import json
+import sys
+
+from .atomic import atomic_write
+from .paths import MCP_CACHE_DIR
+from .profiling import timed
+from .store import BlobStore, hash_file
+
+# Version of the extracted manifest format; bumping it invalidates the cache
+MANIFEST_VERSION = 1
+
+# JSON Schema types of common parameter annotations
+_SCHEMA_TYPES = {
+    "str": "string",
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "list": "array",
+    "List": "array",
+    "tuple": "array",
+    "Tuple": "array",
+    "set": "array",
+    "Set": "array",
+    "dict": "object",
+    "Dict": "object",
+}
+
+
+def _string_constant(node: ast.AST) -> Optional[str]:
+    """Get the value of a string literal node."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _string_list(node: ast.AST) -> Optional[List[str]]:
+    """Get the values of a list or tuple of string literals."""
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        return None
+    values = [_string_constant(element) for element in node.elts]
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def _unparse(node: ast.AST, source: str) -> str:
+    """Get the source of an expression (``ast.unparse`` needs Python 3.9)."""
+    if hasattr(ast, "unparse"):
+        return ast.unparse(node)
+    return ast.get_source_segment(source, node) or ""
+
+
+def _annotation_schema(annotation: Optional[ast.AST]) -> Dict[str, Any]:
+    """Map a parameter annotation to a JSON Schema fragment."""
+    if annotation is None:
+        return {}
+    if isinstance(annotation, ast.Subscript):
+        base = annotation.value
+        # Optional[X] is X for schema purposes
+        if isinstance(base, ast.Name) and base.id == "Optional":
+            inner = annotation.slice
+            # Python 3.8 wraps subscripts in ast.Index
+            if sys.version_info < (3, 9) and isinstance(inner, ast.Index):
+                inner = inner.value
+            return _annotation_schema(inner)
+        annotation = base
+    if isinstance(annotation, ast.Attribute):
+        name = annotation.attr
+    elif isinstance(annotation, ast.Name):
+        name = annotation.id
+    else:
+        return {}
+    schema_type = _SCHEMA_TYPES.get(name)
+    return {"type": schema_type} if schema_type else {}
+
+
+def _tool(function: ast.AST, source: str) -> Dict[str, Any]:
+    """Describe a top-level function as an MCP tool."""
+    args = function.args
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    params = list(zip(positional, defaults)) + list(zip(args.kwonlyargs, args.kw_defaults))
+
+    properties = {}
+    required = []
+    parameters = []
+    for arg, default in params:
+        schema = _annotation_schema(arg.annotation)
+        parameter = {
+            "name": arg.arg,
+            "annotation": _unparse(arg.annotation, source) if arg.annotation is not None else None,
+            "required": default is None,
+        }
+        if default is not None:
+            parameter["default"] = _unparse(default, source)
+            try:
+                schema["default"] = ast.literal_eval(default)
+            except (ValueError, TypeError):
+                pass
+        else:
+            required.append(arg.arg)
+        parameters.append(parameter)
+        properties[arg.arg] = schema
+
+    return {
+        "name": function.name,
+        "description": (ast.get_docstring(function) or "").strip(),
+        "parameters": parameters,
+        "returns": _unparse(function.returns, source) if function.returns is not None else None,
+        "async": isinstance(function, ast.AsyncFunctionDef),
+        "inputSchema": {"type": "object", "properties": properties, "required": required},
+    }
+
+
+def extract_server(source: str, default_name: Optional[str] = None) -> Dict[str, Any]:
+    """Extract the manifest of an MCP server script.
+
+    Args:
+        source: Source code of the script
+        default_name: Server name used when the script sets none
+
+    Returns:
+        Manifest with the server ``name``, ``instructions`` and ``tools``;
+        scripts that do not parse get no tools and an ``error``
+    """
+    server = {"name": default_name, "instructions": "", "tools": []}
+    try:
+        module = ast.parse(source)
+    except SyntaxError as e:
+        server["error"] = f"{e.msg} (line {e.lineno})"
+        return server
+
+    functions = {}
+    selected = None
+    for node in module.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = node
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if not isinstance(target, ast.Name) or node.value is None:
+                    continue
+                if target.id == "name" and _string_constant(node.value) is not None:
+                    server["name"] = _string_constant(node.value)
+                elif target.id == "instructions" and _string_constant(node.value) is not None:
+                    server["instructions"] = _string_constant(node.value)
+                elif target.id == "tools" and _string_list(node.value) is not None:
+                    selected = _string_list(node.value)
+        elif isinstance(node, ast.Expr) and _string_list(node.value) is not None:
+            # A bare list of function names selects the exposed tools
+            selected = _string_list(node.value)
+
+    if selected is None:
+        selected = [name for name in functions if not name.startswith("_")]
+    server["tools"] = [
+        _tool(functions[name], source) if name in functions else {"name": name}
+        for name in selected
+    ]
+    return server
+
+
+def _server_cache_path(digest: str, cache_dir: Path) -> Path:
+    """Get the cache path of a script's extracted manifest."""
+    return Path(cache_dir) / f"v{MANIFEST_VERSION}" / digest[:2] / f"{digest}.json"
+
+
+def server_manifest(store: BlobStore, rel: str, digest: str,
+                    cache_dir: Path = MCP_CACHE_DIR, path: Optional[Path] = None) -> Dict[str, Any]:
+    """Get the manifest of an archived MCP script, extracting it on a cache miss.
+
+    Args:
+        store: Blob store holding the script
+        rel: Path of the script within the task (e.g. ``mcp/server.py``)
+        digest: Content hash of the script
+        cache_dir: Directory of the extraction cache
+        path: File to read on a cache miss (default: the script's blob)
+
+    Returns:
+        Server manifest, with the script path as ``source``
+    """
+    default_name = Path(rel).stem
+    cache_path = _server_cache_path(digest, cache_dir)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            server = json.load(f)
+    except (OSError, ValueError):
+        with open(path or store.blob_path(digest), "r", encoding="utf-8", errors="replace") as f:
+            server = extract_server(f.read())
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_path, json.dumps(server))
+    # Identical scripts under different file names share a cache entry, so
+    # the file name fallback is applied after the lookup
+    server["name"] = server["name"] or default_name
+    server["source"] = rel
+    return server
+
+
+def _mcp_sources(manifest: Dict) -> Dict[str, str]:
+    """Get the hashes of the top-level MCP scripts of a task manifest."""
+    return {
+        rel: entry["hash"] for rel, entry in sorted(manifest["files"].items())
+        if rel.startswith("mcp/") and rel.count("/") == 1 and rel.endswith(".py")
+    }
+
+
+def _task_manifest_path(task_name: str, cache_dir: Path) -> Path:
+    """Get the path of a task's precomputed MCP manifest."""
+    return Path(cache_dir) / "tasks" / f"{task_name}.json"
+
+
+def build_task_manifest(task_name: str, manifest: Dict, store: BlobStore,
+                        cache_dir: Path = MCP_CACHE_DIR) -> Dict[str, Any]:
+    """Precompute the MCP manifest of a task.
+
+    Called when a task is archived or cloned, with the task's new store
+    manifest.
+
+    Args:
+        task_name: Name of the task
+        manifest: Store manifest of the task
+        store: Blob store holding the task's files
+        cache_dir: Directory of the extraction cache
+
+    Returns:
+        Task MCP manifest with the script hashes it was built from and the
+        extracted servers
+    """
+    sources = _mcp_sources(manifest)
+    task_manifest = {
+        "version": MANIFEST_VERSION,
+        "sources": sources,
+        "servers": [server_manifest(store, rel, digest, cache_dir)
+                    for rel, digest in sources.items()],
+    }
+    path = _task_manifest_path(task_name, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(task_manifest))
+    return task_manifest
+
+
+@timed("parse", "task MCP servers")
+def task_servers(task_name: str, store: BlobStore,
+                 cache_dir: Path = MCP_CACHE_DIR) -> List[Dict[str, Any]]:
+    """Get the MCP servers of an archived task.
+
+    Reads the manifest precomputed at archive/clone time; it is rebuilt only
+    if it is missing or the task's scripts changed since. Nothing in the
+    task itself is written, so callers only need a shared task lock.
+
+    Args:
+        task_name: Name of the task
+        store: Blob store holding the task
+        cache_dir: Directory of the extraction cache
+
+    Returns:
+        Server manifests, ordered by script path
+    """
+    manifest = store.read_manifest(task_name)
+    if manifest is None:
+        # Tasks archived before the store have no manifest yet. Loads only
+        # hold a shared lock, so read the loose scripts instead of ingesting
+        mcp_dir = store.tasks_dir / task_name / "mcp"
+        scripts = sorted(mcp_dir.glob("*.py")) if mcp_dir.is_dir() else []
+        return [server_manifest(store, f"mcp/{script.name}", hash_file(script), cache_dir, script)
+                for script in scripts if script.is_file()]
+    try:
+        with open(_task_manifest_path(task_name, cache_dir), "r", encoding="utf-8") as f:
+            task_manifest = json.load(f)
+        if (task_manifest.get("version") == MANIFEST_VERSION
+                and task_manifest.get("sources") == _mcp_sources(manifest)):
+            return task_manifest["servers"]
+    except (OSError, ValueError):
+        pass
+    return build_task_manifest(task_name, manifest, store, cache_dir)["servers"]
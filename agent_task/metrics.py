@@ -0,0 +1,231 @@
+"""
+Local metrics of agent-task commands.
+
+Every command appends one compact JSON line to ``METRICS_FILE`` (under
+``LOG_DIR``): the command, its exit code and duration, the time spent per
+profiling phase and the counters bumped along the way (bytes sent and
+received, files copied, cache hits and misses, retries). Lines are written
+with a single ``O_APPEND`` write under an ``flock``, so concurrent
+processes on a CI runner never interleave. Once the file grows past
+``METRICS_MAX_BYTES`` it is rotated into ``metrics.ndjson.1`` .. ``.N``.
+
+``agent-task stats`` aggregates the records into latency percentiles per
+command. Set ``AGENT_TASK_METRICS=0`` to stop recording and
+``AGENT_TASK_METRICS_FILE`` to record elsewhere (e.g. a shared volume).
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import json
+import math
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .paths import METRICS_FILE
+from .profiling import Profiler
+
+# Bump when the layout of records changes
+METRICS_VERSION = 1
+
+# Size of the metrics file before it is rotated and number of rotated files kept
+METRICS_MAX_BYTES = int(os.environ.get("AGENT_TASK_METRICS_MAX_BYTES", str(4 * 1024 * 1024)))
+METRICS_BACKUPS = int(os.environ.get("AGENT_TASK_METRICS_BACKUPS", "3"))
+
+# Servers that run until stopped; their duration says nothing about latency
+UNRECORDED_COMMANDS = frozenset({"daemon", "mcp-host"})
+
+# Percentiles reported by ``summarize``
+PERCENTILES = (50, 95, 99)
+
+
+def enabled() -> bool:
+    """Check whether commands record metrics."""
+    return os.environ.get("AGENT_TASK_METRICS", "1").lower() not in ("0", "false", "no", "off")
+
+
+def metrics_file() -> Path:
+    """Get the file metrics are recorded in."""
+    return Path(os.environ.get("AGENT_TASK_METRICS_FILE") or METRICS_FILE)
+
+
+def build_record(command: str, exit_code: int, profiler: Profiler) -> Dict[str, Any]:
+    """Build the metrics record of a finished command.
+
+    Args:
+        command: Name of the command
+        exit_code: Exit code of the command
+        profiler: Profiler that ran during the command
+
+    Returns:
+        Record with the duration and per-phase self time in milliseconds
+        and the non-zero counters
+    """
+    return {
+        "v": METRICS_VERSION,
+        "ts": round(time.time(), 3),
+        "command": command,
+        "exit": exit_code,
+        "ms": round(profiler.wall_time * 1000, 3),
+        "phases": {row["phase"]: round(row["self"] * 1000, 3) for row in profiler.breakdown()},
+        "counters": {name: value for name, value in sorted(profiler.counters.items()) if value},
+    }
+
+
+def _backup(path: Path, index: int) -> Path:
+    return path.with_name(f"{path.name}.{index}")
+
+
+def _rotate(path: Path, backups: int) -> None:
+    """Shift ``path`` into the numbered backups, dropping the oldest."""
+    if backups <= 0:
+        os.unlink(path)
+        return
+    for index in range(backups - 1, 0, -1):
+        if _backup(path, index).exists():
+            os.replace(_backup(path, index), _backup(path, index + 1))
+    os.replace(path, _backup(path, 1))
+
+
+def append(record: Dict[str, Any], path: Optional[Path] = None,
+           max_bytes: int = METRICS_MAX_BYTES, backups: int = METRICS_BACKUPS) -> None:
+    """Append a record to the metrics file, rotating it when full.
+
+    Args:
+        record: Record to append
+        path: Metrics file (default: ``metrics_file()``)
+        max_bytes: Size past which the file is rotated
+        backups: Number of rotated files kept
+    """
+    path = Path(path) if path is not None else metrics_file()
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            st = os.fstat(fd)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            # Another process rotated the file while this one waited for the lock
+            if current is None or (current.st_ino, current.st_dev) != (st.st_ino, st.st_dev):
+                continue
+            if st.st_size and st.st_size + len(line) > max_bytes:
+                _rotate(path, backups)
+                continue
+            os.write(fd, line)
+            return
+        finally:
+            os.close(fd)
+
+
+def record_command(command: str, exit_code: int, profiler: Profiler) -> None:
+    """Record a finished command, unless metrics are disabled.
+
+    Metrics are best effort: failing to write them never fails the command.
+    """
+    if not enabled():
+        return
+    try:
+        append(build_record(command, exit_code, profiler))
+    except OSError:
+        pass
+
+
+def read_records(path: Optional[Path] = None, since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Read the recorded metrics, oldest first, including rotated files.
+
+    Args:
+        path: Metrics file (default: ``metrics_file()``)
+        since: Skip records older than this Unix time
+
+    Yields:
+        Records; unreadable lines (e.g. truncated by a crash) are skipped
+    """
+    path = Path(path) if path is not None else metrics_file()
+    backups = []
+    index = 1
+    while _backup(path, index).exists():
+        backups.append(_backup(path, index))
+        index += 1
+    for file in list(reversed(backups)) + [path]:
+        try:
+            f = open(file, "r", encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or "command" not in record:
+                    continue
+                if since is not None and record.get("ts", 0) < since:
+                    continue
+                yield record
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get a percentile of sorted values (nearest-rank method)."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate metrics records per command.
+
+    Args:
+        records: Records as read by ``read_records``
+
+    Returns:
+        One entry per command, sorted by name, with the number of calls and
+        failures, duration percentiles in milliseconds, percentiles of the
+        self time of each phase, summed counters and cache hit rates
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault(record["command"], []).append(record)
+
+    summaries = []
+    for command in sorted(groups):
+        group = groups[command]
+        counters: Dict[str, int] = {}
+        phases: Dict[str, List[float]] = {}
+        for record in group:
+            for name, value in record.get("counters", {}).items():
+                counters[name] = counters.get(name, 0) + value
+            for phase, ms in record.get("phases", {}).items():
+                phases.setdefault(phase, []).append(ms)
+        # A phase a call did not enter took no time in it
+        for values in phases.values():
+            values.extend([0.0] * (len(group) - len(values)))
+        hit_rates = {}
+        for name in sorted(counters):
+            if name.endswith(".hits"):
+                cache = name[:-len(".hits")]
+                lookups = counters[name] + counters.get(f"{cache}.misses", 0)
+                hit_rates[cache] = counters[name] / lookups if lookups else 0.0
+        summaries.append({
+            "command": command,
+            "calls": len(group),
+            "failures": sum(1 for record in group if record.get("exit")),
+            "ms": _percentiles([record.get("ms", 0.0) for record in group]),
+            "phases": {phase: _percentiles(values) for phase, values in sorted(phases.items())},
+            "counters": counters,
+            "hit_rates": hit_rates,
+        })
+    return summaries
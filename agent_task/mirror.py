@@ -0,0 +1,324 @@
+"""
+Offline mirrors of whole task libraries.
+
+A mirror moves a task library to machines that cannot reach TaskHub in
+one sequential stream: a compressed tar archive holding ``mirror.json``
+first, then each distinct file once, named by its content hash. The
+manifest lists every task with the hash, size and mode of its files. Files
+shared by many tasks are stored once, like in the blob store.
+
+Importing reads the archive front to back. Blobs the local store already
+has are skipped, and the others are hashed and written by a pool of
+worker threads while the archive is still being decompressed. A blob whose
+contents do not match its hash is rejected. Tasks are then checked out in
+parallel from the store, and a task whose blobs did not all arrive intact
+is not imported.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import json
+import os
+import re
+import time
+import uuid
+
+from .atomic import sync_dir, sync_file
+from .bundle import Bundle
+from .catalog import TaskCatalog
+from .locks import catalog_lock, task_lock
+from .mcp_manifest import build_task_manifest
+from .paths import BUNDLE_SUFFIX, TASKS_DIR, check_task_name, safe_mode, safe_path
+from .profiling import count, timed
+from .store import BlobStore, empty_manifest, hash_bytes, parent_dirs
+from .tarstream import iter_tar, open_tar_stream
+
+# Bump when the layout of mirror.json changes
+MIRROR_VERSION = 1
+
+MANIFEST_NAME = "mirror.json"
+BLOB_PREFIX = "blobs/"
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+# Threads hashing and storing blobs, and checking out tasks, during imports
+DEFAULT_MIRROR_WORKERS = int(os.environ.get("AGENT_TASK_MIRROR_WORKERS", "0")) or min(8, (os.cpu_count() or 1) + 2)
+
+
+def select_tasks(names: List[str], patterns: Optional[List[str]]) -> List[str]:
+    """Filter task names by glob patterns (all names if no patterns are given)."""
+    if not patterns:
+        return list(names)
+    return [name for name in names if any(fnmatch(name, pattern) for pattern in patterns)]
+
+
+def _check_digest(digest: str) -> str:
+    """Check that a blob hash from a mirror is a SHA-256 hex digest.
+
+    Hashes name files in the blob store, so anything else could point
+    outside it.
+    """
+    if not isinstance(digest, str) or not _DIGEST.fullmatch(digest):
+        raise ValueError(f"Invalid blob hash in mirror: {digest!r}")
+    return digest
+
+
+class _BlobSources:
+    """Where the contents of each exported blob are read from."""
+
+    def __init__(self, store: BlobStore):
+        self.store = store
+        self.sources: Dict[str, Tuple[Optional[Path], str]] = {}
+        self._bundle: Optional[Bundle] = None
+
+    def add(self, digest: str, bundle_path: Optional[Path] = None, rel: str = "") -> None:
+        """Remember the first place a blob was seen: the store or a bundle entry."""
+        self.sources.setdefault(digest, (bundle_path, rel))
+
+    def read(self, digest: str) -> Union[Path, bytes]:
+        """Get a blob as a path to stream from, or its contents for bundle entries."""
+        bundle_path, rel = self.sources[digest]
+        if bundle_path is None:
+            return self.store.blob_path(digest)
+        # Tasks are exported in order, so consecutive blobs share a bundle
+        if self._bundle is None or self._bundle.path != bundle_path:
+            self.close()
+            self._bundle = Bundle(bundle_path)
+        return self._bundle.read(rel)
+
+    def close(self) -> None:
+        if self._bundle is not None:
+            self._bundle.close()
+            self._bundle = None
+
+
+@timed("serialize", "export mirror")
+def export_mirror(output: Path, patterns: Optional[List[str]] = None, compression: str = "gzip",
+                  tasks_dir: Path = TASKS_DIR, store: Optional[BlobStore] = None) -> Dict[str, int]:
+    """Write tasks of the library into a mirror archive.
+
+    Loose tasks are exported from their store manifests and packed tasks
+    from their bundle indexes, so no file is hashed again.
+
+    Args:
+        output: Archive file to write (replaced atomically)
+        patterns: Glob patterns selecting the tasks (default: all tasks)
+        compression: Compression of the archive (see ``tarstream.COMPRESSIONS``)
+        tasks_dir: Directory holding the tasks
+        store: Blob store holding the loose tasks' files
+
+    Returns:
+        Report with the number of tasks, files, distinct blobs and their
+        bytes, and the size of the archive
+    """
+    store = store or BlobStore()
+    tasks_dir = Path(tasks_dir)
+    output = Path(output)
+    names = select_tasks(TaskCatalog(tasks_dir).task_names(), patterns)
+    if not names:
+        raise ValueError("No tasks match" if patterns else "No tasks to export")
+
+    report = {"tasks": 0, "files": 0, "blobs": 0, "bytes": 0, "archive_bytes": 0}
+    sources = _BlobSources(store)
+    tasks: Dict[str, Dict[str, Any]] = {}
+    blobs: Dict[str, int] = {}
+
+    # Blobs are immutable; the shared catalog lock keeps gc from removing them
+    with catalog_lock():
+        for name in names:
+            task_dir = tasks_dir / name
+            with task_lock(name, shared=True):
+                if task_dir.is_dir():
+                    manifest = store.read_manifest(name)
+                    if manifest is None:
+                        # Only blobs are written for tasks archived before the
+                        # store; ingesting would rewrite the task under a shared lock
+                        files, dirs = store.add_tree(task_dir)
+                    else:
+                        files = {rel: dict(entry) for rel, entry in manifest["files"].items()}
+                        dirs = list(manifest["dirs"])
+                    for entry in files.values():
+                        sources.add(entry["hash"])
+                else:
+                    bundle_path = tasks_dir / f"{name}{BUNDLE_SUFFIX}"
+                    with Bundle(bundle_path) as bundle:
+                        files = {entry["path"]: {"hash": entry["hash"], "size": entry["size"],
+                                                 "mode": entry["mode"]}
+                                 for entry in bundle.index["files"]}
+                        dirs = list(bundle.index["dirs"])
+                    for rel, entry in files.items():
+                        sources.add(entry["hash"], bundle_path, rel)
+            tasks[name] = {"files": files, "dirs": dirs}
+            for entry in files.values():
+                blobs[entry["hash"]] = entry["size"]
+            report["tasks"] += 1
+            report["files"] += len(files)
+
+        mirror = {"version": MIRROR_VERSION, "created": time.time(), "tasks": tasks, "blobs": blobs}
+        report["blobs"] = len(blobs)
+        report["bytes"] = sum(blobs.values())
+
+        def entries() -> Iterator[Tuple[str, Union[Path, bytes]]]:
+            yield MANIFEST_NAME, json.dumps(mirror, sort_keys=True).encode("utf-8")
+            for digest in blobs:
+                yield f"{BLOB_PREFIX}{digest}", sources.read(digest)
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_name(f".{output.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in iter_tar(entries(), compression):
+                    f.write(chunk)
+                    report["archive_bytes"] += len(chunk)
+                f.flush()
+                sync_file(f.fileno())
+            os.replace(tmp, output)
+        except BaseException:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+        finally:
+            sources.close()
+    sync_dir(output.parent)
+    return report
+
+
+def _read_manifest(tar: Any) -> Dict[str, Any]:
+    """Read and validate ``mirror.json``, the first member of a mirror."""
+    member = tar.next()
+    if member is None or member.name != MANIFEST_NAME:
+        raise ValueError("Not a task mirror: mirror.json must come first")
+    try:
+        mirror = json.load(tar.extractfile(member))
+    except ValueError:
+        raise ValueError("Corrupt mirror manifest")
+    if mirror.get("version") != MIRROR_VERSION:
+        raise ValueError(f"Unsupported mirror version {mirror.get('version')}")
+    for name, task in mirror["tasks"].items():
+        check_task_name(name)
+        for rel, entry in task["files"].items():
+            safe_path(rel)
+            _check_digest(entry["hash"])
+            entry["mode"] = safe_mode(entry["mode"])
+        for rel in task["dirs"]:
+            safe_path(rel)
+    return mirror
+
+
+def _store_blob(store: BlobStore, digest: str, data: bytes) -> bool:
+    """Store a blob received from a mirror if its contents match its hash."""
+    if hash_bytes(data) != digest:
+        return False
+    store.put_bytes(data, digest)
+    count("mirror.blobs_written")
+    return True
+
+
+def _checkout_task(store: BlobStore, tasks_dir: Path, name: str, task: Dict[str, Any]) -> None:
+    """Check out an imported task from blobs already in the store."""
+    manifest = empty_manifest()
+    manifest["files"] = task["files"]
+    dirs = set(task["dirs"])
+    for rel in task["files"]:
+        dirs.update(parent_dirs(rel))
+    manifest["dirs"] = sorted(dirs)
+
+    task_dir = tasks_dir / name
+    with task_lock(name):
+        old_manifest = store.task_manifest(name) if task_dir.exists() else empty_manifest()
+        store.checkout_manifest(task_dir, old_manifest, manifest)
+        store.write_manifest(name, manifest)
+        # Precompute the MCP manifest so loads do not parse scripts
+        build_task_manifest(name, manifest, store)
+
+
+@timed("copy", "import mirror")
+def import_mirror(archive: Union[Path, Any], patterns: Optional[List[str]] = None,
+                  overwrite: bool = False, workers: Optional[int] = None,
+                  tasks_dir: Path = TASKS_DIR, store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """Import tasks from a mirror archive.
+
+    Args:
+        archive: Mirror archive file, or a binary stream of one
+        patterns: Glob patterns selecting the tasks (default: all tasks)
+        overwrite: Update existing tasks instead of skipping them
+        workers: Threads storing blobs and checking out tasks
+            (default: ``DEFAULT_MIRROR_WORKERS``)
+        tasks_dir: Directory holding the tasks
+        store: Blob store receiving the files
+
+    Returns:
+        Report with the imported and skipped task names, the tasks that
+        failed and why, and the number of blobs written and already present
+    """
+    store = store or BlobStore()
+    tasks_dir = Path(tasks_dir)
+    workers = workers or DEFAULT_MIRROR_WORKERS
+    report: Dict[str, Any] = {"imported": [], "skipped": [], "failed": {},
+                              "blobs_written": 0, "blobs_present": 0}
+
+    f = open(archive, "rb") if isinstance(archive, (str, Path)) else archive
+    # Blobs written before their manifests must not be collected by gc
+    with f, catalog_lock(), ThreadPoolExecutor(max_workers=workers,
+                                               thread_name_prefix="mirror-import") as pool:
+        tar = open_tar_stream(f)
+        mirror = _read_manifest(tar)
+
+        selected = {}
+        for name in select_tasks(sorted(mirror["tasks"]), patterns):
+            if (tasks_dir / name).exists() and not overwrite:
+                report["skipped"].append(name)
+            elif not (tasks_dir / name).exists() and (tasks_dir / f"{name}{BUNDLE_SUFFIX}").exists():
+                report["failed"][name] = f"Task '{name}' is packed; run 'agent-task unpack {name}' first"
+            else:
+                selected[name] = mirror["tasks"][name]
+        wanted = {entry["hash"] for task in selected.values() for entry in task["files"].values()}
+
+        # Read the archive sequentially; hashing and writing run on the pool
+        corrupt = set()
+        pending: List[Tuple[str, Future]] = []
+        for member in tar:
+            if not member.isfile() or not member.name.startswith(BLOB_PREFIX):
+                continue
+            digest = _check_digest(member.name[len(BLOB_PREFIX):])
+            if digest not in wanted:
+                continue
+            wanted.discard(digest)
+            if store.has(digest):
+                report["blobs_present"] += 1
+                continue
+            pending.append((digest, pool.submit(_store_blob, store, digest,
+                                                tar.extractfile(member).read())))
+            # Bound the blobs held in memory
+            while len(pending) > workers * 2:
+                digest, future = pending.pop(0)
+                if future.result():
+                    report["blobs_written"] += 1
+                else:
+                    corrupt.add(digest)
+        for digest, future in pending:
+            if future.result():
+                report["blobs_written"] += 1
+            else:
+                corrupt.add(digest)
+
+        # Blobs still wanted were missing from the archive
+        unusable = corrupt | wanted
+        ready = {}
+        for name, task in selected.items():
+            bad = sorted(rel for rel, entry in task["files"].items() if entry["hash"] in unusable)
+            if bad:
+                report["failed"][name] = f"Missing or corrupt files: {', '.join(bad[:3])}"
+            else:
+                ready[name] = task
+
+        futures = {name: pool.submit(_checkout_task, store, tasks_dir, name, task)
+                   for name, task in ready.items()}
+        for name, future in futures.items():
+            try:
+                future.result()
+                report["imported"].append(name)
+            except Exception as e:
+                report["failed"][name] = str(e)
+    return report
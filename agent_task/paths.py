@@ -1,7 +1,7 @@
 """
 Path management for the AI Agent Platform.
 """
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Final
 
 from appdirs import AppDirs
@@ -20,6 +20,28 @@ LOG_DIR: Final[Path] = Path(dirs.user_log_dir)
 # Task-specific directories
 TASKS_DIR: Final[Path] = APP_DIR / "tasks"
 
+# Suffix of packed task bundles stored next to the task directories
+BUNDLE_SUFFIX: Final[str] = ".atask"
+
+# Content-addressable blob store
+OBJECTS_DIR: Final[Path] = APP_DIR / "objects"
+MANIFESTS_DIR: Final[Path] = APP_DIR / "manifests"
+
+# Lock files coordinating concurrent processes
+LOCKS_DIR: Final[Path] = APP_DIR / "locks"
+
+# Cache files
+CATALOG_FILE: Final[Path] = CACHE_DIR / "catalog.sqlite3"
+HASH_CACHE_DIR: Final[Path] = CACHE_DIR / "hashes"
+HTTP_CACHE_DIR: Final[Path] = CACHE_DIR / "http"
+MCP_CACHE_DIR: Final[Path] = CACHE_DIR / "mcp"
+
+# Command metrics, rotated into numbered backups (see ``metrics``)
+METRICS_FILE: Final[Path] = LOG_DIR / "metrics.ndjson"
+
+# Unix socket of the resident daemon
+DAEMON_SOCKET: Final[Path] = CACHE_DIR / "daemon.sock"
+
 def ensure_app_dirs() -> None:
     """Create all necessary application directories if they don't exist."""
     for directory in [APP_DIR, CONFIG_DIR, CACHE_DIR, LOG_DIR, TASKS_DIR]:
@@ -36,6 +58,68 @@ def get_task_dir(task_name: str) -> Path:
     """
     return TASKS_DIR / task_name
 
+def get_bundle_path(task_name: str) -> Path:
+    """Get the path of a task's packed bundle.
+    
+    Args:
+        task_name: Name of the task
+        
+    Returns:
+        Path to the task bundle
+    """
+    return TASKS_DIR / f"{task_name}{BUNDLE_SUFFIX}"
+
+def check_task_name(task_name: str) -> str:
+    """Check that a task name from an external source names an entry of ``TASKS_DIR``.
+    
+    Args:
+        task_name: Name of the task
+        
+    Returns:
+        The task name
+        
+    Raises:
+        ValueError: If the name is empty, contains a path separator, starts
+            with a dot or ends with the bundle suffix
+    """
+    if (not isinstance(task_name, str) or not task_name or "/" in task_name or "\\" in task_name
+            or task_name.startswith(".") or task_name.endswith(BUNDLE_SUFFIX)):
+        raise ValueError(f"Invalid task name: {task_name!r}")
+    return task_name
+
+def safe_path(rel: str) -> str:
+    """Check that a relative path from an external source stays inside its task directory.
+    
+    Args:
+        rel: Slash-separated path relative to the task directory
+        
+    Returns:
+        The normalized path
+        
+    Raises:
+        ValueError: If the path is empty, absolute or climbs out with ``..``
+    """
+    path = PurePosixPath(rel)
+    if not rel or path.is_absolute() or ".." in path.parts or "\\" in rel:
+        raise ValueError(f"Invalid path in task archive: {rel!r}")
+    return path.as_posix()
+
+def safe_mode(mode: int) -> int:
+    """Check the permission bits recorded for a file from an external source.
+    
+    Args:
+        mode: Mode recorded for the file
+        
+    Returns:
+        The permission bits, without setuid, setgid or sticky bits
+        
+    Raises:
+        ValueError: If the mode is not an integer between 0 and 0o7777
+    """
+    if not isinstance(mode, int) or isinstance(mode, bool) or not 0 <= mode <= 0o7777:
+        raise ValueError(f"Invalid file mode in task archive: {mode!r}")
+    return mode & 0o777
+
 def init_task_dir(task_name: str) -> Path:
     """Initialize a new task directory structure.
     
@@ -0,0 +1,318 @@
+"""
+Lightweight timing spans for the hot paths of agent-task.
+
+Code marks its expensive steps with ``span`` (or the ``timed`` decorator),
+naming the phase the time belongs to: ``scan``, ``parse``, ``copy``,
+``http``, ``serialize``, ``render``, ... Spans do nothing until a profiler
+is started, which the global ``--profile`` and ``--profile-trace`` options
+do. A disabled span costs one global lookup.
+
+A started profiler records every span with its thread and nesting, and
+times module imports as the ``import`` phase, since commands import their
+dependencies lazily. It can
+report how much time each phase took itself (excluding nested spans) and
+write the spans as a Chrome trace (``chrome://tracing`` or Perfetto).
+
+Code can also bump named counters with ``count`` (bytes transferred, cache
+hits, ...); like spans they are only kept while a profiler runs. Commands
+record both in their metrics (see ``metrics``).
+"""
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import json
+import os
+import sys
+import threading
+import time
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Profiler recording spans, or None when profiling is off
+_profiler: Optional["Profiler"] = None
+
+
+class _NullSpan:
+    """Span used while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span being recorded."""
+
+    __slots__ = ("profiler", "phase", "name", "args", "start", "child_time", "stack", "thread")
+
+    def __init__(self, profiler: "Profiler", phase: str, name: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.phase = phase
+        self.name = name
+        self.args = args
+        self.child_time = 0
+
+    def __enter__(self) -> "_Span":
+        self.stack = self.profiler._stack()
+        self.stack.append(self)
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter_ns()
+        # Spans in abandoned generators may be closed later, from another thread
+        stack = self.stack
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            stack.remove(self)
+        duration = end - self.start
+        if stack:
+            stack[-1].child_time += duration
+        # Time of a span nested in one of the same phase is already counted
+        nested = any(outer.phase == self.phase for outer in stack)
+        self.profiler._record(self, duration, nested)
+
+    def set(self, **args: Any) -> None:
+        """Attach details known only at the end of the span (e.g. a status code)."""
+        self.args.update(args)
+
+
+class Profiler:
+    """Collector of timing spans."""
+
+    def __init__(self, keep_events: bool = True):
+        """Initialize the profiler.
+
+        Args:
+            keep_events: Keep every span for ``write_chrome_trace``; without
+                them only the per-phase totals and counters are kept
+        """
+        self.keep_events = keep_events
+        self.events: List[Dict[str, Any]] = []
+        self.phases: Dict[str, List[int]] = {}
+        self.counters: Dict[str, int] = {}
+        self.threads: set = set()
+        self.started = time.perf_counter_ns()
+        self.stopped: Optional[int] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[_Span]:
+        """Get the open spans of the calling thread."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span: _Span, duration: int, nested: bool) -> None:
+        with self._lock:
+            totals = self.phases.setdefault(span.phase, [0, 0, 0])
+            totals[0] += 1
+            if not nested:
+                totals[1] += duration
+            totals[2] += duration - span.child_time
+            self.threads.add(span.thread)
+            if not self.keep_events:
+                return
+            self.events.append({
+                "name": span.name,
+                "cat": span.phase,
+                "ph": "X",
+                "ts": (span.start - self.started) / 1000,
+                "dur": duration / 1000,
+                "pid": os.getpid(),
+                "tid": span.thread,
+                "args": span.args,
+            })
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add to a named counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @property
+    def wall_time(self) -> float:
+        """Seconds since the profiler started (until it stopped)."""
+        end = self.stopped if self.stopped is not None else time.perf_counter_ns()
+        return (end - self.started) / 1e9
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Summarize the recorded time per phase.
+
+        Returns:
+            One entry per phase with the number of spans, their total time
+            (including nested spans of other phases) and their self time
+            (excluding them), in seconds, sorted by self time
+        """
+        with self._lock:
+            rows = [{"phase": phase, "count": count, "total": total / 1e9, "self": own / 1e9}
+                    for phase, (count, total, own) in self.phases.items()]
+        return sorted(rows, key=lambda row: -row["self"])
+
+    def format_breakdown(self) -> str:
+        """Format the per-phase breakdown as a text table."""
+        wall = self.wall_time
+        lines = [f"{'phase':<12} {'calls':>7} {'self ms':>10} {'total ms':>10} {'self %':>7}"]
+        accounted = 0.0
+        for row in self.breakdown():
+            accounted += row["self"]
+            share = row["self"] / wall * 100 if wall else 0.0
+            lines.append(f"{row['phase']:<12} {row['count']:>7} {row['self'] * 1000:>10.2f} "
+                         f"{row['total'] * 1000:>10.2f} {share:>6.1f}%")
+        lines.append(f"{'(untracked)':<12} {'':>7} {max(wall - accounted, 0.0) * 1000:>10.2f}")
+        lines.append(f"{'wall time':<12} {'':>7} {wall * 1000:>10.2f}")
+        if len(self.threads) > 1:
+            lines.append("Spans on background threads overlap, so phases may add up to more "
+                         "than the wall time")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write the spans as a Chrome trace event file."""
+        with self._lock:
+            events = list(self.events)
+        trace = {"traceEvents": events, "displayTimeUnit": "ms",
+                 "otherData": {"wall_time_ms": self.wall_time * 1000}}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, default=str)
+
+
+class _TimedLoader:
+    """Loader proxy recording the execution of a module as an ``import`` span."""
+
+    def __init__(self, loader: Any):
+        self._loader = loader
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        with span("import", module.__name__):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class _ImportTimer:
+    """Meta path finder wrapping the loaders found by the other finders."""
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+_IMPORT_TIMER = _ImportTimer()
+
+
+def start(imports: bool = True, events: bool = True) -> Profiler:
+    """Start recording spans; the running profiler is reused.
+
+    Args:
+        imports: Time module imports as the ``import`` phase
+        events: Keep every span, as needed for Chrome traces
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(keep_events=events)
+    elif events:
+        _profiler.keep_events = True
+    if imports and _IMPORT_TIMER not in sys.meta_path:
+        sys.meta_path.insert(0, _IMPORT_TIMER)
+    return _profiler
+
+
+def stop() -> Optional[Profiler]:
+    """Stop recording spans.
+
+    Returns:
+        The profiler that was recording, if any
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stopped = time.perf_counter_ns()
+    if _IMPORT_TIMER in sys.meta_path:
+        sys.meta_path.remove(_IMPORT_TIMER)
+    return profiler
+
+
+def span(phase: str, name: Optional[str] = None, **args: Any):
+    """Time a block of code.
+
+    Example::
+
+        with span("parse", "taskhub.yaml"):
+            config = yaml.safe_load(text)
+
+    Args:
+        phase: Phase the time is attributed to
+        name: Name of the step (default: the phase)
+        **args: Details shown in the trace
+
+    Returns:
+        Context manager; a shared no-op while profiling is off
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return _Span(profiler, phase, name or phase, args)
+
+
+def recording() -> bool:
+    """Check whether a profiler is running, to skip preparing costly details."""
+    return _profiler is not None
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a named counter of the running profiler, if any.
+
+    Args:
+        name: Counter name, e.g. ``http.bytes_down``
+        amount: Amount added
+    """
+    profiler = _profiler
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def timed(phase: str, name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorate a function so each call is recorded as a span.
+
+    Args:
+        phase: Phase the time is attributed to
+        name: Name of the step (default: the function's qualified name)
+    """
+    def decorate(fn: F) -> F:
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with _Span(profiler, phase, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
@@ -0,0 +1,208 @@
+"""
+Parallel scanner for task directories.
+
+Scanning is split into two stages: reading a task directory (stat calls,
+directory listings and file reads, which block on I/O) and parsing what
+was read (README and taskhub.yaml). The read stage fans out over a thread
+pool; for large cold scans the parse stage runs in a process pool so YAML
+parsing is not serialized by the GIL. Results are always streamed back in
+the order of the input directories.
+"""
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+import multiprocessing
+import os
+
+from .profiling import timed
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Worker threads for the read stage (AGENT_TASK_SCAN_WORKERS overrides)
+DEFAULT_SCAN_WORKERS = int(os.environ.get("AGENT_TASK_SCAN_WORKERS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+
+# Worker processes for the parse stage (AGENT_TASK_SCAN_PROCESSES overrides, 0 disables)
+DEFAULT_SCAN_PROCESSES = int(os.environ.get("AGENT_TASK_SCAN_PROCESSES", str(os.cpu_count() or 1)))
+
+# Below these sizes, pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 8
+PROCESS_THRESHOLD = 1000
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], executor: Executor, window: int) -> Iterator[R]:
+    """Map a function over items on an executor, yielding results in input order.
+
+    At most ``window`` calls are in flight at once, so results stream back
+    as soon as the head of the queue completes and memory stays bounded.
+
+    Args:
+        fn: Function to apply to each item
+        items: Items to process
+        executor: Executor running the calls
+        window: Maximum number of outstanding calls
+
+    Yields:
+        Results of ``fn`` in the order of ``items``
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _read_text(path: Path) -> Optional[str]:
+    """Read a text file, falling back to the system encoding."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with open(path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@timed("scan", "read task dir")
+def read_task_dir(task_dir: Path) -> Dict:
+    """Read the raw contents of a task directory needed to describe it.
+
+    Args:
+        task_dir: Path to the task directory
+
+    Returns:
+        Picklable record with the README and taskhub.yaml text and the
+        rules/mcp listings
+    """
+    raw = {
+        "name": task_dir.name,
+        "path": str(task_dir),
+        "readme": _read_text(task_dir / "README.md"),
+        "taskhub": None,
+        "rules": None,
+        "mcp": None,
+    }
+
+    rules_dir = task_dir / "rules"
+    if rules_dir.is_dir():
+        raw["rules"] = [rule_file.name for rule_file in rules_dir.glob("*.mdc")]
+
+    mcp_dir = task_dir / "mcp"
+    if mcp_dir.is_dir():
+        raw["mcp"] = [mcp_file.name for mcp_file in mcp_dir.glob("*.py")]
+
+    try:
+        raw["taskhub"] = _read_text(task_dir / "taskhub.yaml")
+    except OSError:
+        raw["taskhub"] = ""
+
+    return raw
+
+
+@timed("parse", "parse task info")
+def parse_task_info(raw: Dict) -> Dict:
+    """Turn a raw task directory record into a task information dictionary.
+
+    Args:
+        raw: Record returned by ``read_task_dir``
+
+    Returns:
+        Task information dictionary as returned by ``list_tasks``
+    """
+    task_info = {
+        "name": raw["name"],
+        "description": "",
+        "files": [],
+        "has_readme": False,
+        "has_rules": False,
+        "has_mcp": False,
+        "path": raw["path"]
+    }
+
+    # Get first non-empty line after title
+    if raw["readme"] is not None:
+        task_info["has_readme"] = True
+        for line in raw["readme"].splitlines()[1:]:
+            if line.strip() and not line.startswith("#"):
+                task_info["description"] = line.strip()
+                break
+
+    if raw["rules"] is not None:
+        task_info["has_rules"] = True
+        task_info["files"].extend(f"rules/{name}" for name in raw["rules"])
+
+    if raw["mcp"] is not None:
+        task_info["has_mcp"] = True
+        task_info["files"].extend(f"mcp/{name}" for name in raw["mcp"])
+
+    if raw["taskhub"] is not None:
+        task_info["files"].append("taskhub.yaml")
+        try:
+            import yaml
+            yaml_content = yaml.safe_load(raw["taskhub"])
+            if yaml_content:
+                task_info.update({
+                    "version": yaml_content.get("version", "0.1.0"),
+                    "author": yaml_content.get("author", ""),
+                    "license": yaml_content.get("license", "MIT"),
+                    "tags": yaml_content.get("tags", [])
+                })
+        except Exception:
+            pass
+
+    return task_info
+
+
+def scan_task_dir(task_dir: Path) -> Dict:
+    """Read and parse a single task directory.
+
+    Args:
+        task_dir: Path to the task directory
+
+    Returns:
+        Task information dictionary
+    """
+    return parse_task_info(read_task_dir(task_dir))
+
+
+def scan_task_dirs(task_dirs: List[Path], workers: Optional[int] = None,
+                   processes: Optional[int] = None) -> Iterator[Dict]:
+    """Scan many task directories in parallel.
+
+    Args:
+        task_dirs: Task directories to scan
+        workers: Reader threads (default: ``DEFAULT_SCAN_WORKERS``)
+        processes: Parser processes; 0 parses in the reader threads
+            (default: ``DEFAULT_SCAN_PROCESSES`` for large scans, else 0)
+
+    Yields:
+        Task information dictionaries in the order of ``task_dirs``
+    """
+    workers = workers or DEFAULT_SCAN_WORKERS
+    if processes is None:
+        processes = DEFAULT_SCAN_PROCESSES if len(task_dirs) >= PROCESS_THRESHOLD else 0
+
+    if workers <= 1 or len(task_dirs) < PARALLEL_THRESHOLD:
+        for task_dir in task_dirs:
+            yield scan_task_dir(task_dir)
+        return
+
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task-scan") as readers:
+        if processes <= 0:
+            yield from ordered_map(scan_task_dir, task_dirs, readers, window)
+            return
+
+        # Spawned workers are safe to start while reader threads are running
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as parsers:
+            raws = ordered_map(read_task_dir, task_dirs, readers, window)
+            yield from ordered_map(parse_task_info, raws, parsers, processes * 8)
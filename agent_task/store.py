@@ -0,0 +1,489 @@
+"""
+Content-addressable blob store for archived tasks.
+
+Every file of an archived or cloned task is stored once under
+``OBJECTS_DIR`` by the SHA-256 of its contents, and each task has a
+manifest under ``MANIFESTS_DIR`` mapping its relative paths to blob hashes.
+The loose files in ``TASKS_DIR`` are hard links to these read-only blobs, so
+identical rules and MCP scripts shared by many tasks take up disk space
+once, and updating a task only writes blobs and links that changed.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+from .atomic import StagedDir, atomic_write, remove_stale_staging, sync_file
+from .paths import MANIFESTS_DIR, OBJECTS_DIR, TASKS_DIR
+from .profiling import count, timed
+
+# Version of the manifest format
+MANIFEST_VERSION = 1
+
+# Read size used when hashing and copying files
+CHUNK_SIZE = 1024 * 1024
+
+# Permission bits of stored blobs; blobs are never modified in place
+BLOB_MODE = 0o444
+
+_EXEC_BITS = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+
+
+def hash_file(path: Path) -> str:
+    """Compute the content hash of a file.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """Compute the content hash of a byte string."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def empty_manifest() -> Dict:
+    """Create a manifest describing an empty task."""
+    return {"version": MANIFEST_VERSION, "files": {}, "dirs": []}
+
+
+def _join(prefix: str, rel: str) -> str:
+    """Join manifest path components with forward slashes."""
+    if rel in ("", "."):
+        return prefix
+    if not prefix:
+        return rel
+    return f"{prefix}/{rel}"
+
+
+def parent_dirs(rel: str) -> List[str]:
+    """List the parent directories of a manifest path, outermost first."""
+    parts = rel.split("/")[:-1]
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def _make_writable(func, path, exc_info) -> None:
+    """``shutil.rmtree`` error handler that clears read-only bits and retries."""
+    os.chmod(path, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
+    func(path)
+
+
+def rmtree(path: Path) -> None:
+    """Remove a directory tree that may contain read-only blob links."""
+    shutil.rmtree(path, onerror=_make_writable)
+
+
+class HashCache:
+    """Remembers file hashes by stat data, like rsync's quick check.
+
+    A file whose size, mtime and inode match the cached entry is assumed
+    unchanged and is not read again.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the cache.
+
+        Args:
+            path: JSON file the cache is persisted in
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._seen: Dict[str, list] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, list] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def hash(self, path: Path, key: str, st: Optional[os.stat_result] = None) -> str:
+        """Get the content hash of a file, reading it only if its stat changed.
+
+        Args:
+            path: File to hash
+            key: Cache key of the file
+            st: Stat result of the file, if already known
+
+        Returns:
+            Hex digest of the file contents
+        """
+        if st is None:
+            st = os.stat(path)
+        signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+        entry = self._entries.get(key)
+        if entry is not None and entry[:3] == signature:
+            self.hits += 1
+            count("hash_cache.hits")
+            digest = entry[3]
+        else:
+            self.misses += 1
+            count("hash_cache.misses")
+            digest = hash_file(path)
+        self._seen[key] = signature + [digest]
+        return digest
+
+    def save(self) -> None:
+        """Persist the entries seen since the cache was loaded."""
+        if self._seen == self._entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path, json.dumps(self._seen))
+
+
+class BlobStore:
+    """Stores file contents by hash and tracks per-task manifests."""
+
+    def __init__(self, objects_dir: Path = OBJECTS_DIR, manifests_dir: Path = MANIFESTS_DIR,
+                 tasks_dir: Path = TASKS_DIR):
+        """Initialize the blob store.
+
+        Args:
+            objects_dir: Directory holding the blobs
+            manifests_dir: Directory holding the per-task manifests
+            tasks_dir: Directory holding the checked-out tasks
+        """
+        self.objects_dir = Path(objects_dir)
+        self.manifests_dir = Path(manifests_dir)
+        self.tasks_dir = Path(tasks_dir)
+
+    # Blobs
+
+    def blob_path(self, digest: str) -> Path:
+        """Get the path of the blob with the given hash."""
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def has(self, digest: str) -> bool:
+        """Check whether a blob is stored."""
+        return self.blob_path(digest).exists()
+
+    def _commit_blob(self, tmp_path: str, digest: str) -> None:
+        """Move a fully written temporary file into place as a blob."""
+        os.chmod(tmp_path, BLOB_MODE)
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob)
+
+    def _temp_file(self) -> Tuple[int, str]:
+        """Create a temporary file on the same filesystem as the blobs."""
+        tmp_dir = self.objects_dir / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.mkstemp(dir=tmp_dir)
+
+    def put_file(self, path: Path, digest: Optional[str] = None) -> Tuple[str, bool]:
+        """Store a file's contents.
+
+        Args:
+            path: File to store
+            digest: Known hash of the file (computed if not given)
+
+        Returns:
+            Tuple of the blob hash and whether a new blob was written
+        """
+        if digest is None:
+            digest = hash_file(path)
+        if self.has(digest):
+            return digest, False
+        fd, tmp_path = self._temp_file()
+        try:
+            with os.fdopen(fd, "wb") as fdst, open(path, "rb") as fsrc:
+                shutil.copyfileobj(fsrc, fdst, CHUNK_SIZE)
+                fdst.flush()
+                sync_file(fdst.fileno())
+            self._commit_blob(tmp_path, digest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, True
+
+    def put_bytes(self, data: bytes, digest: Optional[str] = None) -> Tuple[str, bool]:
+        """Store a byte string.
+
+        Args:
+            data: Contents to store
+            digest: Known hash of the contents (skips hashing)
+
+        Returns:
+            Tuple of the blob hash and whether a new blob was written
+        """
+        digest = digest or hash_bytes(data)
+        if self.has(digest):
+            return digest, False
+        fd, tmp_path = self._temp_file()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                sync_file(f.fileno())
+            self._commit_blob(tmp_path, digest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, True
+
+    def checkout(self, digest: str, dest: Path, mode: Optional[int] = None) -> None:
+        """Place a blob at a path, replacing any existing file atomically.
+
+        The blob is hard linked when possible. Executable files, and
+        filesystems that cannot link to the store, get a private copy.
+
+        Args:
+            digest: Hash of the blob
+            dest: Destination path
+            mode: Permission bits recorded for the file
+        """
+        blob = self.blob_path(digest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if os.stat(dest).st_ino == os.stat(blob).st_ino:
+                return
+        except OSError:
+            pass
+
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        if tmp.exists():
+            tmp.unlink()
+        try:
+            if mode is not None and mode & _EXEC_BITS:
+                raise OSError("executable files are not shared")
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)
+            os.chmod(tmp, mode if mode is not None else 0o644)
+        os.replace(tmp, dest)
+
+    # Manifests
+
+    def manifest_path(self, task_name: str) -> Path:
+        """Get the manifest path of a task."""
+        return self.manifests_dir / f"{task_name}.json"
+
+    def read_manifest(self, task_name: str) -> Optional[Dict]:
+        """Read the manifest of a task, or None if it has none."""
+        try:
+            with open(self.manifest_path(task_name), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest
+
+    def write_manifest(self, task_name: str, manifest: Dict) -> None:
+        """Atomically write the manifest of a task."""
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.manifest_path(task_name), json.dumps(manifest, sort_keys=True))
+
+    def delete_manifest(self, task_name: str) -> None:
+        """Remove the manifest of a task."""
+        try:
+            self.manifest_path(task_name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def task_names(self) -> List[str]:
+        """List the tasks that have a manifest."""
+        if not self.manifests_dir.exists():
+            return []
+        return sorted(p.stem for p in self.manifests_dir.glob("*.json"))
+
+    # Trees
+
+    @timed("hash", "add tree")
+    def add_tree(self, root: Path, prefix: str = "",
+                 hash_cache: Optional["HashCache"] = None) -> Tuple[Dict[str, Dict], List[str]]:
+        """Store every file under a directory.
+
+        Args:
+            root: Directory to store
+            prefix: Manifest path the directory is stored under
+            hash_cache: Cache used to skip hashing unchanged files
+
+        Returns:
+            Tuple of the manifest file entries and directory paths
+        """
+        files = {}
+        dirs = [prefix] if prefix else []
+        for dirpath, dirnames, filenames in os.walk(root):
+            rel_dir = _join(prefix, Path(dirpath).relative_to(root).as_posix())
+            dirnames.sort()
+            for name in dirnames:
+                dirs.append(_join(rel_dir, name))
+            for name in sorted(filenames):
+                rel = _join(rel_dir, name)
+                files[rel] = self.add_file(Path(dirpath) / name, hash_cache, rel)
+        return files, dirs
+
+    def add_file(self, path: Path, hash_cache: Optional["HashCache"] = None,
+                 key: Optional[str] = None) -> Dict:
+        """Store a file and describe it as a manifest entry.
+
+        Args:
+            path: File to store
+            hash_cache: Cache used to skip hashing an unchanged file
+            key: Key of the file in ``hash_cache`` (default: its path)
+
+        Returns:
+            Manifest entry of the file
+        """
+        st = os.stat(path)
+        digest = None
+        if hash_cache is not None:
+            digest = hash_cache.hash(path, key or str(path), st)
+        digest, _ = self.put_file(path, digest)
+        return {"hash": digest, "size": st.st_size, "mode": stat.S_IMODE(st.st_mode)}
+
+    @timed("hash", "add blob")
+    def add_bytes(self, data: bytes) -> Dict:
+        """Store a byte string and describe it as a manifest entry."""
+        digest, _ = self.put_bytes(data)
+        return {"hash": digest, "size": len(data), "mode": 0o644}
+
+    @timed("hash", "ingest task")
+    def ingest_task(self, task_name: str) -> Dict:
+        """Move a task's loose files into the store.
+
+        Used for tasks archived before the store existed: their files are
+        stored as blobs and replaced with links to them.
+
+        Args:
+            task_name: Name of the task
+
+        Returns:
+            The task's new manifest
+        """
+        task_dir = self.tasks_dir / task_name
+        manifest = empty_manifest()
+        if task_dir.exists():
+            manifest["files"], manifest["dirs"] = self.add_tree(task_dir)
+            self.checkout_manifest(task_dir, empty_manifest(), manifest)
+        self.write_manifest(task_name, manifest)
+        return manifest
+
+    def task_manifest(self, task_name: str) -> Dict:
+        """Get the manifest of a task, ingesting its loose files if needed."""
+        manifest = self.read_manifest(task_name)
+        if manifest is None:
+            manifest = self.ingest_task(task_name)
+        return manifest
+
+    @timed("copy", "checkout manifest")
+    def checkout_manifest(self, task_dir: Path, old: Dict, new: Dict) -> Dict[str, int]:
+        """Update a checked-out task from one manifest to another.
+
+        The new tree is built in a staging directory next to ``task_dir``
+        and swapped in with an atomic rename, so readers see either the old
+        or the new task and an interrupted update leaves the old one intact.
+        Files whose hash is unchanged are linked from the current checkout;
+        only changed files are placed from the store.
+
+        Args:
+            task_dir: Checked-out task directory
+            old: Manifest the directory currently matches
+            new: Manifest to check out
+
+        Returns:
+            Transfer report with the number of files and bytes transferred,
+            files removed and files left unchanged
+        """
+        report = {"files_transferred": 0, "bytes_transferred": 0,
+                  "files_removed": 0, "files_unchanged": 0}
+        task_dir = Path(task_dir)
+        old_files = old["files"]
+        for rel in old_files:
+            if rel not in new["files"] and os.path.lexists(task_dir / rel):
+                report["files_removed"] += 1
+
+        with StagedDir(task_dir) as stage:
+            for rel in new["dirs"]:
+                (stage / rel).mkdir(parents=True, exist_ok=True)
+
+            for rel, entry in new["files"].items():
+                dest = stage / rel
+                if old_files.get(rel, {}).get("hash") == entry["hash"]:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    try:
+                        os.link(task_dir / rel, dest)
+                        report["files_unchanged"] += 1
+                        continue
+                    except OSError:
+                        pass
+                self.checkout(entry["hash"], dest, entry.get("mode"))
+                report["files_transferred"] += 1
+                report["bytes_transferred"] += entry.get("size", 0)
+
+        count("files.copied", report["files_transferred"])
+        count("files.unchanged", report["files_unchanged"])
+        return report
+
+    # Garbage collection
+
+    def referenced(self, task_names: Optional[Iterable[str]] = None) -> set:
+        """Collect the hashes referenced by task manifests."""
+        hashes = set()
+        for task_name in task_names if task_names is not None else self.task_names():
+            manifest = self.read_manifest(task_name)
+            if manifest:
+                hashes.update(entry["hash"] for entry in manifest["files"].values())
+        return hashes
+
+    def gc(self, dry_run: bool = False) -> Dict[str, int]:
+        """Remove blobs that no task references.
+
+        Manifests of tasks whose directory was deleted from ``TASKS_DIR``
+        are dropped first.
+
+        Args:
+            dry_run: Only report what would be removed
+
+        Returns:
+            Dictionary with the number of removed blobs, freed bytes and
+            dropped manifests
+        """
+        result = {"blobs_removed": 0, "bytes_freed": 0, "manifests_removed": 0}
+        if not dry_run:
+            remove_stale_staging(self.tasks_dir)
+
+        live_tasks = []
+        for task_name in self.task_names():
+            if (self.tasks_dir / task_name).exists():
+                live_tasks.append(task_name)
+            else:
+                result["manifests_removed"] += 1
+                if not dry_run:
+                    self.delete_manifest(task_name)
+
+        referenced = self.referenced(live_tasks)
+        if not self.objects_dir.exists():
+            return result
+
+        for fan_out in self.objects_dir.iterdir():
+            if not fan_out.is_dir() or len(fan_out.name) != 2:
+                continue
+            for blob in fan_out.iterdir():
+                if fan_out.name + blob.name in referenced:
+                    continue
+                result["blobs_removed"] += 1
+                result["bytes_freed"] += blob.stat().st_size
+                if not dry_run:
+                    blob.unlink()
+            if not dry_run:
+                try:
+                    fan_out.rmdir()
+                except OSError:
+                    pass
+
+        return result
@@ -0,0 +1,176 @@
+"""
+Streaming, compressed tar archives.
+
+``iter_tar`` produces a tar archive as a generator of compressed chunks,
+reading each file in fixed-size pieces. Memory use is bounded by the chunk
+size no matter how large the archived files are, which makes the output
+suitable as a chunked HTTP request body.
+"""
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
+import io
+import os
+import stat
+import tarfile
+import zlib
+
+# Read size for archived files
+CHUNK_SIZE = 256 * 1024
+
+COMPRESSIONS = ("gzip", "zstd", "none")
+
+# Content-Encoding header value of each compression
+CONTENT_ENCODINGS = {"gzip": "gzip", "zstd": "zstd", "none": "identity"}
+
+
+class _Identity:
+    """Compressor and decompressor interface for uncompressed data."""
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _compressor(compression: str, level: Optional[int] = None):
+    """Create a streaming compressor with ``compress``/``flush`` methods."""
+    if compression == "gzip":
+        # wbits=31 writes a gzip header and trailer
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package "
+                             "(pip install agent-task[zstd])")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+    if compression == "none":
+        return _Identity()
+    raise ValueError(f"Unknown compression '{compression}'. "
+                     f"Expected one of: {', '.join(COMPRESSIONS)}")
+
+
+def decompressor(compression: str):
+    """Create a streaming decompressor with a ``decompress`` method."""
+    if compression == "gzip":
+        return zlib.decompressobj(31)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package "
+                             "(pip install agent-task[zstd])")
+        return zstandard.ZstdDecompressor().decompressobj()
+    if compression == "none":
+        return _Identity()
+    raise ValueError(f"Unknown compression '{compression}'. "
+                     f"Expected one of: {', '.join(COMPRESSIONS)}")
+
+
+def open_tar_stream(fileobj: BinaryIO) -> tarfile.TarFile:
+    """Open a tar archive for sequential reading, detecting its compression.
+
+    Args:
+        fileobj: Binary stream positioned at the start of the archive
+
+    Returns:
+        Tar file in stream mode: members must be read in order
+    """
+    if not hasattr(fileobj, "peek"):
+        fileobj = io.BufferedReader(fileobj)
+    head = fileobj.peek(4)[:4]
+    if head.startswith(b"\x1f\x8b"):
+        return tarfile.open(fileobj=fileobj, mode="r|gz")
+    if head == b"\x28\xb5\x2f\xfd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package "
+                             "(pip install agent-task[zstd])")
+        fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return tarfile.open(fileobj=fileobj, mode="r|")
+
+
+def task_entries(task_dir: Path) -> Iterator[Tuple[str, Path]]:
+    """List every file of a task as (archive name, path) pairs, sorted by name."""
+    for root, dirs, files in os.walk(task_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = Path(root) / name
+            yield path.relative_to(task_dir).as_posix(), path
+
+
+def _open_source(source: Union[Path, bytes]) -> Tuple[BinaryIO, tarfile.TarInfo]:
+    """Open an archive entry's contents and describe them for its header."""
+    info = tarfile.TarInfo()
+    if isinstance(source, bytes):
+        info.size = len(source)
+        info.mode = 0o644
+        return io.BytesIO(source), info
+    f = open(source, "rb")
+    st = os.fstat(f.fileno())
+    info.size = st.st_size
+    info.mtime = int(st.st_mtime)
+    info.mode = stat.S_IMODE(st.st_mode)
+    return f, info
+
+
+def iter_tar(entries: Iterable[Tuple[str, Union[Path, bytes]]], compression: str = "gzip",
+             level: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a compressed tar archive of the given files.
+
+    Args:
+        entries: (archive name, path) pairs of the files to archive; in
+            place of a path, an entry's contents can be given as bytes
+        compression: One of ``COMPRESSIONS``
+        level: Compression level (default: the compressor's default)
+        chunk_size: Read size for file contents
+
+    Yields:
+        Chunks of the compressed archive
+    """
+    compressor = _compressor(compression, level)
+    written = 0
+
+    for arcname, source in entries:
+        f, info = _open_source(source)
+        with f:
+            info.name = arcname
+            header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            written += len(header)
+            out = compressor.compress(header)
+            if out:
+                yield out
+
+            # Copy exactly the size recorded in the header
+            remaining = info.size
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    # File shrank while archiving; pad to the recorded size
+                    chunk = b"\0" * min(chunk_size, remaining)
+                remaining -= len(chunk)
+                written += len(chunk)
+                out = compressor.compress(chunk)
+                if out:
+                    yield out
+
+        # Pad file data to a whole block
+        padding = -info.size % tarfile.BLOCKSIZE
+        if padding:
+            written += padding
+            out = compressor.compress(b"\0" * padding)
+            if out:
+                yield out
+
+    # End-of-archive marker, padded to a whole record
+    trailer = b"\0" * (2 * tarfile.BLOCKSIZE)
+    written += len(trailer)
+    trailer += b"\0" * (-written % tarfile.RECORDSIZE)
+    out = compressor.compress(trailer) + compressor.flush()
+    if out:
+        yield out
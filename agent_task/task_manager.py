@@ -1,23 +1,62 @@
 """
 Task management functionality for the AI Agent Platform.
+
+Network, YAML and subprocess dependencies are imported inside the methods
+that use them, so commands that only touch local files start quickly.
 """
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import shutil
-import yaml
 import json
-import re
 import os
-import requests
-import subprocess
 
 from .paths import (
+    check_task_name,
     ensure_app_dirs,
+    get_bundle_path,
     get_task_dir,
     init_task_dir,
+    safe_path,
+    HASH_CACHE_DIR,
     TASKS_DIR,
 )
-from .api import TaskHubAPI
+from .atomic import StagedDir, atomic_write
+from .bundle import Bundle, write_bundle
+from .catalog import TaskCatalog
+from .locks import catalog_lock, instant_mcp_lock, task_lock, workspace_lock
+from .materialize import Materializer, materialize_tree
+from .mcp_host import HOST_SERVER_NAME, host_config, register_servers
+from .mcp_manifest import build_task_manifest, task_servers
+from .profiling import timed
+from .store import BlobStore, HashCache, empty_manifest, parent_dirs, rmtree
+
+# Tasks larger than this are published as a streamed archive by default
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+def _tree_size(directory: Path) -> int:
+    """Get the total size in bytes of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def _has_binary_files(directory: Path) -> bool:
+    """Check whether any file under a directory is not UTF-8 text."""
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                # Only called for tasks below STREAM_THRESHOLD
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    f.read()
+            except UnicodeDecodeError:
+                return True
+            except OSError:
+                pass
+    return False
 
 class TaskManager:
     """Manages task creation, loading, and publishing."""
@@ -77,93 +116,123 @@ print("Hello from {task_name}")
         return project_dir
     
     @staticmethod
-    def list_tasks() -> List[Dict[str, str]]:
+    def list_tasks(workers: Optional[int] = None) -> List[Dict[str, str]]:
         """List all available tasks.
         
+        Args:
+            workers: Number of scanner threads for changed tasks (default: automatic)
+            
         Returns:
             List of task information dictionaries
         """
+        return list(TaskManager.iter_tasks(workers=workers))
+    
+    @staticmethod
+    def iter_tasks(workers: Optional[int] = None, offset: int = 0,
+                   limit: Optional[int] = None) -> Iterator[Dict]:
+        """Yield available tasks one at a time, in name order.
+        
+        Tasks outside the requested page are skipped before their
+        directories are read, so large archives can be paged cheaply.
+        
+        Args:
+            workers: Number of scanner threads for changed tasks (default: automatic)
+            offset: Number of tasks to skip
+            limit: Maximum number of tasks to yield (default: no limit)
+            
+        Yields:
+            Task information dictionaries
+        """
         ensure_app_dirs()
-        tasks = []
-        
-        for task_dir in TASKS_DIR.iterdir():
-            if task_dir.is_dir():
-                task_info = {
-                    "name": task_dir.name,
-                    "description": "",
-                    "files": [],
-                    "has_readme": False,
-                    "has_rules": False,
-                    "has_mcp": False,
-                    "path": str(task_dir)
-                }
-                
-                # Check README.md
-                readme_path = task_dir / "README.md"
-                if readme_path.exists():
-                    task_info["has_readme"] = True
-                    try:
-                        with open(readme_path, 'r', encoding='utf-8') as f:
-                            # Get first non-empty line after title
-                            lines = f.readlines()
-                            for line in lines[1:]:
-                                if line.strip() and not line.startswith("#"):
-                                    task_info["description"] = line.strip()
-                                    break
-                    except UnicodeDecodeError:
-                        # Fallback to system default encoding if UTF-8 fails
-                        with open(readme_path, 'r') as f:
-                            lines = f.readlines()
-                            for line in lines[1:]:
-                                if line.strip() and not line.startswith("#"):
-                                    task_info["description"] = line.strip()
-                                    break
-                
-                # Check rules directory
-                rules_dir = task_dir / "rules"
-                if rules_dir.exists() and rules_dir.is_dir():
-                    task_info["has_rules"] = True
-                    for rule_file in rules_dir.glob("*.mdc"):
-                        task_info["files"].append(f"rules/{rule_file.name}")
-                
-                # Check MCP directory
-                mcp_dir = task_dir / "mcp"
-                if mcp_dir.exists() and mcp_dir.is_dir():
-                    task_info["has_mcp"] = True
-                    for mcp_file in mcp_dir.glob("*.py"):
-                        task_info["files"].append(f"mcp/{mcp_file.name}")
-                
-                # Check taskhub.yaml
-                taskhub_path = task_dir / "taskhub.yaml"
-                if taskhub_path.exists():
-                    task_info["files"].append("taskhub.yaml")
+        catalog = TaskCatalog()
+        try:
+            names = None
+            if offset or limit is not None:
+                names = catalog.task_names()
+                end = None if limit is None else offset + limit
+                names = names[offset:end]
+            yield from catalog.iter_tasks(names, workers=workers)
+        finally:
+            catalog.close()
+    
+    @staticmethod
+    def get_task_info(task_name: str) -> Optional[Dict]:
+        """Look up a single task in the catalog.
+        
+        Args:
+            task_name: Name of the task
+            
+        Returns:
+            Task information dictionary, or None if the task does not exist
+        """
+        catalog = TaskCatalog()
+        try:
+            return catalog.get(task_name)
+        finally:
+            catalog.close()
+    
+    @staticmethod
+    @timed("serialize", "export MCP config")
+    def _export_mcp_config(cursor_dir: Path, servers: List[Dict], scripts_root: Path) -> Path:
+        """Serve MCP servers from a project's shared MCP host.
+        
+        The servers are registered with the project's ``agent-task mcp-host``
+        and ``.cursor/mcp.json`` gets a single entry starting the host, so
+        all task servers run in one process. Both files are updated under a
+        per-workspace lock and replaced atomically, so concurrent loads and
+        imports into one project keep every server.
+        
+        Args:
+            cursor_dir: ``.cursor`` directory of the project
+            servers: Server manifests (see ``mcp_manifest.task_servers``)
+            scripts_root: Task directory holding the servers' scripts
+            
+        Returns:
+            Path of the MCP config
+        """
+        mcp_config_path = cursor_dir / "mcp.json"
+        with workspace_lock(cursor_dir):
+            register_servers(cursor_dir, servers, scripts_root)
+            
+            # Create or load existing MCP config
+            mcp_config = {
+                "mcpServers": {}
+            }
+            if mcp_config_path.exists():
+                with open(mcp_config_path, 'r', encoding='utf-8') as f:
                     try:
-                        with open(taskhub_path, 'r', encoding='utf-8') as f:
-                            yaml_content = yaml.safe_load(f)
-                            if yaml_content:
-                                task_info.update({
-                                    "version": yaml_content.get("version", "0.1.0"),
-                                    "author": yaml_content.get("author", ""),
-                                    "license": yaml_content.get("license", "MIT"),
-                                    "tags": yaml_content.get("tags", [])
-                                })
-                    except Exception:
+                        mcp_config = json.load(f)
+                    except json.JSONDecodeError:
                         pass
-                
-                tasks.append(task_info)
-        
-        return tasks
+            
+            # Replace per-server instant-mcp entries with the shared host
+            entries = mcp_config.setdefault("mcpServers", {})
+            for server in servers:
+                if entries.get(server["name"], {}).get("command") == "instant-mcp":
+                    del entries[server["name"]]
+            entries[HOST_SERVER_NAME] = host_config(cursor_dir.parent)
+            
+            # Save updated MCP config
+            atomic_write(mcp_config_path, json.dumps(mcp_config, indent=2))
+        return mcp_config_path
     
     @staticmethod
-    def load_task(task_name: str, target_dir: Optional[Path] = None) -> None:
+    @timed("task", "load_task")
+    def load_task(task_name: str, target_dir: Optional[Path] = None,
+                  strategy: str = "auto") -> List[Path]:
         """Load a task into the current project.
         
         Args:
             task_name: Name of the task to load
             target_dir: Directory to load the task into (default: current directory)
+            strategy: How files are materialized (see ``materialize.STRATEGIES``)
+            
+        Returns:
+            Paths of the loaded files, relative to the loaded task directory
         """
         task_dir = get_task_dir(task_name)
-        if not task_dir.exists():
+        bundle_path = get_bundle_path(task_name)
+        if not task_dir.exists() and not bundle_path.exists():
             raise ValueError(f"Task '{task_name}' not found")
         
         if target_dir is None:
@@ -173,84 +242,228 @@ print("Hello from {task_name}")
         target_task_dir = target_dir / task_name
         if target_task_dir.exists():
             raise ValueError(f"Directory '{task_name}' already exists in current location")
+        
+        if not task_dir.exists():
+            return TaskManager._load_bundle(task_name, bundle_path, target_dir)
             
-        # Copy entire task directory
-        shutil.copytree(task_dir, target_task_dir)
+        with catalog_lock(), task_lock(task_name, shared=True):
+            # Materialize entire task directory aside, then move it into place
+            materializer = Materializer(strategy)
+            try:
+                with StagedDir(target_task_dir, overwrite=False) as stage:
+                    loaded_files = materializer.tree(task_dir, stage)
+            except FileExistsError:
+                raise ValueError(f"Directory '{task_name}' already exists in current location")
+        
+            # Also set up .cursor directory for AI assistance
+            cursor_dir = target_dir / ".cursor"
+            cursor_dir.mkdir(exist_ok=True)
+        
+            # Materialize rules to .cursor if they exist
+            rules_src = task_dir / "rules"
+            if rules_src.exists():
+                with StagedDir(cursor_dir / "rules") as stage:
+                    materializer.tree(rules_src, stage)
+        
+            # Handle MCP servers, using the manifest precomputed at archive/clone time
+            servers = task_servers(task_name, BlobStore())
+            if servers:
+                TaskManager._export_mcp_config(cursor_dir, servers, target_task_dir)
+        
+        return loaded_files
+    
+    @staticmethod
+    def _load_bundle(task_name: str, bundle_path: Path, target_dir: Path) -> List[Path]:
+        """Load a packed task into a project, reading only the files it needs.
         
-        # Also set up .cursor directory for AI assistance
-        cursor_dir = target_dir / ".cursor"
-        cursor_dir.mkdir(exist_ok=True)
+        Args:
+            task_name: Name of the task
+            bundle_path: Bundle of the task
+            target_dir: Directory to load the task into
+            
+        Returns:
+            Paths of the loaded files, relative to the loaded task directory
+        """
+        target_task_dir = target_dir / task_name
+        with catalog_lock(), task_lock(task_name, shared=True), Bundle(bundle_path) as bundle:
+            try:
+                with StagedDir(target_task_dir, overwrite=False) as stage:
+                    loaded_files = bundle.extract(stage)
+            except FileExistsError:
+                raise ValueError(f"Directory '{task_name}' already exists in current location")
+            
+            # Also set up .cursor directory for AI assistance
+            cursor_dir = target_dir / ".cursor"
+            cursor_dir.mkdir(exist_ok=True)
+            
+            # Extract rules to .cursor if the task has any
+            if any(rel.startswith("rules/") for rel in bundle.files()):
+                with StagedDir(cursor_dir / "rules") as stage:
+                    bundle.extract(stage, prefix="rules/")
+            
+            # MCP servers were extracted when the task was packed
+            if bundle.servers:
+                TaskManager._export_mcp_config(cursor_dir, bundle.servers, target_task_dir)
         
-        # Copy rules to .cursor if they exist
-        rules_src = task_dir / "rules"
-        if rules_src.exists():
-            rules_dst = cursor_dir / "rules"
-            if rules_dst.exists():
-                shutil.rmtree(rules_dst)
-            shutil.copytree(rules_src, rules_dst)
+        return loaded_files
+    
+    @staticmethod
+    def _check_unpacked(task_name: str) -> None:
+        """Refuse operations that need the loose files of a packed task."""
+        if not get_task_dir(task_name).exists() and get_bundle_path(task_name).exists():
+            raise ValueError(f"Task '{task_name}' is packed; run 'agent-task unpack {task_name}' first")
+    
+    @staticmethod
+    @timed("task", "pack_task")
+    def pack_task(task_name: str, output: Optional[Path] = None,
+                  compression: str = "zlib") -> Path:
+        """Pack an archived task into a single-file bundle.
         
-        # Handle MCP servers
-        mcp_src = task_dir / "mcp"
-        if mcp_src.exists():
-            # Create or load existing MCP config
-            mcp_config_path = cursor_dir / "mcp.json"
-            mcp_config = {
-                "mcpServers": {}
-            }
-            if mcp_config_path.exists():
-                with open(mcp_config_path, 'r', encoding='utf-8') as f:
-                    try:
-                        mcp_config = json.load(f)
-                    except json.JSONDecodeError:
-                        pass
+        Without ``output`` the task is converted in place: the bundle is
+        written to the tasks directory and the loose files and store
+        manifest are removed (``gc`` then frees blobs no other task uses).
+        With ``output`` a copy is written there and the task is kept.
+        
+        Args:
+            task_name: Name of the task to pack
+            output: Bundle file to write instead (e.g. to move the task elsewhere)
+            compression: Compression of the bundle entries (see ``bundle.COMPRESSIONS``)
             
-            # Process each MCP server file
-            for server_file in mcp_src.glob("*.py"):
-                server_name = server_file.stem
-                
-                # Read the server file to extract API schema
-                with open(server_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # Extract server attributes
-                name_match = re.search(r'name\s*=\s*["\']([^"\']+)["\']', content)
-                instructions_match = re.search(r'instructions\s*=\s*["\']([^"\']+)["\']', content)
-                tools_match = re.search(r'tools\s*=\s*\[(.*?)\]', content, re.DOTALL)
-                
-                if name_match:
-                    server_name = name_match.group(1)
+        Returns:
+            Path of the written bundle
+        """
+        task_dir = get_task_dir(task_name)
+        if not task_dir.exists():
+            if get_bundle_path(task_name).exists():
+                raise ValueError(f"Task '{task_name}' is already packed")
+            raise ValueError(f"Task '{task_name}' not found")
+        
+        bundle_path = Path(output) if output is not None else get_bundle_path(task_name)
+        with catalog_lock(), task_lock(task_name, shared=output is not None):
+            write_bundle(task_dir, bundle_path, compression, name=task_name)
+            if output is None:
+                # The bundle is in place before the loose files go, so the
+                # task never disappears from listings
+                rmtree(task_dir)
+                BlobStore().delete_manifest(task_name)
+                (HASH_CACHE_DIR / f"{task_name}.json").unlink(missing_ok=True)
+        return bundle_path
+    
+    @staticmethod
+    @timed("task", "unpack_task")
+    def unpack_task(source: str, task_name: Optional[str] = None) -> str:
+        """Unpack a bundle into the task archive.
+        
+        Files are stored in the blob store and checked against the hashes
+        recorded in the bundle, so a damaged bundle is rejected before the
+        task appears.
+        
+        Args:
+            source: Bundle file, or name of a task packed in place (its
+                bundle is removed once unpacked)
+            task_name: Name of the unpacked task (default: the packed name)
+            
+        Returns:
+            Name of the unpacked task
+        """
+        if task_name is not None:
+            check_task_name(task_name)
+        ensure_app_dirs()
+        
+        source_path = Path(source)
+        in_place = not source_path.is_file()
+        if in_place:
+            source_path = get_bundle_path(source)
+            if not source_path.exists():
+                raise ValueError(f"No bundle file or packed task named '{source}'")
+        
+        store = BlobStore()
+        with Bundle(source_path) as bundle:
+            task_name = check_task_name(task_name or (source if in_place else bundle.name))
+            task_dir = get_task_dir(task_name)
+            if task_dir.exists():
+                raise ValueError(f"Task '{task_name}' already exists")
+            
+            with catalog_lock(), task_lock(task_name):
+                manifest = empty_manifest()
+                for rel in bundle.files():
+                    entry = bundle.entry(rel)
+                    stored = store.add_bytes(bundle.read(rel))
+                    if stored["hash"] != entry["hash"]:
+                        raise ValueError(f"Corrupt file '{rel}' in bundle {source_path}")
+                    stored["mode"] = entry["mode"]
+                    manifest["files"][rel] = stored
+                    manifest["dirs"].extend(parent_dirs(rel))
+                manifest["dirs"] = sorted(set(manifest["dirs"]) | set(bundle.index["dirs"]))
                 
-                # Create server config
-                server_config = {
-                    "command": "instant-mcp",
-                    "args": [server_name],
-                    "description": instructions_match.group(1) if instructions_match else "",
-                    "tools": []
-                }
+                store.checkout_manifest(task_dir, empty_manifest(), manifest)
+                store.write_manifest(task_name, manifest)
                 
-                # Extract tools
-                if tools_match:
-                    tools_str = tools_match.group(1)
-                    tools = [t.strip(' "\'') for t in tools_str.split(',') if t.strip()]
-                    server_config["tools"] = tools
+                # Precompute the MCP manifest so loads do not parse scripts
+                build_task_manifest(task_name, manifest, store)
                 
-                # Add to config
-                mcp_config["mcpServers"][server_name] = server_config
+                if in_place:
+                    source_path.unlink()
+        return task_name
+    
+    @staticmethod
+    @timed("task", "export_mirror")
+    def export_mirror(output: Path, patterns: Optional[List[str]] = None,
+                      compression: str = "gzip") -> Dict[str, int]:
+        """Export tasks into an offline mirror archive.
+        
+        Args:
+            output: Archive file to write
+            patterns: Glob patterns selecting the tasks (default: all tasks)
+            compression: Compression of the archive (gzip, zstd or none)
             
-            # Save updated MCP config
-            with open(mcp_config_path, 'w', encoding='utf-8') as f:
-                json.dump(mcp_config, f, indent=2)
+        Returns:
+            Export report (see ``mirror.export_mirror``)
+        """
+        from .mirror import export_mirror
+        
+        ensure_app_dirs()
+        return export_mirror(Path(output), patterns, compression)
+    
+    @staticmethod
+    @timed("task", "import_mirror")
+    def import_mirror(archive: Path, patterns: Optional[List[str]] = None,
+                      overwrite: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Import tasks from an offline mirror archive.
+        
+        Args:
+            archive: Archive file written by ``export_mirror``
+            patterns: Glob patterns selecting the tasks (default: all tasks)
+            overwrite: Update tasks that already exist instead of skipping them
+            workers: Threads storing files and checking out tasks (default: automatic)
+            
+        Returns:
+            Import report (see ``mirror.import_mirror``)
+        """
+        from .mirror import import_mirror
+        
+        ensure_app_dirs()
+        return import_mirror(Path(archive), patterns, overwrite, workers)
     
     @staticmethod
-    def archive_task(task_name: str, remove_current: bool = False) -> None:
+    @timed("task", "archive_task")
+    def archive_task(task_name: str, remove_current: bool = False) -> Dict[str, int]:
         """Archive task to Cursor AI configuration.
         
+        Works like rsync: files whose size, mtime and inode are unchanged
+        since the last archive are not re-read, and only files whose
+        contents differ from the archive are written or removed.
+        
         Args:
             task_name: Name of the task to export
             remove_current: If True, removes the task files from current directory after archiving
+            
+        Returns:
+            Transfer report (files/bytes transferred, files removed, files unchanged)
         """
         # Ensure application directories exist
         ensure_app_dirs()
+        TaskManager._check_unpacked(task_name)
         
         # Get current directory contents
         current_dir = Path.cwd()
@@ -302,34 +515,76 @@ Task-specific AI configuration for Cursor AI.
         app_task_dir = get_task_dir(task_name)
         app_task_dir.mkdir(parents=True, exist_ok=True)
         
-        # Copy rules if they exist
-        if rules_dir.exists():
-            rules_dst = app_task_dir / "rules"
-            if rules_dst.exists():
-                shutil.rmtree(rules_dst)
-            shutil.copytree(rules_dir, rules_dst)
-        
-        # Copy MCP servers if they exist
-        if mcp_dir.exists():
-            mcp_dst = app_task_dir / "mcp"
-            if mcp_dst.exists():
-                shutil.rmtree(mcp_dst)
-            shutil.copytree(mcp_dir, mcp_dst)
+        with catalog_lock(), task_lock(task_name):
+            # Store the working copy in the blob store and build the new manifest
+            store = BlobStore()
+            hash_cache = HashCache(HASH_CACHE_DIR / f"{task_name}.json")
+            old_manifest = store.task_manifest(task_name)
+            new_manifest = {
+                "version": old_manifest["version"],
+                "files": dict(old_manifest["files"]),
+                "dirs": list(old_manifest["dirs"])
+            }
         
-        # Copy README.md if it exists
-        if readme.exists():
-            shutil.copy2(readme, app_task_dir / "README.md")
+            # Replace rules and MCP servers if they exist
+            for subdir, src_dir in (("rules", rules_dir), ("mcp", mcp_dir)):
+                if not src_dir.exists():
+                    continue
+                prefix = f"{subdir}/"
+                new_manifest["files"] = {
+                    rel: entry for rel, entry in new_manifest["files"].items()
+                    if not rel.startswith(prefix)
+                }
+                new_manifest["dirs"] = [
+                    rel for rel in new_manifest["dirs"]
+                    if rel != subdir and not rel.startswith(prefix)
+                ]
+                files, dirs = store.add_tree(src_dir, subdir, hash_cache)
+                new_manifest["files"].update(files)
+                new_manifest["dirs"].extend(dirs)
+        
+            # Store README.md if it exists
+            if readme.exists():
+                new_manifest["files"]["README.md"] = store.add_file(readme, hash_cache, "README.md")
+        
+            # Relink only the files whose contents changed
+            report = store.checkout_manifest(app_task_dir, old_manifest, new_manifest)
+            store.write_manifest(task_name, new_manifest)
+            hash_cache.save()
+            
+            # Precompute the MCP manifest so loads do not parse scripts
+            build_task_manifest(task_name, new_manifest, store)
         
         # Remove current task directory if requested
         if remove_current and task_folder.exists():
             shutil.rmtree(task_folder)
+        
+        return report
     
     @staticmethod
-    def publish_task(task_name: str, user_id: str = "user456") -> str:
-        """Publish task to marketplace."""
+    @timed("task", "publish_task")
+    def publish_task(task_name: str, user_id: str = "user456", delta: bool = True,
+                     stream: Optional[bool] = None, compression: str = "gzip") -> str:
+        """Publish task to marketplace.
+        
+        Args:
+            task_name: Name of the task to publish
+            user_id: User ID for publishing
+            delta: Upload only files the marketplace does not have yet
+            stream: Upload a streamed, compressed tar archive (default: only
+                for tasks larger than ``STREAM_THRESHOLD`` bytes or with
+                binary files)
+            compression: Compression of streamed uploads (gzip, zstd or none)
+            
+        Returns:
+            URL of the published task
+        """
+        from .api import TaskHubAPI
+        
         # Find task directory
         task_dir = Path.cwd() / task_name
         if not task_dir.exists():
+            TaskManager._check_unpacked(task_name)
             task_dir = get_task_dir(task_name)
             if not task_dir.exists():
                 raise ValueError(f"Task '{task_name}' not found")
@@ -342,128 +597,251 @@ Task-specific AI configuration for Cursor AI.
         if not taskhub_path.exists():
             raise ValueError(f"Required file taskhub.yaml not found in {task_dir}")
         
-        try:
-            # Publish task
-            api = TaskHubAPI()
-            result = api.publish_task(task_dir, user_id)
+        # Hold a reader lock so an archived task is not swapped out mid-upload
+        with catalog_lock(), task_lock(task_name, shared=True):
+            try:
+                # Publish task
+                api = TaskHubAPI()
+                if stream is None:
+                    # JSON publishes carry text only
+                    stream = _tree_size(task_dir) > STREAM_THRESHOLD or _has_binary_files(task_dir)
+                if stream:
+                    result = api.publish_task_stream(task_dir, user_id, compression)
+                elif delta:
+                    hash_cache = HashCache(HASH_CACHE_DIR / f"publish-{task_dir.name}.json")
+                    result = api.publish_task_delta(task_dir, user_id, hash_cache)
+                    hash_cache.save()
+                else:
+                    result = api.publish_task(task_dir, user_id)
             
-            # Get URL from response
-            if not result.get('url'):
-                raise ValueError("Invalid response from server: missing URL")
-            return result['url']
+                # Get URL from response
+                if not result.get('url'):
+                    raise ValueError("Invalid response from server: missing URL")
+                return result['url']
             
-        except Exception as e:
-            raise ValueError(f"Error publishing task: {str(e)}")
+            except Exception as e:
+                raise ValueError(f"Error publishing task: {str(e)}")
     
     @staticmethod
-    def clone_task(url: str) -> str:
+    @timed("task", "clone_task")
+    def clone_task(url: str, offline: bool = False) -> str:
         """Clone a task from marketplace.
         
         Args:
             url: URL or path of the task to clone (e.g., user/task-name)
+            offline: Answer from the local response cache only
             
         Returns:
             Name of the cloned task
         """
-        # Parse user ID and task name from URL
+        from .api import TaskHubAPI
+        from .http_cache import ResponseCache
+        
+        user_id, task_name = TaskManager._parse_task_url(url)
+        
+        # Initialize API client; unchanged tasks are served from the response cache
+        with TaskHubAPI(cache=ResponseCache(), offline=offline) as api:
+            # Stream the task, writing files while the download continues
+            TaskManager._write_cloned_task(user_id, task_name, api.stream_task(user_id, task_name))
+        return task_name
+    
+    @staticmethod
+    @timed("task", "clone_tasks")
+    def clone_tasks(urls: List[str], concurrency: int = 8,
+                    on_cloned: Optional[Callable[[str, Optional[str], Optional[Exception]], None]] = None,
+                    offline: bool = False) -> List[Dict]:
+        """Clone many tasks from the marketplace concurrently.
+        
+        Up to ``concurrency`` downloads run at once, and each task's files
+        are written to disk as they arrive.
+        
+        Args:
+            urls: URLs or paths of the tasks to clone (e.g., user/task-name)
+            concurrency: Maximum number of simultaneous downloads
+            on_cloned: Called with (url, task name, error) as each task finishes
+            offline: Answer from the local response cache only
+            
+        Returns:
+            One result per URL, in order, with the task name or the error
+        """
+        import asyncio
+        from .api import DEFAULT_POOL_SIZE, AsyncTaskHubAPI, TaskHubAPI
+        from .http_cache import ResponseCache
+        
+        results = {url: {"url": url, "task_name": None, "error": None} for url in urls}
+        
+        def clone(api: TaskHubAPI, url: str) -> str:
+            user_id, task_name = TaskManager._parse_task_url(url)
+            TaskManager._write_cloned_task(user_id, task_name, api.stream_task(user_id, task_name))
+            return task_name
+        
+        async def clone_all() -> None:
+            sync_api = TaskHubAPI(pool_size=max(concurrency, DEFAULT_POOL_SIZE),
+                                  cache=ResponseCache(), offline=offline)
+            async with AsyncTaskHubAPI(concurrency=concurrency, api=sync_api) as api:
+                pending = {asyncio.ensure_future(api.run(clone, sync_api, url)): url for url in results}
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        url = pending.pop(future)
+                        task_name, error = None, None
+                        try:
+                            task_name = future.result()
+                        except Exception as e:
+                            error = e
+                        results[url].update(task_name=task_name, error=error)
+                        if on_cloned is not None:
+                            on_cloned(url, task_name, error)
+        
+        asyncio.run(clone_all())
+        return [results[url] for url in urls]
+    
+    @staticmethod
+    def _parse_task_url(url: str) -> Tuple[str, str]:
+        """Parse user ID and task name from a task URL."""
         parts = url.strip("/").split("/")
         if len(parts) != 2:
             raise ValueError("Invalid task URL. Expected format: user-id/task-name")
-            
-        user_id, task_name = parts
-        
-        # Initialize API client
-        api = TaskHubAPI()
+        return parts[0], check_task_name(parts[1])
+    
+    @staticmethod
+    def _write_cloned_task(user_id: str, task_name: str,
+                           items: Iterable[Tuple[str, str, Any]]) -> None:
+        """Write a task downloaded from the marketplace into the task archive.
         
-        # Get task with files
-        task_data = api.get_task(user_id, task_name, include_files=True)
+        Args:
+            user_id: Owner of the task
+            task_name: Name of the task
+            items: Decoded task payload (see ``TaskHubAPI.stream_task``); each
+                file is stored as soon as it is yielded
+                
+        Raises:
+            ValueError: If a file name leaves the task directory; the task
+                is then left as it was
+        """
+        import yaml
         
         # Ensure app directories exist
         ensure_app_dirs()
         
-        # Create task directory
+        # The task directory is created by the checkout, only once the
+        # download is complete
         task_dir = get_task_dir(task_name)
-        task_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Write README.md
-        readme_path = task_dir / "README.md"
-        with open(readme_path, "w", encoding="utf-8") as f:
+        store = BlobStore()
+        
+        # Blobs are written without holding the task lock; the catalog lock
+        # keeps gc from collecting them before the manifest references them
+        with catalog_lock():
+            # Store files as they arrive; blobs that already exist are not rewritten.
+            # Metadata fields are small and kept for README.md and taskhub.yaml.
+            files = {}
+            task_data = {}
+            for kind, name, value in items:
+                if kind == "file":
+                    rel = safe_path(name)
+                    files[rel] = store.add_bytes(value.encode("utf-8"))
+                else:
+                    task_data[name] = value
+            
+            # Store README.md
             # Use readme content from task_data, or create a default one if not available
             readme_content = task_data.get("readme", f"# {task_name}\n\n{task_data.get('description', '')}")
-            f.write(readme_content)
+            if "README.md" not in files:
+                files["README.md"] = store.add_bytes(readme_content.encode("utf-8"))
+                
+            # Store taskhub.yaml
+            # Handle tags that could be either a string or list
+            tags = task_data.get("tags", [])
+            if isinstance(tags, str):
+                tags = tags.split(",") if tags else []
+                
+            taskhub_config = {
+                "name": task_name,
+                "version": task_data.get("version", "0.1.0"),
+                "description": task_data.get("description", ""),
+                "author": task_data.get("userId", user_id),
+                "license": task_data.get("license", "MIT"),
+                "tags": tags
+            }
+            if "taskhub.yaml" not in files:
+                files["taskhub.yaml"] = store.add_bytes(yaml.dump(taskhub_config).encode("utf-8"))
             
-        # Write taskhub.yaml
-        taskhub_path = task_dir / "taskhub.yaml"
-        # Handle tags that could be either a string or list
-        tags = task_data.get("tags", [])
-        if isinstance(tags, str):
-            tags = tags.split(",") if tags else []
-            
-        taskhub_config = {
-            "name": task_name,
-            "version": task_data.get("version", "0.1.0"),
-            "description": task_data.get("description", ""),
-            "author": task_data.get("userId", user_id),
-            "license": task_data.get("license", "MIT"),
-            "tags": tags
-        }
-        with open(taskhub_path, "w", encoding="utf-8") as f:
-            yaml.dump(taskhub_config, f)
-            
-        # Write other files
-        if "files" in task_data:
-            for file_path, content in task_data["files"].items():
-                full_path = task_dir / file_path
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(full_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                    
-        return task_name 
+            with task_lock(task_name):
+                old_manifest = store.task_manifest(task_name) if task_dir.exists() else empty_manifest()
+                new_manifest = {
+                    "version": old_manifest["version"],
+                    "files": dict(old_manifest["files"]),
+                    "dirs": list(old_manifest["dirs"])
+                }
+                new_manifest["files"].update(files)
+                for file_path in files:
+                    new_manifest["dirs"].extend(parent_dirs(file_path))
+                new_manifest["dirs"] = sorted(set(new_manifest["dirs"]))
+                
+                # Relink only the files whose contents changed
+                store.checkout_manifest(task_dir, old_manifest, new_manifest)
+                store.write_manifest(task_name, new_manifest)
+                
+                # Precompute the MCP manifest so loads do not parse scripts
+                build_task_manifest(task_name, new_manifest, store)
     
     @staticmethod
-    def import_task(task_name: str, target_dir: Optional[Path] = None) -> None:
+    @timed("task", "import_task")
+    def import_task(task_name: str, target_dir: Optional[Path] = None,
+                    strategy: str = "auto", instant_mcp: bool = False) -> None:
         """Load a task into the current project.
         
+        MCP servers are registered with the project's shared MCP host
+        in-process, from the task's precomputed MCP manifest, so imports are
+        cheap and can run concurrently.
+        
         Args:
             task_name: Name of the task to load
             target_dir: Directory to load the task into (default: current directory)
+            strategy: How rule files are materialized (see ``materialize.STRATEGIES``)
+            instant_mcp: Export MCP servers with the ``instant-mcp`` CLI instead
+                (runs two subprocesses and changes instant-mcp's global target path)
         """
 
         task_dir = get_task_dir(task_name)
+        TaskManager._check_unpacked(task_name)
         if not task_dir.exists():
             raise ValueError(f"Task '{task_name}' not found")
         
         if target_dir is None:
             target_dir = Path.cwd()
         
-        # Create .cursor directory if it doesn't exist
-        cursor_dir = target_dir / ".cursor"
-        cursor_dir.mkdir(exist_ok=True)
-        
-        # Copy rules
-        rules_src = task_dir / "rules"
-        rules_dst = cursor_dir / "rules"
-        if rules_src.exists():
-            if rules_dst.exists():
-                shutil.rmtree(rules_dst)
-            shutil.copytree(rules_src, rules_dst)
-        
-        # Handle MCP servers
-        mcp_src = task_dir / "mcp"
-
-        print(f"MCP src: {mcp_src}")
-        print(f"MCP dst: {target_dir}")
-
-        if mcp_src.exists():
-            # Use instant-mcp to configure and export MCP servers
-            try:
+        with catalog_lock(), task_lock(task_name, shared=True):
+            # Create .cursor directory if it doesn't exist
+            cursor_dir = target_dir / ".cursor"
+            cursor_dir.mkdir(exist_ok=True)
+            
+            # Materialize rules
+            rules_src = task_dir / "rules"
+            rules_dst = cursor_dir / "rules"
+            if rules_src.exists():
+                with StagedDir(rules_dst) as stage:
+                    materialize_tree(rules_src, stage, strategy)
+            
+            # Handle MCP servers
+            mcp_src = task_dir / "mcp"
+            if not mcp_src.exists():
+                return
+            
+            if not instant_mcp:
+                servers = task_servers(task_name, BlobStore())
+                if servers:
+                    TaskManager._export_mcp_config(cursor_dir, servers, task_dir)
+                return
+            
+            import subprocess
+            
+            # Use instant-mcp to configure and export MCP servers; its target
+            # path is global, so exports through it are serialized. A failing
+            # step raises CalledProcessError, which the command reports.
+            with instant_mcp_lock():
                 # Set the MCP servers directory
                 subprocess.run(["instant-mcp", "config:set-target-path", str(mcp_src)], check=True)
                 
                 # Export the configuration to the target directory
                 subprocess.run(["instant-mcp", "export:cursor", "--output", str(target_dir)], check=True)
-                
-            except subprocess.CalledProcessError as e:
-                print(f"Error configuring MCP servers: {e}")
-                raise
-    
\ No newline at end of file
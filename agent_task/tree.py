@@ -0,0 +1,96 @@
+"""
+Tree views of loaded task files.
+
+The tree is built from the file list the loader returns, so rendering
+does not walk the disk again. Every directory node keeps a dict index of
+its children, which keeps building linear in the number of files. Deep or
+large directories can be collapsed to file counts.
+"""
+from pathlib import PurePath
+from typing import Dict, Iterable, Optional, Union
+
+from rich.markup import escape
+from rich.tree import Tree
+
+# Directories holding more files than this are collapsed by --summary
+SUMMARY_LIMIT = 20
+
+
+class _Node:
+    """Directory of the file index."""
+
+    __slots__ = ("dirs", "files", "count")
+
+    def __init__(self):
+        self.dirs: Dict[str, "_Node"] = {}
+        self.files = []
+        self.count = 0
+
+
+def index_files(files: Iterable[Union[str, PurePath]]) -> _Node:
+    """Index relative file paths by directory.
+
+    Args:
+        files: Paths relative to the tree's root
+
+    Returns:
+        Root node; each node counts the files below it
+    """
+    root = _Node()
+    for path in files:
+        parts = PurePath(path).parts
+        if not parts:
+            continue
+        node = root
+        node.count += 1
+        for part in parts[:-1]:
+            child = node.dirs.get(part)
+            if child is None:
+                child = node.dirs[part] = _Node()
+            node = child
+            node.count += 1
+        node.files.append(parts[-1])
+    return root
+
+
+def _dir_label(name: str, node: _Node, collapsed: bool) -> str:
+    """Get the label of a directory, with its file count if collapsed."""
+    label = f"[bold yellow]{escape(name)}/[/]"
+    if collapsed:
+        noun = "file" if node.count == 1 else "files"
+        label += f" [dim]({node.count} {noun})[/]"
+    return label
+
+
+def build_tree(label: str, files: Iterable[Union[str, PurePath]],
+               max_depth: Optional[int] = None, summary: bool = False,
+               summary_limit: int = SUMMARY_LIMIT) -> Tree:
+    """Build a rich tree of files.
+
+    Args:
+        label: Label of the root (rich markup)
+        files: Paths relative to the root
+        max_depth: Deepest level of entries shown; directories at that level
+            are collapsed to their file counts (default: no limit)
+        summary: Collapse directories holding more than ``summary_limit``
+            files to their file counts
+        summary_limit: File count above which ``summary`` collapses a directory
+
+    Returns:
+        Tree with directories before files, each sorted by name
+    """
+    tree = Tree(label)
+    # Iterative depth-first walk: (rich parent, index node, depth of its entries)
+    pending = [(tree, index_files(files), 1)]
+    while pending:
+        parent, node, depth = pending.pop()
+        for name in sorted(node.dirs):
+            child = node.dirs[name]
+            collapsed = ((max_depth is not None and depth >= max_depth)
+                         or (summary and child.count > summary_limit))
+            branch = parent.add(_dir_label(name, child, collapsed))
+            if not collapsed:
+                pending.append((branch, child, depth + 1))
+        for name in sorted(node.files):
+            parent.add(f"[bold green]{escape(name)}[/]")
+    return tree
@@ -0,0 +1,3 @@
+"""
+Benchmarks of agent-task (see ``benchmarks.run``).
+"""
@@ -0,0 +1,99 @@
+"""
+Synthetic task libraries for benchmarks.
+
+Tasks are generated deterministically from a seed, so runs on different
+commits measure identical inputs. File contents are ASCII text, because
+the full publish path uploads files as text.
+"""
+from pathlib import Path
+from typing import Dict, List, Tuple
+import random
+
+# Task shapes: (number of rule files, MCP scripts, vendored files, bytes per file)
+PROFILES: Dict[str, Tuple[int, int, int, int]] = {
+    "small": (2, 1, 0, 512),
+    "medium": (10, 3, 40, 8 * 1024),
+    "large": (20, 5, 1000, 4 * 1024),
+    "huge": (5, 2, 8, 8 * 1024 * 1024),
+}
+
+# Library sizes (number of tasks) measured by default and with --full
+LIBRARY_SIZES = [10, 100, 1000]
+FULL_LIBRARY_SIZES = [10, 100, 1000, 10000]
+
+_WORDS = ("task", "agent", "rule", "cursor", "server", "tool", "prompt", "context",
+          "file", "model", "project", "review", "build", "test", "deploy", "data")
+
+
+def _text(rng: random.Random, size: int) -> str:
+    """Generate ``size`` bytes of word-like ASCII text."""
+    # Repeat a block of random lines; generating every byte randomly would
+    # make generation slower than the operations being measured
+    block = "".join(" ".join(rng.choice(_WORDS) for _ in range(12)) + "\n" for _ in range(32))
+    return (block * (size // len(block) + 1))[:size]
+
+
+def _mcp_script(name: str, tools: int) -> str:
+    """Generate an MCP server script in the instant-mcp style."""
+    lines = [f'name = "{name}"', f'instructions = "Synthetic server {name}"', ""]
+    for i in range(tools):
+        lines += [
+            f"def tool_{i}(query: str, limit: int = 10) -> str:",
+            f'    """Answer query number {i}."""',
+            "    return query[:limit]",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def generate_task(task_dir: Path, profile: str = "small", seed: int = 0) -> List[str]:
+    """Write one synthetic task.
+
+    Args:
+        task_dir: Directory to create
+        profile: One of ``PROFILES``
+        seed: Seed of the generated contents
+
+    Returns:
+        Paths of the written files, relative to ``task_dir``
+    """
+    rules, scripts, vendored, size = PROFILES[profile]
+    rng = random.Random(f"{task_dir.name}-{seed}")
+    name = task_dir.name
+    files = {
+        "README.md": f"# {name}\n\nSynthetic {profile} task {name}\n\n{_text(rng, 256)}",
+        "taskhub.yaml": (f"name: {name}\nversion: 0.1.0\ndescription: Synthetic {profile} task\n"
+                         f"author: bench\nlicense: MIT\ntags: [{profile}, synthetic]\n"),
+    }
+    for i in range(rules):
+        files[f"rules/rule-{i}.mdc"] = f"# Rule {i}\n\n{_text(rng, size)}"
+    for i in range(scripts):
+        files[f"mcp/server_{i}.py"] = _mcp_script(f"{name}-{i}", 4)
+    for i in range(vendored):
+        # Vendored packages fan out over a few directories
+        files[f"mcp/vendor/pkg{i % 10}/module_{i}.py"] = f"# module {i}\n{_text(rng, size)}"
+
+    for rel, text in files.items():
+        path = task_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return sorted(files)
+
+
+def generate_library(tasks_dir: Path, count: int, profile: str = "small",
+                     seed: int = 0) -> List[str]:
+    """Write a library of synthetic tasks.
+
+    Args:
+        tasks_dir: Directory the tasks are created in
+        count: Number of tasks
+        profile: One of ``PROFILES``
+        seed: Seed of the generated contents
+
+    Returns:
+        Names of the generated tasks
+    """
+    names = [f"{profile}-task-{i:05d}" for i in range(count)]
+    for name in names:
+        generate_task(Path(tasks_dir) / name, profile, seed)
+    return names
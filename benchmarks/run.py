@@ -0,0 +1,350 @@
+"""
+Offline benchmark suite for agent-task.
+
+Runs against synthetic task libraries in a throwaway data directory and a
+local TaskHub stand-in, so results depend on this machine only. Results are
+written as JSON; comparing the files of two commits reports regressions.
+
+Usage::
+
+    python -m benchmarks.run                       # default sizes
+    python -m benchmarks.run --quick               # smaller libraries, fewer runs
+    python -m benchmarks.run --full                # up to 10k tasks and huge files
+    python -m benchmarks.run --only list_tasks,clone_task --latency 0.05
+    python -m benchmarks.run --compare OLD.json NEW.json --threshold 0.1
+
+Each case records the wall-clock time of every run, in seconds.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = ("list_tasks", "load_task", "archive_task", "publish_task", "clone_task", "cli_startup")
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _isolate(root: Path) -> None:
+    """Point agent-task's directories into ``root``.
+
+    Must run before ``agent_task`` is imported, since its paths are fixed at
+    import time.
+    """
+    env = {
+        "XDG_DATA_HOME": str(root / "data"),
+        "XDG_CACHE_HOME": str(root / "cache"),
+        "XDG_CONFIG_HOME": str(root / "config"),
+        "XDG_STATE_HOME": str(root / "state"),
+        "AGENT_TASK_NO_DAEMON": "1",
+    }
+    os.environ.update(env)
+
+
+def measure(fn: Callable[[], Any], repeat: int,
+            setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """Time ``fn``; ``setup`` runs untimed before each run."""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def _record(name: str, params: Dict[str, Any], runs: List[float]) -> Dict[str, Any]:
+    """Summarize the runs of one case."""
+    record = {
+        "name": name,
+        "params": params,
+        "runs": [round(run, 6) for run in runs],
+        "min": round(min(runs), 6),
+        "median": round(statistics.median(runs), 6),
+        "mean": round(statistics.mean(runs), 6),
+        "stdev": round(statistics.stdev(runs), 6) if len(runs) > 1 else 0.0,
+    }
+    params_text = ", ".join(f"{key}={value}" for key, value in params.items())
+    print(f"{name:<14} {params_text:<70} median {record['median'] * 1000:10.2f} ms", flush=True)
+    return record
+
+
+def _key(record: Dict[str, Any]) -> str:
+    """Identify a case across result files."""
+    params = ",".join(f"{key}={value}" for key, value in sorted(record["params"].items()))
+    return f"{record['name']}[{params}]"
+
+
+class Suite:
+    """Benchmark cases sharing one isolated data directory and stand-in server."""
+
+    def __init__(self, root: Path, args: argparse.Namespace):
+        from agent_task.paths import TASKS_DIR
+        from .standin import StandinServer
+
+        self.root = root
+        self.args = args
+        self.tasks_dir = TASKS_DIR
+        self.results: List[Dict[str, Any]] = []
+        self.server = StandinServer(latency=args.latency, bandwidth=args.bandwidth).start()
+        os.environ["TASKHUB_API_URL"] = self.server.url
+        self.network = {"latency": args.latency, "bandwidth": args.bandwidth or "unlimited"}
+
+        if args.quick:
+            self.sizes, self.profiles, self.repeat = [10, 100], ["small", "medium"], 3
+        elif args.full:
+            from .generate import FULL_LIBRARY_SIZES, PROFILES
+            self.sizes, self.profiles, self.repeat = FULL_LIBRARY_SIZES, list(PROFILES), args.repeat
+        else:
+            from .generate import LIBRARY_SIZES
+            self.sizes, self.profiles, self.repeat = LIBRARY_SIZES, ["small", "medium", "large"], args.repeat
+
+    def close(self) -> None:
+        self.server.stop()
+
+    def add(self, name: str, params: Dict[str, Any], runs: List[float]) -> None:
+        self.results.append(_record(name, params, runs))
+
+    def _project(self) -> Path:
+        """Create an empty project directory."""
+        return Path(tempfile.mkdtemp(prefix="project-", dir=self.root))
+
+    def _profile_task(self, profile: str) -> str:
+        """Create (once) the archived task of a profile."""
+        from .generate import generate_task
+
+        name = f"bench-{profile}"
+        if not (self.tasks_dir / name).exists():
+            generate_task(self.tasks_dir / name, profile)
+        return name
+
+    def list_tasks(self) -> None:
+        from agent_task import catalog
+        from agent_task.paths import CATALOG_FILE
+        from agent_task.task_manager import TaskManager
+        from .generate import generate_library
+
+        def forget_memory() -> None:
+            catalog._resident.clear()
+
+        def forget_all() -> None:
+            forget_memory()
+            if CATALOG_FILE.exists():
+                CATALOG_FILE.unlink()
+
+        names = []
+        for size in self.sizes:
+            # Grow one library instead of generating each size from scratch
+            names = generate_library(self.tasks_dir, size)
+            repeat = 1 if size >= 10000 else self.repeat
+            self.add("list_tasks", {"tasks": size, "cache": "cold"},
+                     measure(TaskManager.list_tasks, repeat, forget_all))
+            self.add("list_tasks", {"tasks": size, "cache": "catalog"},
+                     measure(TaskManager.list_tasks, repeat, forget_memory))
+            self.add("list_tasks", {"tasks": size, "cache": "resident"},
+                     measure(TaskManager.list_tasks, repeat))
+        for name in names:
+            shutil.rmtree(self.tasks_dir / name)
+        forget_all()
+
+    def load_task(self) -> None:
+        from agent_task.task_manager import TaskManager
+
+        for profile in self.profiles:
+            name = self._profile_task(profile)
+            projects = []
+
+            def load() -> None:
+                TaskManager.load_task(name, target_dir=projects[-1])
+
+            # The first load ingests the task into the blob store
+            projects.append(self._project())
+            load()
+            self.add("load_task", {"profile": profile},
+                     measure(load, self.repeat, lambda: projects.append(self._project())))
+            for project in projects:
+                shutil.rmtree(project)
+
+    def archive_task(self) -> None:
+        from agent_task.task_manager import TaskManager
+
+        cwd = os.getcwd()
+        for profile in self.profiles:
+            name = self._profile_task(profile)
+            project = self._project()
+            TaskManager.load_task(name, target_dir=project)
+            os.chdir(project)
+            try:
+                archive = lambda: TaskManager.archive_task(name)
+                self.add("archive_task", {"profile": profile, "change": "none"},
+                         measure(archive, self.repeat))
+
+                edits = iter(range(self.repeat))
+                def edit() -> None:
+                    readme = project / name / "README.md"
+                    readme.write_text(readme.read_text(encoding="utf-8") + f"\nEdit {next(edits)}\n",
+                                      encoding="utf-8")
+                self.add("archive_task", {"profile": profile, "change": "one-file"},
+                         measure(archive, self.repeat, edit))
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(project)
+
+    def publish_task(self) -> None:
+        from agent_task.task_manager import TaskManager
+
+        modes = {"full": {"delta": False, "stream": False},
+                 "delta": {"delta": True, "stream": False},
+                 "stream": {"delta": False, "stream": True}}
+        for profile in self.profiles:
+            name = self._profile_task(profile)
+            for mode, options in modes.items():
+                self.add("publish_task", {"profile": profile, "mode": mode, **self.network},
+                         measure(lambda: TaskManager.publish_task(name, "bench", **options),
+                                 self.repeat))
+
+    def clone_task(self) -> None:
+        from agent_task.paths import HTTP_CACHE_DIR
+        from agent_task.task_manager import TaskManager
+
+        for profile in self.profiles:
+            # Serve the profile's files as a remote-only task
+            source = self.tasks_dir / self._profile_task(profile)
+            remote = f"remote-{profile}"
+            files = {path.relative_to(source).as_posix(): path.read_bytes()
+                     for path in source.rglob("*") if path.is_file()}
+            readme = files.pop("README.md").decode("utf-8")
+            taskhub_yaml = files.pop("taskhub.yaml").decode("utf-8")
+            self.server.store.put_task("bench", remote, readme, taskhub_yaml, files)
+
+            clone = lambda: TaskManager.clone_task(f"bench/{remote}")
+            def forget() -> None:
+                shutil.rmtree(HTTP_CACHE_DIR, ignore_errors=True)
+                shutil.rmtree(self.tasks_dir / remote, ignore_errors=True)
+
+            self.add("clone_task", {"profile": profile, "cache": "cold", **self.network},
+                     measure(clone, self.repeat, forget))
+            # Re-cloning an unchanged task revalidates with a conditional request
+            self.add("clone_task", {"profile": profile, "cache": "revalidate", **self.network},
+                     measure(clone, self.repeat))
+
+    def cli_startup(self) -> None:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        code = "import sys; from agent_task.cli import main; sys.exit(main())"
+        for argv in (["path"], ["--help"], ["tasks", "--json"]):
+            command = [sys.executable, "-c", code, *argv]
+            run = lambda: subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+            self.add("cli_startup", {"command": " ".join(argv)}, measure(run, max(self.repeat, 5)))
+        bare = [sys.executable, "-c", "pass"]
+        self.add("cli_startup", {"command": "(bare python)"},
+                 measure(lambda: subprocess.run(bare, check=True), max(self.repeat, 5)))
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    """Describe the commit and machine the results were measured on."""
+    def git(*argv: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *argv], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "options": {key: str(value) if isinstance(value, Path) else value
+                    for key, value in vars(args).items() if key != "compare"},
+    }
+
+
+def compare(old_path: Path, new_path: Path, threshold: float) -> int:
+    """Print the median change of every case measured in both result files.
+
+    Returns:
+        1 if any case is slower by more than ``threshold``, else 0
+    """
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {_key(record): record for record in json.load(f)["results"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = {_key(record): record for record in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        before = old[key]["median"]
+        after = new[key]["median"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"{key:<80} {before * 1000:10.2f} -> {after * 1000:10.2f} ms {change:+8.1%}{flag}")
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"{key:<80} only in {'old' if key in old else 'new'} results")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller libraries and fewer runs")
+    parser.add_argument("--full", action="store_true", help="Up to 10k tasks and every file profile")
+    parser.add_argument("--only", help=f"Comma-separated cases to run ({', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stand-in response delay in seconds")
+    parser.add_argument("--bandwidth", type=float, help="Stand-in bandwidth in bytes per second")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    cases = args.only.split(",") if args.only else list(CASES)
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="agent-task-bench-") as tmp:
+        root = Path(tmp)
+        _isolate(root)
+        suite = Suite(root, args)
+        try:
+            for case in cases:
+                getattr(suite, case)()
+        finally:
+            suite.close()
+
+    metadata = _metadata(args)
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{(metadata['commit'] or 'unknown')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"metadata": metadata, "results": suite.results}, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
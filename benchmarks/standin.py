@@ -0,0 +1,286 @@
+"""
+Local stand-in for the TaskHub marketplace.
+
+Implements the endpoints ``TaskHubAPI`` talks to, in memory:
+
+- ``POST /api/tasks``: full (``files``) and delta (``manifest`` + ``blobs``) publishes
+- ``POST /api/tasks/negotiate``: replies with the blob hashes it is missing
+- ``POST /api/tasks/upload``: streamed tar uploads (gzip, zstd or identity)
+- ``GET /api/tasks/{user}/{task}``: task downloads with ETag revalidation
+
+Every response can be delayed by a fixed latency and request and response
+bodies can be throttled to a bandwidth, so benchmarks see realistic network
+costs without leaving the machine.
+
+Example::
+
+    with StandinServer(latency=0.05, bandwidth=10_000_000) as server:
+        os.environ["TASKHUB_API_URL"] = server.url
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+
+from agent_task.store import hash_bytes
+from agent_task.tarstream import decompressor
+
+# Size of the pieces throttled bodies are sent and received in
+THROTTLE_CHUNK = 16 * 1024
+
+# Content-Encoding of uploads mapped to tarstream compressions
+_COMPRESSIONS = {"gzip": "gzip", "zstd": "zstd", "identity": "none", "": "none"}
+
+
+class TaskStore:
+    """In-memory marketplace contents."""
+
+    def __init__(self):
+        self.blobs: Dict[str, bytes] = {}
+        self.tasks: Dict[Tuple[str, str], Dict] = {}
+        self.lock = threading.Lock()
+
+    def put_task(self, user_id: str, task_name: str, readme: str, taskhub_yaml: str,
+                 files: Dict[str, bytes]) -> None:
+        """Store a published task."""
+        manifest = {}
+        with self.lock:
+            for rel, data in files.items():
+                digest = hash_bytes(data)
+                self.blobs[digest] = data
+                manifest[rel] = digest
+            self.tasks[(user_id, task_name)] = {
+                "userId": user_id,
+                "taskName": task_name,
+                "readme": readme,
+                "taskhubYaml": taskhub_yaml,
+                "manifest": manifest,
+            }
+
+    def task_body(self, user_id: str, task_name: str, include_files: bool) -> Optional[bytes]:
+        """Get the JSON download of a task."""
+        with self.lock:
+            task = self.tasks.get((user_id, task_name))
+            if task is None:
+                return None
+            body = {key: value for key, value in task.items() if key != "manifest"}
+            if include_files:
+                body["files"] = {rel: self.blobs[digest].decode("utf-8", errors="replace")
+                                 for rel, digest in sorted(task["manifest"].items())}
+        return json.dumps(body).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandinServer"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _throttle(self, size: int, started: float) -> None:
+        """Sleep until ``size`` bytes fit the bandwidth since ``started``."""
+        bandwidth = self.server.bandwidth
+        if bandwidth:
+            delay = started + size / bandwidth - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _body_chunks(self) -> Iterator[bytes]:
+        """Read the request body, de-chunking it if needed."""
+        started = time.perf_counter()
+        received = 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                chunk = self.rfile.read(size)
+                self.rfile.readline()
+                received += size
+                self._throttle(received, started)
+                yield chunk
+        else:
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining > 0:
+                chunk = self.rfile.read(min(THROTTLE_CHUNK, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                received += len(chunk)
+                self._throttle(received, started)
+                yield chunk
+
+    def _reply(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a response after the configured latency, throttling the body."""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        started = time.perf_counter()
+        for offset in range(0, len(body), THROTTLE_CHUNK):
+            self.wfile.write(body[offset:offset + THROTTLE_CHUNK])
+            self._throttle(offset + THROTTLE_CHUNK, started)
+
+    def _json(self, status: int, data: Dict) -> None:
+        self._reply(status, json.dumps(data).encode("utf-8"))
+
+    def _task_url(self, user_id: str, task_name: str) -> str:
+        return f"{self.server.url}/tasks/{user_id}/{task_name}"
+
+    def do_GET(self) -> None:
+        self.server.count("GET")
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 4 or parts[:2] != ["api", "tasks"]:
+            self._json(404, {"error": "Not found"})
+            return
+        include_files = parse_qs(url.query).get("files", ["false"])[0] == "true"
+        body = self.server.store.task_body(parts[2], parts[3], include_files)
+        if body is None:
+            self._json(404, {"error": "Task not found"})
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, headers={"ETag": etag})
+            return
+        self._reply(200, body, {"ETag": etag})
+
+    def do_POST(self) -> None:
+        self.server.count("POST")
+        url = urlsplit(self.path)
+        store = self.server.store
+        if url.path == "/api/tasks/upload":
+            if not self.server.upload:
+                for _ in self._body_chunks():
+                    pass
+                self._json(404, {"error": "Not found"})
+                return
+            self._upload(parse_qs(url.query))
+            return
+        try:
+            data = json.loads(b"".join(self._body_chunks()))
+        except ValueError:
+            self._json(400, {"error": "Invalid JSON"})
+            return
+        if url.path == "/api/tasks/negotiate":
+            if not self.server.negotiate:
+                self._json(404, {"error": "Not found"})
+                return
+            with store.lock:
+                missing = sorted({digest for digest in data["manifest"].values()
+                                  if digest not in store.blobs})
+            self._json(200, {"missing": missing})
+        elif url.path == "/api/tasks":
+            if "manifest" in data:
+                with store.lock:
+                    store.blobs.update({digest: text.encode("utf-8")
+                                        for digest, text in data["blobs"].items()})
+                    unknown = [digest for digest in data["manifest"].values()
+                               if digest not in store.blobs]
+                    files = {rel: store.blobs.get(digest, b"")
+                             for rel, digest in data["manifest"].items()}
+                if unknown:
+                    self._json(400, {"error": f"Missing blobs: {', '.join(unknown[:3])}"})
+                    return
+            else:
+                files = {rel: text.encode("utf-8") for rel, text in data["files"].items()}
+            store.put_task(data["userId"], data["taskName"], data["readme"],
+                           data["taskhubYaml"], files)
+            self._json(200, {"url": self._task_url(data["userId"], data["taskName"])})
+        else:
+            self._json(404, {"error": "Not found"})
+
+    def _upload(self, query: Dict) -> None:
+        """Accept a streamed tar upload."""
+        user_id = query.get("userId", [""])[0]
+        task_name = query.get("taskName", [""])[0]
+        encoding = self.headers.get("Content-Encoding", "").lower()
+        if encoding not in _COMPRESSIONS:
+            self._json(415, {"error": f"Unsupported encoding {encoding}"})
+            return
+        decompress = decompressor(_COMPRESSIONS[encoding])
+        archive = io.BytesIO()
+        for chunk in self._body_chunks():
+            archive.write(decompress.decompress(chunk))
+        archive.seek(0)
+        files = {}
+        with tarfile.open(fileobj=archive, mode="r:") as tar:
+            for member in tar:
+                if member.isfile():
+                    files[member.name] = tar.extractfile(member).read()
+        readme = files.pop("README.md", b"").decode("utf-8", errors="replace")
+        taskhub_yaml = files.pop("taskhub.yaml", b"").decode("utf-8", errors="replace")
+        self.server.store.put_task(user_id, task_name, readme, taskhub_yaml, files)
+        self._json(200, {"url": self._task_url(user_id, task_name)})
+
+
+class StandinServer(ThreadingHTTPServer):
+    """TaskHub stand-in serving from a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None,
+                 negotiate: bool = True, upload: bool = True, store: Optional[TaskStore] = None):
+        """Initialize the server on a free local port.
+
+        Args:
+            latency: Seconds every response is delayed by
+            bandwidth: Bytes per second request and response bodies are
+                throttled to (default: unlimited)
+            negotiate: Support delta publishes
+            upload: Support streamed uploads
+            store: Marketplace contents (default: empty)
+        """
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.negotiate = negotiate
+        self.upload = upload
+        self.store = store or TaskStore()
+        self.requests: Dict[str, int] = {"GET": 0, "POST": 0}
+        self._counter_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, method: str) -> None:
+        """Count a received request."""
+        with self._counter_lock:
+            self.requests[method] += 1
+
+    def start(self) -> "StandinServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="taskhub-standin",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
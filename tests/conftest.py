@@ -0,0 +1,8 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def metrics_file(tmp_path, monkeypatch):
+    """Keep metrics of commands run by tests out of the user's log directory."""
+    path = tmp_path / "metrics.ndjson"
+    monkeypatch.setenv("AGENT_TASK_METRICS_FILE", str(path))
+    return path
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from agent_task.api import AsyncTaskHubAPI, TaskHubAPI
+
+def test_requests_run_concurrently_up_to_limit():
+    """Test that requests overlap but never exceed the concurrency limit."""
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_get_task(self, user_id, task_name, include_files=False):
+        with lock:
+            in_flight.append(task_name)
+            peak.append(len(in_flight))
+        time.sleep(0.1)
+        with lock:
+            in_flight.remove(task_name)
+        return {"name": task_name}
+
+    async def fetch_all():
+        async with AsyncTaskHubAPI(concurrency=3) as api:
+            return await asyncio.gather(*[api.get_task("user", f"task-{i}") for i in range(9)])
+
+    with patch.object(TaskHubAPI, "get_task", slow_get_task):
+        start = time.perf_counter()
+        results = asyncio.run(fetch_all())
+        elapsed = time.perf_counter() - start
+
+    assert [result["name"] for result in results] == [f"task-{i}" for i in range(9)]
+    assert max(peak) == 3
+    assert elapsed < 0.6
+
+def test_clone_reports_invalid_task_names_per_url():
+    """Test that task specs naming entries outside the archive fail on their own."""
+    from agent_task.task_manager import TaskManager
+
+    def fail_stream_task(self, user_id, task_name):
+        raise AssertionError("invalid specs must not be downloaded")
+
+    with patch.object(TaskHubAPI, "stream_task", fail_stream_task):
+        results = TaskManager.clone_tasks(["user/..", "user/.hidden", "user/x.atask"])
+
+    assert [result["task_name"] for result in results] == [None, None, None]
+    assert all("Invalid task name" in str(result["error"]) for result in results)
@@ -0,0 +1,90 @@
+import os
+import pytest
+
+from agent_task import atomic
+from agent_task.atomic import StagedDir, atomic_write, remove_stale_staging
+
+def make_tree(path, files):
+    for rel, content in files.items():
+        (path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (path / rel).write_text(content)
+
+def read_tree(path):
+    return {
+        p.relative_to(path).as_posix(): p.read_text()
+        for p in sorted(path.rglob("*")) if p.is_file()
+    }
+
+@pytest.fixture(params=["renameat2", "fallback"])
+def rename_impl(request, monkeypatch):
+    """Run each test with and without renameat2."""
+    if request.param == "fallback":
+        monkeypatch.setattr(atomic, "_renameat2", None)
+    return request.param
+
+def test_staged_dir_replaces_existing_tree(tmp_path, rename_impl):
+    """Test that a staged directory replaces the old tree as a whole."""
+    target = tmp_path / "task"
+    make_tree(target, {"old.txt": "old", "rules/rule.mdc": "v1"})
+
+    with StagedDir(target) as stage:
+        make_tree(stage, {"rules/rule.mdc": "v2"})
+        assert read_tree(target) == {"old.txt": "old", "rules/rule.mdc": "v1"}
+
+    assert read_tree(target) == {"rules/rule.mdc": "v2"}
+    assert os.listdir(tmp_path) == ["task"]
+
+def test_staged_dir_failure_keeps_old_tree(tmp_path, rename_impl):
+    """Test that an interrupted write leaves the old tree untouched."""
+    target = tmp_path / "task"
+    make_tree(target, {"rules/rule.mdc": "v1"})
+
+    with pytest.raises(RuntimeError):
+        with StagedDir(target) as stage:
+            make_tree(stage, {"rules/rule.mdc": "partial"})
+            raise RuntimeError("killed")
+
+    assert read_tree(target) == {"rules/rule.mdc": "v1"}
+    assert os.listdir(tmp_path) == ["task"]
+
+def test_staged_dir_without_overwrite(tmp_path, rename_impl):
+    """Test that overwrite=False refuses to replace an existing directory."""
+    target = tmp_path / "task"
+    target.mkdir()
+
+    with pytest.raises(FileExistsError):
+        with StagedDir(target, overwrite=False) as stage:
+            make_tree(stage, {"a.txt": "a"})
+
+    assert os.listdir(target) == []
+    assert os.listdir(tmp_path) == ["task"]
+
+@pytest.mark.parametrize("policy", atomic.FSYNC_POLICIES)
+def test_atomic_write_policies(tmp_path, monkeypatch, policy):
+    """Test that files are replaced under every fsync policy."""
+    monkeypatch.setattr(atomic, "FSYNC_POLICY", policy)
+    path = tmp_path / "mcp.json"
+    path.write_text("old")
+    os.chmod(path, 0o600)
+
+    atomic_write(path, "new")
+
+    assert path.read_text() == "new"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path) == ["mcp.json"]
+
+def test_unknown_fsync_policy(tmp_path, monkeypatch):
+    """Test that an unknown fsync policy is rejected."""
+    monkeypatch.setattr(atomic, "FSYNC_POLICY", "sometimes")
+    with pytest.raises(ValueError, match="Unknown fsync policy"):
+        atomic_write(tmp_path / "a.txt", "a")
+
+def test_remove_stale_staging(tmp_path):
+    """Test that only staging directories of dead processes are removed."""
+    dead = tmp_path / ".task.999999999-0123abcd.stage"
+    live = tmp_path / f".task.{os.getpid()}-0123abcd.stage"
+    for path in (dead, live, tmp_path / "task"):
+        path.mkdir()
+
+    assert remove_stale_staging(tmp_path) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([live.name, "task"])
@@ -0,0 +1,106 @@
+import pytest
+
+from agent_task.api import TaskHubAPI
+from agent_task.jsonstream import iter_task_items
+from benchmarks.generate import generate_library, generate_task
+from benchmarks.standin import StandinServer
+
+@pytest.fixture
+def server():
+    """Run the TaskHub stand-in."""
+    with StandinServer() as server:
+        yield server
+
+@pytest.fixture
+def task_dir(tmp_path):
+    """Create a synthetic medium task."""
+    task_dir = tmp_path / "bench-task"
+    generate_task(task_dir, "medium")
+    return task_dir
+
+def test_generated_library_is_deterministic(tmp_path):
+    """Test that libraries are reproducible across runs."""
+    names = generate_library(tmp_path / "a", 3)
+    generate_library(tmp_path / "b", 3)
+
+    assert len(names) == 3
+    for name in names:
+        for path in (tmp_path / "a" / name).rglob("*"):
+            if path.is_file():
+                twin = tmp_path / "b" / name / path.relative_to(tmp_path / "a" / name)
+                assert twin.read_bytes() == path.read_bytes()
+
+@pytest.mark.parametrize("mode", ["full", "delta", "stream"])
+def test_publish_and_download_round_trip(server, task_dir, mode):
+    """Test that every publish mode stores the task as the client sent it."""
+    with TaskHubAPI(base_url=server.url) as api:
+        if mode == "full":
+            result = api.publish_task(task_dir, "bench")
+        elif mode == "delta":
+            result = api.publish_task_delta(task_dir, "bench")
+        else:
+            result = api.publish_task_stream(task_dir, "bench", "gzip")
+        assert result["url"].endswith("/bench/bench-task")
+
+        files = {name: value for kind, name, value in api.stream_task("bench", "bench-task")
+                 if kind == "file"}
+
+    expected = {path.relative_to(task_dir).as_posix(): path.read_text(encoding="utf-8")
+                for path in task_dir.rglob("*") if path.is_file()}
+    expected.pop("README.md")
+    expected.pop("taskhub.yaml")
+    assert files == expected
+
+def test_stream_publish_falls_back_to_json(task_dir):
+    """Test that servers without the upload endpoint get a full JSON publish."""
+    with StandinServer(upload=False) as server:
+        with TaskHubAPI(base_url=server.url) as api:
+            result = api.publish_task_stream(task_dir, "bench", "gzip")
+
+    assert result["url"].endswith("/bench/bench-task")
+    assert server.requests["POST"] == 2
+    stored = server.store.tasks[("bench", "bench-task")]["manifest"]
+    assert set(stored) == {path.relative_to(task_dir).as_posix() for path in task_dir.rglob("*")
+                           if path.is_file()} - {"README.md", "taskhub.yaml"}
+
+def test_delta_publish_uploads_only_missing_blobs(server, task_dir):
+    """Test the negotiation endpoint against blobs the stand-in already has."""
+    with TaskHubAPI(base_url=server.url) as api:
+        api.publish_task_delta(task_dir, "bench")
+        (task_dir / "rules" / "rule-0.mdc").write_text("changed", encoding="utf-8")
+        manifest = {"rules/rule-0.mdc": "new-digest", "rules/rule-1.mdc": "also-new"}
+        for rel, digest in list(server.store.tasks[("bench", "bench-task")]["manifest"].items())[:3]:
+            manifest[rel] = digest
+        missing = api._send("post", f"{server.url}/api/tasks/negotiate",
+                            json={"userId": "bench", "taskName": "bench-task", "manifest": manifest})
+
+    assert sorted(missing["missing"]) == ["also-new", "new-digest"]
+
+def test_latency_and_revalidation(tmp_path, task_dir):
+    """Test injected latency and ETag revalidation."""
+    with StandinServer(latency=0.05) as server:
+        with TaskHubAPI(base_url=server.url) as api:
+            api.publish_task(task_dir, "bench")
+            response = api._request("get", f"{server.url}/api/tasks/bench/bench-task")
+            etag = response.headers["ETag"]
+            revalidated = api._request("get", f"{server.url}/api/tasks/bench/bench-task",
+                                       headers={"If-None-Match": etag})
+
+    assert revalidated.status_code == 304
+    assert server.requests == {"GET": 2, "POST": 1}
+
+def test_bandwidth_limit_slows_downloads(task_dir):
+    """Test that response bodies are throttled to the bandwidth."""
+    import time
+
+    with StandinServer(bandwidth=500_000) as server:
+        with TaskHubAPI(base_url=server.url) as api:
+            api.publish_task(task_dir, "bench")
+            start = time.perf_counter()
+            items = list(iter_task_items(
+                [api._request("get", f"{server.url}/api/tasks/bench/bench-task",
+                              params={"files": "true"}).content]))
+            elapsed = time.perf_counter() - start
+
+    size = sum(len(value) for kind, _, value in items if kind == "file")
+    assert elapsed >= size / 500_000 * 0.8
@@ -0,0 +1,198 @@
+import json
+import os
+import struct
+
+import pytest
+
+from agent_task import bundle as bundle_module
+from agent_task.bundle import Bundle, write_bundle
+from agent_task.catalog import TaskCatalog
+
+@pytest.fixture
+def task_dir(tmp_path):
+    """Create an archived task with rules, an MCP server and a nested file."""
+    task_dir = tmp_path / "tasks" / "demo"
+    (task_dir / "rules").mkdir(parents=True)
+    (task_dir / "mcp" / "vendor").mkdir(parents=True)
+    (task_dir / "empty").mkdir()
+    (task_dir / "README.md").write_text("# demo\n\nDemo task\n", encoding="utf-8")
+    (task_dir / "taskhub.yaml").write_text("version: 2.0.0\ntags: [x]\n", encoding="utf-8")
+    (task_dir / "rules" / "rule.mdc").write_text("be brief\n" * 200, encoding="utf-8")
+    (task_dir / "mcp" / "server.py").write_text(
+        'name = "demo-server"\n\ndef ping(text: str) -> str:\n    """Echo."""\n    return text\n',
+        encoding="utf-8")
+    (task_dir / "mcp" / "vendor" / "blob.bin").write_bytes(os.urandom(4096))
+    return task_dir
+
+def test_round_trip(task_dir, tmp_path):
+    """Test that every file can be read back individually."""
+    path = tmp_path / "demo.atask"
+    index = write_bundle(task_dir, path)
+
+    with Bundle(path) as bundle:
+        assert bundle.name == "demo"
+        assert sorted(bundle.files()) == ["README.md", "mcp/server.py", "mcp/vendor/blob.bin",
+                                          "rules/rule.mdc", "taskhub.yaml"]
+        for rel in bundle.files():
+            assert bundle.read(rel) == (task_dir / rel).read_bytes()
+        assert bundle.verify() == []
+        assert "empty" in bundle.index["dirs"]
+
+    methods = {entry["path"]: entry["method"] for entry in index["files"]}
+    # Repetitive text is compressed; small and random files are stored raw
+    assert methods["rules/rule.mdc"] == "zlib"
+    assert methods["taskhub.yaml"] == "none"
+    assert methods["mcp/vendor/blob.bin"] == "none"
+
+def test_index_holds_listing_and_servers(task_dir, tmp_path):
+    """Test that listing and MCP setup need only the index."""
+    path = tmp_path / "demo.atask"
+    write_bundle(task_dir, path, compression="none")
+
+    with Bundle(path) as bundle:
+        info = bundle.task_info("renamed")
+        assert info["name"] == "renamed" and info["path"] == str(path)
+        assert info["description"] == "Demo task"
+        assert info["version"] == "2.0.0"
+        assert info["has_rules"] and info["has_mcp"]
+        assert [server["name"] for server in bundle.servers] == ["demo-server"]
+        assert bundle.servers[0]["source"] == "mcp/server.py"
+        assert all(entry["method"] == "none" for entry in bundle.index["files"])
+
+def test_extract_prefix(task_dir, tmp_path):
+    """Test extracting one directory of a bundle."""
+    path = tmp_path / "demo.atask"
+    write_bundle(task_dir, path)
+
+    with Bundle(path) as bundle:
+        written = bundle.extract(tmp_path / "out", prefix="mcp/")
+    assert sorted(str(p) for p in written) == ["server.py", os.path.join("vendor", "blob.bin")]
+    assert (tmp_path / "out" / "vendor" / "blob.bin").read_bytes() == \
+        (task_dir / "mcp" / "vendor" / "blob.bin").read_bytes()
+
+def test_rejects_damaged_files(task_dir, tmp_path):
+    """Test that truncated bundles and other files are refused."""
+    path = tmp_path / "demo.atask"
+    write_bundle(task_dir, path)
+
+    truncated = tmp_path / "truncated.atask"
+    truncated.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(ValueError, match="Not a task bundle"):
+        Bundle(truncated)
+
+    other = tmp_path / "other.atask"
+    other.write_text("hello", encoding="utf-8")
+    with pytest.raises(ValueError, match="Not a task bundle"):
+        Bundle(other)
+
+def test_rejects_paths_outside_the_bundle(tmp_path):
+    """Test that entries cannot be extracted outside the destination."""
+    index = json.dumps({"version": 1, "name": "evil", "info": {}, "servers": [], "dirs": [],
+                        "files": [{"path": "../escape", "offset": 8, "stored": 0, "size": 0,
+                                   "method": "none", "mode": 0o644, "hash": ""}]}).encode()
+    path = tmp_path / "evil.atask"
+    path.write_bytes(bundle_module._HEADER.pack(bundle_module.MAGIC, 1) + index
+                     + struct.pack("<QQ8s", 8, len(index), bundle_module.TRAILER_MAGIC))
+
+    with pytest.raises(ValueError, match="Invalid path"):
+        Bundle(path)
+
+def test_rejects_invalid_modes(tmp_path):
+    """Test that recorded modes cannot set special bits or be anything but an integer."""
+    def write(mode):
+        index = json.dumps({"version": 1, "name": "evil", "info": {}, "servers": [], "dirs": [],
+                            "files": [{"path": "run.sh", "offset": 8, "stored": 2, "size": 2,
+                                       "method": "none", "mode": mode, "hash": ""}]}).encode()
+        path = tmp_path / "evil.atask"
+        path.write_bytes(bundle_module._HEADER.pack(bundle_module.MAGIC, 1) + b"ok" + index
+                         + struct.pack("<QQ8s", 10, len(index), bundle_module.TRAILER_MAGIC))
+        return path
+
+    for mode in ("755", None, -1, 0o10000, True):
+        with pytest.raises(ValueError, match="Invalid file mode"):
+            Bundle(write(mode))
+
+    with Bundle(write(0o6755)) as bundle:
+        bundle.extract(tmp_path / "out")
+    assert os.stat(tmp_path / "out" / "run.sh").st_mode & 0o7777 == 0o755
+
+@pytest.mark.parametrize("name", ["../../escape", "a/b", ".hidden", "x.atask"])
+def test_rejects_invalid_task_names(task_dir, tmp_path, name):
+    """Test that a bundle cannot name a task outside the task archive."""
+    from agent_task.task_manager import TaskManager
+
+    path = tmp_path / "evil.atask"
+    write_bundle(task_dir, path, name=name)
+
+    with pytest.raises(ValueError, match="Invalid task name"):
+        Bundle(path)
+    write_bundle(task_dir, path)
+    with pytest.raises(ValueError, match="Invalid task name"):
+        TaskManager.unpack_task(str(path), name)
+    assert not (tmp_path / "escape").exists()
+
+def test_rejects_cloned_paths_outside_the_task(tmp_path, monkeypatch):
+    """Test that files downloaded from the marketplace cannot leave the task archive."""
+    from agent_task import locks, task_manager
+    from agent_task.store import BlobStore, hash_bytes
+    from agent_task.task_manager import TaskManager
+
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    monkeypatch.setattr(task_manager, "ensure_app_dirs", lambda: None)
+    monkeypatch.setattr(task_manager, "get_task_dir", lambda name: tmp_path / "tasks" / name)
+    store = BlobStore(tmp_path / "objects", tmp_path / "manifests", tmp_path / "tasks")
+    monkeypatch.setattr(task_manager, "BlobStore", lambda: store)
+
+    items = [("file", "README.md", "# evil\n"), ("file", "../../escaped.txt", "pwned")]
+    with pytest.raises(ValueError, match="Invalid path"):
+        TaskManager._write_cloned_task("user", "evil", iter(items))
+    assert not (tmp_path / "escaped.txt").exists()
+    assert not (tmp_path / "tasks" / "evil").exists()
+    assert store.read_manifest("evil") is None
+    assert not store.has(hash_bytes(b"pwned"))
+
+def test_catalog_lists_bundles(task_dir, tmp_path):
+    """Test that packed tasks are listed from their index."""
+    tasks_dir = task_dir.parent
+    write_bundle(task_dir, tasks_dir / "packed.atask")
+    catalog = TaskCatalog(tasks_dir, tmp_path / "catalog.sqlite3")
+    try:
+        tasks = list(catalog.iter_tasks())
+        assert [task["name"] for task in tasks] == ["demo", "packed"]
+        assert tasks[1]["path"] == str(tasks_dir / "packed.atask")
+        assert tasks[1]["description"] == tasks[0]["description"]
+
+        # A directory of the same name takes precedence
+        write_bundle(task_dir, tasks_dir / "demo.atask")
+        assert [task["path"] for task in catalog.iter_tasks()][0] == str(task_dir)
+
+        # Repacking changes the signature, so the listing is refreshed
+        (task_dir / "README.md").write_text("# demo\n\nChanged\n", encoding="utf-8")
+        write_bundle(task_dir, tasks_dir / "packed.atask")
+        assert catalog.get("packed")["description"] == "Changed"
+        assert catalog.get("missing") is None
+    finally:
+        catalog.close()
+
+def test_load_bundle_into_project(task_dir, tmp_path, monkeypatch):
+    """Test loading a packed task without unpacking it."""
+    from agent_task import locks
+    from agent_task.task_manager import TaskManager
+
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    path = tmp_path / "demo.atask"
+    write_bundle(task_dir, path)
+    project = tmp_path / "project"
+    project.mkdir()
+
+    loaded = TaskManager._load_bundle("demo", path, project)
+
+    assert len(loaded) == 5
+    assert (project / "demo" / "rules" / "rule.mdc").read_bytes() == \
+        (task_dir / "rules" / "rule.mdc").read_bytes()
+    assert (project / ".cursor" / "rules" / "rule.mdc").exists()
+    registry = json.loads((project / ".cursor" / "agent-task-host.json").read_text())
+    assert registry["servers"]["demo-server"]["script"] == \
+        str((project / "demo" / "mcp" / "server.py").resolve())
+    with pytest.raises(ValueError, match="already exists"):
+        TaskManager._load_bundle("demo", path, project)
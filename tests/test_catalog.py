@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+from agent_task import catalog as catalog_module, scanner
+from agent_task.catalog import TaskCatalog
+
+@pytest.fixture
+def tasks_dir(tmp_path):
+    """Create a tasks directory with two archived tasks."""
+    tasks_dir = tmp_path / "tasks"
+    for name in ["alpha", "beta"]:
+        task_dir = tasks_dir / name
+        (task_dir / "rules").mkdir(parents=True)
+        (task_dir / "rules" / "rule.mdc").write_text("# rule", encoding="utf-8")
+        (task_dir / "README.md").write_text(f"# {name}\n\n{name} description\n", encoding="utf-8")
+        (task_dir / "taskhub.yaml").write_text("version: 1.2.3\ntags: [a]\n", encoding="utf-8")
+    return tasks_dir
+
+@pytest.fixture
+def catalog(tasks_dir, tmp_path):
+    """Create a catalog over the temporary tasks directory."""
+    catalog = TaskCatalog(tasks_dir, tmp_path / "cache" / "catalog.sqlite3")
+    yield catalog
+    catalog.close()
+
+def test_iter_tasks_reads_task_info(catalog):
+    """Test that the catalog returns parsed task information."""
+    tasks = list(catalog.iter_tasks())
+
+    assert [task["name"] for task in tasks] == ["alpha", "beta"]
+    assert tasks[0]["description"] == "alpha description"
+    assert tasks[0]["version"] == "1.2.3"
+    assert tasks[0]["has_rules"] and not tasks[0]["has_mcp"]
+    assert "rules/rule.mdc" in tasks[0]["files"]
+
+def test_only_changed_tasks_are_rescanned(catalog, tasks_dir):
+    """Test that unchanged tasks are served from the catalog."""
+    list(catalog.iter_tasks())
+
+    # Change one task so that its signature changes
+    (tasks_dir / "beta" / "README.md").write_text("# beta\n\nupdated description\n", encoding="utf-8")
+
+    with patch.object(scanner, "read_task_dir", wraps=scanner.read_task_dir) as scan:
+        tasks = list(catalog.iter_tasks())
+
+    assert [call.args[0].name for call in scan.call_args_list] == ["beta"]
+    assert tasks[1]["description"] == "updated description"
+
+def test_removed_tasks_are_dropped(catalog, tasks_dir):
+    """Test that deleted task directories disappear from the listing."""
+    list(catalog.iter_tasks())
+
+    (tasks_dir / "alpha" / "rules" / "rule.mdc").unlink()
+    (tasks_dir / "alpha" / "rules").rmdir()
+    (tasks_dir / "alpha" / "README.md").unlink()
+    (tasks_dir / "alpha" / "taskhub.yaml").unlink()
+    (tasks_dir / "alpha").rmdir()
+
+    assert [task["name"] for task in catalog.iter_tasks()] == ["beta"]
+    assert catalog.get("alpha") is None
+
+def test_repeat_listing_is_served_from_memory(catalog):
+    """Test that a second listing in one process does not read the database."""
+    list(catalog.iter_tasks())
+    catalog.close()
+
+    with patch.object(TaskCatalog, "_connect", side_effect=AssertionError("database read")):
+        tasks = list(catalog.iter_tasks())
+    assert [task["name"] for task in tasks] == ["alpha", "beta"]
+
+    # Callers get copies, so changing a result leaves the resident record intact
+    tasks[0]["files"].clear()
+    assert list(catalog.iter_tasks())[0]["files"]
+
+def test_first_task_is_yielded_before_the_full_scan(tmp_path):
+    """Test that listing streams instead of stat-ing every task up front."""
+    tasks_dir = tmp_path / "tasks"
+    for i in range(200):
+        (tasks_dir / f"task{i:03d}").mkdir(parents=True)
+    catalog = TaskCatalog(tasks_dir, tmp_path / "catalog.sqlite3")
+
+    with patch.object(catalog_module, "task_signature",
+                      wraps=catalog_module.task_signature) as stat:
+        for parallel in (1, 4):
+            tasks = catalog.iter_tasks(workers=parallel)
+            assert next(tasks)["name"] == "task000"
+            assert stat.call_count < 100
+            tasks.close()
+            stat.reset_mock()
+    catalog.close()
+
+def run_tasks(tmp_path, *args):
+    """Run ``agent-task tasks`` in a fresh interpreter with temporary app dirs."""
+    env = dict(os.environ, XDG_DATA_HOME=str(tmp_path / "data"),
+               XDG_CACHE_HOME=str(tmp_path / "cache"), AGENT_TASK_NO_DAEMON="1",
+               PYTHONPATH=str(Path(__file__).parent.parent), COLUMNS="200")
+    code = f"import sys; from agent_task.cli import main; sys.argv = ['agent-task', 'tasks', *{list(args)!r}]; main()"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=env, check=True)
+    return result.stdout
+
+@pytest.fixture
+def app_tasks(tmp_path):
+    """Create five archived tasks in a temporary app data directory."""
+    for i in range(5):
+        task_dir = tmp_path / "data" / "agent-task" / "tasks" / f"task{i}"
+        task_dir.mkdir(parents=True)
+        (task_dir / "README.md").write_text(f"# task{i}\n\nTask number {i}\n", encoding="utf-8")
+    return tmp_path
+
+def test_tasks_command_json_pages(app_tasks):
+    """Test NDJSON output with --limit and --offset."""
+    lines = run_tasks(app_tasks, "--json").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [f"task{i}" for i in range(5)]
+
+    lines = run_tasks(app_tasks, "--json", "--offset", "1", "--limit", "2").splitlines()
+    tasks = [json.loads(line) for line in lines]
+    assert [task["name"] for task in tasks] == ["task1", "task2"]
+    assert tasks[0]["description"] == "Task number 1"
+
+def test_tasks_command_stream(app_tasks):
+    """Test one line per task with --stream."""
+    lines = run_tasks(app_tasks, "--stream", "--offset", "3").splitlines()
+    assert [line.split()[0] for line in lines] == ["task3", "task4"]
+    assert "Task number 3" in lines[0] and "README" in lines[0]
+
+    assert "No tasks found." in run_tasks(app_tasks, "--stream", "--offset", "5")
@@ -0,0 +1,115 @@
+import io
+import os
+import threading
+
+import pytest
+
+from agent_task import __version__
+from agent_task.daemon import PROTOCOL_VERSION, Daemon, forward, request
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Run a daemon on a temporary socket in a background thread."""
+    daemon = Daemon(tmp_path / "daemon.sock", tmp_path / "tasks")
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.stop()
+    thread.join(timeout=5)
+
+def test_forward_without_daemon(tmp_path):
+    """Test that calls run in-process when no daemon is listening."""
+    assert forward(["path"], tmp_path / "missing.sock") is None
+
+def test_forward_relays_output_and_exit_code(daemon):
+    """Test that a forwarded call's output and exit code reach the client."""
+    out, err = io.StringIO(), io.StringIO()
+    assert forward(["path"], daemon.socket_path, out, err) == 0
+    assert out.getvalue().startswith("Task archive directory: ")
+
+    out, err = io.StringIO(), io.StringIO()
+    assert forward(["no-such-command"], daemon.socket_path, out, err) == 1
+    assert "no-such-command" in err.getvalue()
+    assert daemon.requests == 2
+
+def test_forward_runs_in_client_directory(daemon, tmp_path, monkeypatch):
+    """Test that calls see the client's working directory."""
+    from agent_task.commands import PathCommand
+    monkeypatch.setattr(PathCommand, "handle", lambda self: self.line(os.getcwd()) or 0)
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    cwd = os.getcwd()
+
+    out = io.StringIO()
+    monkeypatch.chdir(workspace)
+    assert forward(["path"], daemon.socket_path, out, io.StringIO()) == 0
+    assert out.getvalue().strip() == str(workspace)
+    assert os.getcwd() == str(workspace)
+    monkeypatch.chdir(cwd)
+
+def test_different_settings_run_in_process(daemon, monkeypatch):
+    """Test that clients configured differently from the daemon are refused."""
+    monkeypatch.setenv("TASKHUB_API_URL", "http://elsewhere.invalid")
+
+    assert forward(["path"], daemon.socket_path, io.StringIO(), io.StringIO()) is None
+    assert daemon.requests == 0
+
+def test_protocol_mismatch_is_refused(daemon):
+    """Test that clients speaking another protocol version are refused."""
+    reply = request({"version": PROTOCOL_VERSION + 1, "command": "status",
+                     "agent_task": __version__}, daemon.socket_path)
+    assert "refused" in reply
+
+def test_status_and_stop(tmp_path):
+    """Test the control requests and that stopping removes the socket."""
+    daemon = Daemon(tmp_path / "daemon.sock", tmp_path / "tasks")
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    status = request({"command": "status"}, daemon.socket_path)
+    assert status["socket"] == str(daemon.socket_path)
+
+    assert request({"command": "stop"}, daemon.socket_path) == {"stopping": True}
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not daemon.socket_path.exists()
+    assert request({"command": "status"}, daemon.socket_path) is None
+
+def test_second_daemon_is_rejected_and_stale_socket_replaced(daemon, tmp_path):
+    """Test that only one daemon listens on a socket, and stale ones are reused."""
+    with pytest.raises(ValueError, match="already running"):
+        Daemon(daemon.socket_path).bind()
+
+    stale = tmp_path / "stale.sock"
+    stale.touch()
+    other = Daemon(stale)
+    other.bind()
+    other.close()
+    assert not stale.exists()
+
+def test_busy_daemon_refuses_calls(daemon, monkeypatch):
+    """Test that a long call does not block status requests or other calls."""
+    from agent_task.commands import PathCommand
+    started, release = threading.Event(), threading.Event()
+
+    def slow_handle(self):
+        started.set()
+        release.wait(5)
+        return 0
+    monkeypatch.setattr(PathCommand, "handle", slow_handle)
+
+    slow = threading.Thread(target=forward, args=(["path"], daemon.socket_path,
+                                                  io.StringIO(), io.StringIO()))
+    slow.start()
+    try:
+        assert started.wait(5)
+        assert request({"command": "status"}, daemon.socket_path)["requests"] == 1
+        # The second call runs in the client process instead of waiting
+        assert forward(["path"], daemon.socket_path, io.StringIO(), io.StringIO()) is None
+    finally:
+        release.set()
+        slow.join(timeout=5)
+    assert forward(["path"], daemon.socket_path, io.StringIO(), io.StringIO()) == 0
+    assert daemon.requests == 2
@@ -0,0 +1,51 @@
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from agent_task.api import TaskHubAPI
+from agent_task.http_cache import ResponseCache, cache_key
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a response cache in a temporary directory."""
+    cache = ResponseCache(tmp_path / "http", max_bytes=1000)
+    yield cache
+    cache.close()
+
+def test_lru_eviction(cache):
+    """Test that the least recently used entries are evicted first."""
+    for key in ["a", "b", "c"]:
+        cache.store(key * 64, f"https://taskhub/{key}", b"x" * 400)
+        cache.touch("a" * 64)
+
+    assert cache.lookup("a" * 64) is not None
+    assert cache.lookup("b" * 64) is None
+    assert cache.lookup("c" * 64) is not None
+
+def test_get_task_revalidates_with_etag(cache):
+    """Test that unchanged tasks are served from the cache on 304."""
+    api = TaskHubAPI(cache=cache)
+    body = {"readme": "# task", "files": {"rules/rule.mdc": "# rule"}}
+    fresh = Mock(status_code=200, headers={"ETag": '"v1"'}, content=json.dumps(body).encode())
+    fresh.json.return_value = body
+    not_modified = Mock(status_code=304, headers={})
+
+    with patch.object(api.session, "request", side_effect=[fresh, not_modified]) as mock_request:
+        assert api.get_task("user", "task", include_files=True) == body
+        assert api.get_task("user", "task", include_files=True) == body
+
+    assert mock_request.call_args_list[1][1]["headers"]["If-None-Match"] == '"v1"'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_offline_mode(cache):
+    """Test that offline mode answers from the cache without requests."""
+    api = TaskHubAPI(base_url="https://taskhub", cache=cache, offline=True)
+    url = "https://taskhub/api/tasks/user/task"
+    cache.store(cache_key(url, {"files": "true"}), url, b'{"readme": "# cached"}')
+
+    with patch.object(api.session, "request") as mock_request:
+        assert api.get_task("user", "task", include_files=True) == {"readme": "# cached"}
+        with pytest.raises(ValueError, match="offline"):
+            api.get_task("user", "other", include_files=True)
+
+    mock_request.assert_not_called()
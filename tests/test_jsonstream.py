@@ -0,0 +1,71 @@
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from agent_task.api import TaskHubAPI
+from agent_task.http_cache import ResponseCache
+from agent_task.jsonstream import iter_task_items
+
+TASK = {
+    "name": "task",
+    "files": {
+        "rules/rule.mdc": "quote \" backslash \\ unicode é中 \U0001f600 \\u0041",
+        "mcp/server.py": "x" * 5000,
+        "empty.txt": ""
+    },
+    "tags": ["a", "b"],
+    "version": 12345,
+    "readme": "# task\n"
+}
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+def test_iter_task_items_any_chunking(size):
+    """Test that the payload decodes the same however it is split."""
+    data = json.dumps(TASK, ensure_ascii=False).encode("utf-8")
+    items = list(iter_task_items(chunked(data, size)))
+
+    assert [(kind, name) for kind, name, _ in items] == [
+        ("field", "name"),
+        ("file", "rules/rule.mdc"), ("file", "mcp/server.py"), ("file", "empty.txt"),
+        ("field", "tags"), ("field", "version"), ("field", "readme")
+    ]
+    assert {name: value for kind, name, value in items if kind == "file"} == TASK["files"]
+    assert {name: value for kind, name, value in items if kind == "field"}["version"] == 12345
+
+def test_iter_task_items_yields_files_before_end_of_stream():
+    """Test that files are yielded before the rest of the payload is read."""
+    read = []
+
+    def chunks():
+        for chunk in [b'{"files": {"a.txt": "A", ', b'"b.txt": "B"}, ', b'"readme": "r"}']:
+            read.append(chunk)
+            yield chunk
+
+    items = iter_task_items(chunks())
+    assert next(items) == ("file", "a.txt", "A")
+    assert len(read) == 1
+
+def test_iter_task_items_rejects_truncated_data():
+    """Test that an incomplete payload raises an error."""
+    with pytest.raises(ValueError, match="Invalid task data"):
+        list(iter_task_items([b'{"files": {"a.txt": "unterminated']))
+
+def test_stream_task_populates_cache(tmp_path):
+    """Test that a streamed download is cached and replayed offline."""
+    data = json.dumps(TASK).encode("utf-8")
+    response = Mock(status_code=200, headers={"ETag": '"v1"'})
+    response.iter_content.return_value = iter(chunked(data, 10))
+    cache = ResponseCache(tmp_path / "http")
+
+    api = TaskHubAPI(cache=cache)
+    with patch.object(api.session, "request", return_value=response) as mock_request:
+        items = list(api.stream_task("user", "task"))
+    assert mock_request.call_args[1]["stream"] is True
+    assert {name: value for kind, name, value in items if kind == "file"} == TASK["files"]
+
+    offline = TaskHubAPI(cache=cache, offline=True)
+    assert list(offline.stream_task("user", "task")) == items
+    cache.close()
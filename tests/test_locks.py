@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+from agent_task.locks import catalog_lock, task_lock
+
+def test_readers_do_not_block_each_other(tmp_path):
+    """Test that any number of shared locks can be held at once."""
+    with task_lock("task", shared=True, locks_dir=tmp_path, timeout=0.1):
+        with task_lock("task", shared=True, locks_dir=tmp_path, timeout=0.1):
+            pass
+
+def test_writer_excludes_readers(tmp_path):
+    """Test that an exclusive lock blocks shared ones until released."""
+    writer = task_lock("task", locks_dir=tmp_path)
+    writer.acquire()
+    with pytest.raises(ValueError, match="task 'task'"):
+        task_lock("task", shared=True, locks_dir=tmp_path, timeout=0.05).acquire()
+
+    acquired = threading.Event()
+
+    def read():
+        with task_lock("task", shared=True, locks_dir=tmp_path, timeout=5):
+            acquired.set()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+    writer.release()
+    reader.join()
+    assert acquired.is_set()
+
+def test_task_locks_are_independent(tmp_path):
+    """Test that writers of different tasks do not block each other."""
+    with task_lock("a", locks_dir=tmp_path, timeout=0.1):
+        with task_lock("b", locks_dir=tmp_path, timeout=0.1):
+            pass
+
+def test_catalog_lock_across_processes(tmp_path):
+    """Test that an exclusive catalog lock excludes other processes."""
+    script = (
+        "import sys; from agent_task.locks import catalog_lock\n"
+        "try:\n"
+        f"    catalog_lock(locks_dir={str(tmp_path)!r}, timeout=0.05).acquire()\n"
+        "except ValueError:\n"
+        "    sys.exit(3)\n"
+    )
+    with catalog_lock(shared=False, locks_dir=tmp_path):
+        assert subprocess.run([sys.executable, "-c", script]).returncode == 3
+    assert subprocess.run([sys.executable, "-c", script]).returncode == 0
@@ -0,0 +1,53 @@
+import os
+import pytest
+from pathlib import Path
+
+from agent_task.materialize import Materializer, materialize_tree
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """Create a small task tree to materialize."""
+    src = tmp_path / "src"
+    (src / "rules").mkdir(parents=True)
+    (src / "rules" / "rule.mdc").write_text("# rule", encoding="utf-8")
+    (src / "README.md").write_text("# task", encoding="utf-8")
+    return src
+
+@pytest.mark.parametrize("strategy", ["auto", "reflink", "copy", "hardlink", "symlink"])
+def test_materialize_tree(source_tree, tmp_path, strategy):
+    """Test that every strategy produces the same tree."""
+    dst = tmp_path / "dst"
+
+    placed = materialize_tree(source_tree, dst, strategy)
+
+    assert sorted(placed) == [Path("README.md"), Path("rules/rule.mdc")]
+    assert (dst / "rules" / "rule.mdc").read_text(encoding="utf-8") == "# rule"
+
+def test_hardlink_shares_inode(source_tree, tmp_path):
+    """Test that the hardlink strategy does not copy data."""
+    dst = tmp_path / "dst"
+
+    materialize_tree(source_tree, dst, "hardlink")
+
+    assert os.stat(dst / "README.md").st_ino == os.stat(source_tree / "README.md").st_ino
+
+def test_auto_falls_back_to_copy_once(source_tree, tmp_path, monkeypatch):
+    """Test that an unsupported reflink is only attempted once per tree."""
+    from agent_task import materialize
+
+    attempts = []
+    def no_reflink(src, dst):
+        attempts.append(dst)
+        raise OSError(95, "Operation not supported")
+    monkeypatch.setitem(materialize._PLACERS, "reflink", no_reflink)
+
+    materializer = Materializer("auto")
+    materializer.tree(source_tree, tmp_path / "dst")
+
+    assert len(attempts) == 1
+    assert materializer.counts == {"copy": 2}
+
+def test_unknown_strategy():
+    """Test that unknown strategies are rejected."""
+    with pytest.raises(ValueError):
+        Materializer("teleport")
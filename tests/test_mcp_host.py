@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import pytest
+
+from agent_task.mcp_host import McpHost, register_servers
+
+SCRIPT = '''
+name = "text_server"
+
+def shout(text: str, times: int = 1) -> str:
+    """Repeat text loudly."""
+    print("this must not reach the protocol stream")
+    return (text.upper() + " ") * times
+
+def fail():
+    raise RuntimeError("boom")
+
+['shout', 'fail']
+'''
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Create a project with one registered MCP script."""
+    script = tmp_path / "task" / "mcp" / "script.py"
+    script.parent.mkdir(parents=True)
+    script.write_text(SCRIPT)
+    cursor_dir = tmp_path / "project" / ".cursor"
+    cursor_dir.mkdir(parents=True)
+    register_servers(cursor_dir, [{"name": "text_server", "source": "mcp/script.py"}], tmp_path / "task")
+    return tmp_path / "project"
+
+def rpc(host, method, params=None, msg_id=1):
+    return host.handle({"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params or {}})
+
+def test_tools_are_namespaced_and_lazy(workspace):
+    """Test that tools are listed without importing their script."""
+    host = McpHost(workspace)
+    tools = rpc(host, "tools/list")["result"]["tools"]
+
+    assert [tool["name"] for tool in tools] == ["text_server__shout", "text_server__fail"]
+    assert tools[0]["inputSchema"]["required"] == ["text"]
+    assert host.scripts["text_server"].imports == 0
+
+    result = rpc(host, "tools/call", {"name": "text_server__shout",
+                                      "arguments": {"text": "hi", "times": 2}})["result"]
+    assert result == {"content": [{"type": "text", "text": "HI HI "}], "isError": False}
+    assert host.scripts["text_server"].imports == 1
+
+    failed = rpc(host, "tools/call", {"name": "text_server__fail"})["result"]
+    assert failed["isError"] and "boom" in failed["content"][0]["text"]
+    assert "error" in rpc(host, "tools/call", {"name": "nope__tool"})
+
+def test_script_is_reloaded_on_change(workspace, tmp_path):
+    """Test that an edited script is re-imported on the next call."""
+    host = McpHost(workspace)
+    rpc(host, "tools/call", {"name": "text_server__shout", "arguments": {"text": "a"}})
+
+    script = tmp_path / "task" / "mcp" / "script.py"
+    script.write_text(SCRIPT.replace("text.upper()", "text.lower()") + "\n")
+    os.utime(script, ns=(1, 1))
+
+    result = rpc(host, "tools/call", {"name": "text_server__shout", "arguments": {"text": "A"}})
+    assert result["result"]["content"][0]["text"] == "a "
+    assert host.scripts["text_server"].imports == 2
+
+def test_serve_over_stdio(workspace):
+    """Test the newline-delimited JSON-RPC transport."""
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2024-11-05"}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+         "params": {"name": "text_server__shout", "arguments": {"text": "x"}}},
+    ]
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests) + "not json\n")
+    stdout = io.StringIO()
+    McpHost(workspace).serve(stdin, stdout)
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [r.get("id") for r in responses] == [1, 2, None]
+    assert responses[0]["result"]["capabilities"]["tools"]["listChanged"]
+    assert responses[1]["result"]["content"][0]["text"] == "X "
+    assert responses[2]["error"]["code"] == -32700
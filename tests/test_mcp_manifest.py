@@ -0,0 +1,158 @@
+import json
+from pathlib import Path
+
+from agent_task.mcp_manifest import build_task_manifest, extract_server, task_servers
+from agent_task.store import BlobStore
+
+SCRIPT = '''
+from typing import List, Optional
+
+name = "text_server"
+instructions = "Writes text for later"
+
+def write_later(text: str, times: int = 1, *, tags: Optional[List[str]] = None) -> bool:
+    """
+    Write the text to a file later.
+    """
+    return True
+
+async def fetch(url):
+    return url
+
+def _helper():
+    pass
+'''
+
+def test_extract_server_signatures():
+    """Test that names, instructions and function signatures are extracted."""
+    server = extract_server(SCRIPT, "script")
+
+    assert server["name"] == "text_server"
+    assert server["instructions"] == "Writes text for later"
+    assert [tool["name"] for tool in server["tools"]] == ["write_later", "fetch"]
+
+    write_later = server["tools"][0]
+    assert write_later["description"] == "Write the text to a file later."
+    assert [(p["name"], p["annotation"], p["required"]) for p in write_later["parameters"]] == [
+        ("text", "str", True), ("times", "int", False), ("tags", "Optional[List[str]]", False)
+    ]
+    assert write_later["inputSchema"] == {
+        "type": "object",
+        "properties": {
+            "text": {"type": "string"},
+            "times": {"type": "integer", "default": 1},
+            "tags": {"type": "array", "default": None},
+        },
+        "required": ["text"],
+    }
+    assert server["tools"][1]["async"]
+
+def test_extract_without_ast_unparse(monkeypatch):
+    """Test the source-segment fallback used on Python 3.8."""
+    import ast
+    expected = extract_server(SCRIPT, "script")
+    monkeypatch.delattr(ast, "unparse", raising=False)
+
+    assert extract_server(SCRIPT, "script") == expected
+
+def test_bare_tool_list_selects_tools():
+    """Test that a bare list expression selects the exposed tools."""
+    source = (Path(__file__).parent.parent / ".app/tasks/mytask/mcp/script.py").read_text(encoding="utf-8")
+    server = extract_server(source, "script")
+
+    assert server["name"] == "text_server"
+    assert [tool["name"] for tool in server["tools"]] == ["write_later"]
+    assert server["tools"][0]["parameters"][0]["name"] == "text"
+
+def test_syntax_error_is_reported():
+    """Test that a script that does not parse yields no tools."""
+    server = extract_server("def broken(:\n", "broken")
+    assert server["name"] == "broken"
+    assert server["tools"] == []
+    assert "error" in server
+
+def test_task_manifest_is_cached(tmp_path):
+    """Test that loads read the precomputed manifest instead of parsing."""
+    store = BlobStore(tmp_path / "objects", tmp_path / "manifests", tmp_path / "tasks")
+    manifest = {"version": 1, "dirs": ["mcp"], "files": {
+        "mcp/a.py": store.add_bytes(SCRIPT.encode("utf-8")),
+        "mcp/b.py": store.add_bytes(SCRIPT.encode("utf-8")),
+        "mcp/lib/helper.py": store.add_bytes(b"def helper(): pass\n"),
+    }}
+    store.write_manifest("task", manifest)
+    cache_dir = tmp_path / "mcp"
+    build_task_manifest("task", manifest, store, cache_dir)
+
+    # Identical scripts share one cached extraction
+    assert len(list((cache_dir / "v1").rglob("*.json"))) == 1
+
+    # Corrupt the cached extraction; the precomputed task manifest is used as is
+    for path in (cache_dir / "v1").rglob("*.json"):
+        path.write_text("{}")
+    servers = task_servers("task", store, cache_dir)
+    assert [(s["source"], s["name"]) for s in servers] == [
+        ("mcp/a.py", "text_server"), ("mcp/b.py", "text_server")
+    ]
+
+def test_task_manifest_rebuilt_when_scripts_change(tmp_path):
+    """Test that a stale precomputed manifest is rebuilt."""
+    store = BlobStore(tmp_path / "objects", tmp_path / "manifests", tmp_path / "tasks")
+    cache_dir = tmp_path / "mcp"
+    manifest = {"version": 1, "dirs": ["mcp"],
+                "files": {"mcp/a.py": store.add_bytes(b"def one(): pass\n")}}
+    store.write_manifest("task", manifest)
+    build_task_manifest("task", manifest, store, cache_dir)
+
+    manifest["files"]["mcp/a.py"] = store.add_bytes(b"def two(): pass\n")
+    store.write_manifest("task", manifest)
+
+    servers = task_servers("task", store, cache_dir)
+    assert [tool["name"] for tool in servers[0]["tools"]] == ["two"]
+    assert servers[0]["name"] == "a"
+
+def test_loose_task_is_not_ingested(tmp_path):
+    """Test that tasks without a store manifest are read, not rewritten."""
+    store = BlobStore(tmp_path / "objects", tmp_path / "manifests", tmp_path / "tasks")
+    mcp_dir = store.tasks_dir / "legacy" / "mcp"
+    mcp_dir.mkdir(parents=True)
+    (mcp_dir / "server.py").write_text(SCRIPT, encoding="utf-8")
+    inode = (mcp_dir / "server.py").stat().st_ino
+
+    servers = task_servers("legacy", store, tmp_path / "mcp")
+
+    assert [(s["source"], s["name"]) for s in servers] == [("mcp/server.py", "text_server")]
+    assert store.read_manifest("legacy") is None
+    assert (mcp_dir / "server.py").stat().st_ino == inode
+    assert not (tmp_path / "objects").exists()
+
+def test_concurrent_mcp_exports_keep_every_server(tmp_path, monkeypatch):
+    """Test that parallel imports into one project do not lose servers."""
+    from concurrent.futures import ThreadPoolExecutor
+    from agent_task import locks
+    from agent_task.task_manager import TaskManager
+
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    cursor_dir = tmp_path / "project" / ".cursor"
+    cursor_dir.mkdir(parents=True)
+    (cursor_dir / "mcp.json").write_text(json.dumps({"mcpServers": {
+        "server-3": {"command": "instant-mcp", "args": ["server-3"]},
+        "other": {"command": "node", "args": ["other.js"]},
+    }}))
+    servers = []
+    for i in range(20):
+        server = extract_server(f"def tool_{i}(): pass\n", f"server-{i}")
+        server["source"] = f"mcp/server_{i}.py"
+        servers.append(server)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(
+            lambda server: TaskManager._export_mcp_config(cursor_dir, [server], tmp_path / "task"),
+            servers
+        ))
+
+    config = json.loads((cursor_dir / "mcp.json").read_text())
+    assert sorted(config["mcpServers"]) == ["agent-task", "other"]
+    assert config["mcpServers"]["agent-task"]["args"][0] == "mcp-host"
+    registry = json.loads((cursor_dir / "agent-task-host.json").read_text())
+    assert sorted(registry["servers"]) == sorted(f"server-{i}" for i in range(20))
+    assert registry["servers"]["server-3"]["script"] == str((tmp_path / "task/mcp/server_3.py").resolve())
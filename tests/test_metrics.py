@@ -0,0 +1,112 @@
+import json
+import time
+
+from agent_task import metrics, profiling
+from agent_task.metrics import append, percentile, read_records, summarize
+
+def _record(command, ms, exit_code=0, ts=None, phases=None, counters=None):
+    return {"v": 1, "ts": ts or time.time(), "command": command, "exit": exit_code, "ms": ms,
+            "phases": phases or {}, "counters": counters or {}}
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+def test_append_rotates(tmp_path):
+    """Test that a full metrics file is rotated into numbered backups."""
+    path = tmp_path / "metrics.ndjson"
+    for i in range(20):
+        append(_record("tasks", float(i)), path, max_bytes=300, backups=2)
+
+    assert path.with_name("metrics.ndjson.1").exists()
+    assert path.with_name("metrics.ndjson.2").exists()
+    assert not path.with_name("metrics.ndjson.3").exists()
+    durations = [record["ms"] for record in read_records(path)]
+    # Oldest records were dropped; the rest are read oldest first
+    assert durations == sorted(durations)
+    assert durations[-1] == 19.0 and len(durations) < 20
+
+def test_read_records_skips_damaged_and_old_lines(tmp_path):
+    """Test filtering by age and skipping of truncated lines."""
+    path = tmp_path / "metrics.ndjson"
+    append(_record("tasks", 1.0, ts=time.time() - 10 * 86400), path)
+    append(_record("tasks", 2.0), path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"command": "tas')
+
+    assert [r["ms"] for r in read_records(path)] == [1.0, 2.0]
+    assert [r["ms"] for r in read_records(path, since=time.time() - 86400)] == [2.0]
+
+def test_summarize():
+    """Test aggregation per command."""
+    records = [_record("clone", float(ms), phases={"http": ms / 2},
+                       counters={"http.bytes_down": 100, "http_cache.hits": 1})
+               for ms in range(1, 101)]
+    records.append(_record("clone", 500.0, exit_code=1,
+                           counters={"http_cache.misses": 1, "http.retries": 2}))
+    records.append(_record("tasks", 5.0))
+
+    clone, tasks = summarize(records)
+    assert clone["command"] == "clone" and tasks["command"] == "tasks"
+    assert clone["calls"] == 101
+    assert clone["failures"] == 1
+    assert clone["ms"] == {"p50": 51.0, "p95": 96.0, "p99": 100.0}
+    # The failed call never reached the http phase
+    assert clone["phases"]["http"]["p50"] == 25.0
+    assert clone["counters"]["http.bytes_down"] == 10000
+    assert clone["counters"]["http.retries"] == 2
+    assert clone["hit_rates"] == {"http_cache": 100 / 101}
+    assert tasks["ms"]["p99"] == 5.0
+
+def test_build_record():
+    """Test the record of a profiled command."""
+    profiler = profiling.start(imports=False, events=False)
+    try:
+        with profiling.span("scan"):
+            profiling.count("files.copied", 3)
+            profiling.count("files.copied", 0)
+            profiling.count("catalog.misses", 0)
+    finally:
+        profiling.stop()
+
+    record = metrics.build_record("load", 0, profiler)
+    assert record["command"] == "load"
+    assert set(record["phases"]) == {"scan"}
+    assert record["counters"] == {"files.copied": 3}
+    assert profiler.events == []
+    json.dumps(record)
+
+def test_commands_record_metrics(metrics_file, capsys):
+    """Test that CLI commands append a record and stats aggregates them."""
+    from cleo.io.inputs.argv_input import ArgvInput
+    from cleo.io.outputs.buffered_output import BufferedOutput
+
+    from agent_task.cli import create_application
+
+    def run(*argv):
+        app = create_application()
+        app.auto_exits(False)
+        output = BufferedOutput()
+        exit_code = app.run(ArgvInput(["agent-task", *argv]), output, BufferedOutput())
+        return exit_code, output.fetch()
+
+    assert run("path")[0] == 0
+    assert run("path")[0] == 0
+    records = list(read_records(metrics_file))
+    assert [record["command"] for record in records] == ["path", "path"]
+
+    assert run("stats", "--json", "--command", "path")[0] == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["calls"] == 2 and summary["failures"] == 0
+
+def test_metrics_can_be_disabled(metrics_file, monkeypatch):
+    """Test AGENT_TASK_METRICS=0."""
+    monkeypatch.setenv("AGENT_TASK_METRICS", "0")
+    assert not metrics.enabled()
+    metrics.record_command("path", 0, profiling.Profiler())
+    assert not metrics_file.exists()
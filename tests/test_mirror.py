@@ -0,0 +1,205 @@
+import io
+import json
+
+import pytest
+
+from agent_task import locks
+from agent_task.bundle import write_bundle
+from agent_task.mirror import export_mirror, import_mirror
+from agent_task.store import BlobStore, hash_bytes
+from agent_task.tarstream import iter_tar
+
+def make_task(tasks_dir, name, extra=""):
+    """Create a task whose rules are shared with every other task."""
+    task_dir = tasks_dir / name
+    (task_dir / "rules").mkdir(parents=True)
+    (task_dir / "notes").mkdir()
+    (task_dir / "README.md").write_text(f"# {name}\n\nTask {name}{extra}\n", encoding="utf-8")
+    (task_dir / "rules" / "shared.mdc").write_text("be brief\n" * 100, encoding="utf-8")
+    (task_dir / "mcp").mkdir()
+    (task_dir / "mcp" / "server.py").write_text(f'name = "{name}-server"\n', encoding="utf-8")
+    return task_dir
+
+def make_store(root):
+    return BlobStore(root / "objects", root / "manifests", root / "tasks")
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """Create a library with two stored tasks."""
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    root = tmp_path / "src"
+    store = make_store(root)
+    for name in ("alpha", "beta"):
+        make_task(root / "tasks", name)
+        store.ingest_task(name)
+    return root, store
+
+def tree(task_dir):
+    return {str(p.relative_to(task_dir)): p.read_bytes() if p.is_file() else None
+            for p in sorted(task_dir.rglob("*"))}
+
+def test_round_trip(library, tmp_path):
+    """Test that imported tasks are identical and shared files are sent once."""
+    root, store = library
+    archive = tmp_path / "library.tar.gz"
+    report = export_mirror(archive, tasks_dir=root / "tasks", store=store)
+
+    assert report["tasks"] == 2 and report["files"] == 6
+    assert report["blobs"] == 5
+    assert report["archive_bytes"] == archive.stat().st_size
+
+    dest = tmp_path / "dest"
+    result = import_mirror(archive, tasks_dir=dest / "tasks", store=make_store(dest))
+    assert result["imported"] == ["alpha", "beta"]
+    assert result["failed"] == {} and result["blobs_written"] == 5
+    for name in ("alpha", "beta"):
+        assert tree(dest / "tasks" / name) == tree(root / "tasks" / name)
+    assert (dest / "tasks" / "alpha" / "notes").is_dir()
+
+def test_patterns_and_existing_tasks(library, tmp_path):
+    """Test selecting tasks and skipping or updating existing ones."""
+    root, store = library
+    archive = tmp_path / "library.tar"
+    assert export_mirror(archive, ["al*"], compression="none",
+                         tasks_dir=root / "tasks", store=store)["tasks"] == 1
+    with pytest.raises(ValueError, match="No tasks match"):
+        export_mirror(archive, ["gamma"], tasks_dir=root / "tasks", store=store)
+
+    dest = tmp_path / "dest"
+    dest_store = make_store(dest)
+    make_task(dest / "tasks", "alpha", extra=" (local)")
+    dest_store.ingest_task("alpha")
+
+    result = import_mirror(archive, tasks_dir=dest / "tasks", store=dest_store)
+    assert result["skipped"] == ["alpha"] and result["imported"] == []
+    assert "(local)" in (dest / "tasks" / "alpha" / "README.md").read_text(encoding="utf-8")
+
+    result = import_mirror(archive, overwrite=True, tasks_dir=dest / "tasks", store=dest_store)
+    assert result["imported"] == ["alpha"]
+    # Only the README differs from the local copy
+    assert result["blobs_written"] == 1 and result["blobs_present"] == 2
+    assert tree(dest / "tasks" / "alpha") == tree(root / "tasks" / "alpha")
+
+def test_exports_loose_tasks_without_ingesting(library, tmp_path):
+    """Test that tasks without a store manifest are exported as they are."""
+    root, store = library
+    legacy = make_task(root / "tasks", "legacy")
+    inode = (legacy / "README.md").stat().st_ino
+    archive = tmp_path / "library.tar.gz"
+    assert export_mirror(archive, ["legacy"], tasks_dir=root / "tasks", store=store)["files"] == 3
+    assert store.read_manifest("legacy") is None
+    assert (legacy / "README.md").stat().st_ino == inode
+
+    dest = tmp_path / "dest"
+    assert import_mirror(archive, tasks_dir=dest / "tasks", store=make_store(dest))["imported"] == ["legacy"]
+    assert tree(dest / "tasks" / "legacy") == tree(legacy)
+
+def test_exports_packed_tasks(library, tmp_path):
+    """Test that packed tasks are exported from their bundle."""
+    root, store = library
+    make_task(tmp_path / "loose", "gamma")
+    write_bundle(tmp_path / "loose" / "gamma", root / "tasks" / "gamma.atask")
+    archive = tmp_path / "library.tar.gz"
+    assert export_mirror(archive, tasks_dir=root / "tasks", store=store)["tasks"] == 3
+
+    dest = tmp_path / "dest"
+    result = import_mirror(archive, ["gamma"], tasks_dir=dest / "tasks", store=make_store(dest))
+    assert result["imported"] == ["gamma"]
+    assert tree(dest / "tasks" / "gamma") == tree(tmp_path / "loose" / "gamma")
+
+def test_corrupt_and_missing_blobs(library, tmp_path):
+    """Test that tasks whose files did not arrive intact are not imported."""
+    root, store = library
+    archive = tmp_path / "library.tar"
+    export_mirror(archive, compression="none", tasks_dir=root / "tasks", store=store)
+    import tarfile
+    with tarfile.open(archive) as tar:
+        mirror = json.load(tar.extractfile("mirror.json"))
+    readme = mirror["tasks"]["alpha"]["files"]["README.md"]["hash"]
+    shared = mirror["tasks"]["beta"]["files"]["rules/shared.mdc"]["hash"]
+    beta_only = [entry["hash"] for rel, entry in mirror["tasks"]["beta"]["files"].items()
+                 if rel != "rules/shared.mdc"]
+
+    # The alpha README is tampered with and beta's own files are left out
+    entries = [("mirror.json", json.dumps(mirror).encode("utf-8")),
+               (f"blobs/{readme}", b"tampered"),
+               (f"blobs/{shared}", (root / "tasks" / "beta" / "rules" / "shared.mdc").read_bytes())]
+    data = b"".join(iter_tar(entries, "none"))
+
+    dest = tmp_path / "dest"
+    dest_store = make_store(dest)
+    result = import_mirror(io.BytesIO(data), tasks_dir=dest / "tasks", store=dest_store)
+    assert result["imported"] == []
+    assert "README.md" in result["failed"]["alpha"] and "beta" in result["failed"]
+    assert not (dest / "tasks" / "alpha").exists()
+    assert not any(dest_store.has(digest) for digest in [readme] + beta_only)
+    # Mismatched contents are not stored under their own hash either
+    assert not dest_store.has(hash_bytes(b"tampered"))
+
+def test_rejects_invalid_mirrors(tmp_path, monkeypatch):
+    """Test that archives without a valid manifest first are refused."""
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    store = make_store(tmp_path)
+    tasks_dir = tmp_path / "tasks"
+
+    data = b"".join(iter_tar([("README.md", b"hello")], "gzip"))
+    with pytest.raises(ValueError, match="Not a task mirror"):
+        import_mirror(io.BytesIO(data), tasks_dir=tasks_dir, store=store)
+
+    for name, rel in (("../evil", "README.md"), ("evil", "../escape")):
+        mirror = {"version": 1, "tasks": {name: {"files": {rel: {"hash": "0" * 64, "size": 0,
+                                                                 "mode": 0o644}},
+                                                 "dirs": []}}, "blobs": {}}
+        data = b"".join(iter_tar([("mirror.json", json.dumps(mirror).encode("utf-8"))], "gzip"))
+        with pytest.raises(ValueError, match="Invalid"):
+            import_mirror(io.BytesIO(data), tasks_dir=tasks_dir, store=store)
+    assert not (tmp_path / "escape").exists()
+
+def test_rejects_hashes_outside_the_store(tmp_path, monkeypatch):
+    """Test that blob hashes cannot name files outside the blob store."""
+    monkeypatch.setattr(locks, "LOCKS_DIR", tmp_path / "locks")
+    store = make_store(tmp_path)
+    tasks_dir = tmp_path / "tasks"
+    secret = tmp_path / "secret.txt"
+    secret.write_text("private", encoding="utf-8")
+
+    # blob_path joins digest[2:], so this "hash" resolves to the secret file
+    mirror = {"version": 1, "blobs": {}, "tasks": {"evil": {"dirs": [], "files": {
+        "README.md": {"hash": f"ab{secret}", "size": 7, "mode": 0o644}}}}}
+    data = b"".join(iter_tar([("mirror.json", json.dumps(mirror).encode("utf-8"))], "gzip"))
+    with pytest.raises(ValueError, match="Invalid blob hash"):
+        import_mirror(io.BytesIO(data), tasks_dir=tasks_dir, store=store)
+    assert not (tasks_dir / "evil").exists()
+
+    digest = hash_bytes(b"hello")
+    mirror["tasks"]["evil"]["files"]["README.md"]["hash"] = digest
+    data = b"".join(iter_tar([("mirror.json", json.dumps(mirror).encode("utf-8")),
+                              ("blobs/../escape", b"hello")], "gzip"))
+    with pytest.raises(ValueError, match="Invalid blob hash"):
+        import_mirror(io.BytesIO(data), tasks_dir=tasks_dir, store=store)
+    assert not (tmp_path / "escape").exists()
+
+def test_rejects_invalid_modes(library, tmp_path):
+    """Test that recorded modes cannot set special bits or be anything but an integer."""
+    root, store = library
+    archive = tmp_path / "library.tar"
+    export_mirror(archive, ["alpha"], compression="none", tasks_dir=root / "tasks", store=store)
+    import tarfile
+    with tarfile.open(archive) as tar:
+        mirror = json.load(tar.extractfile("mirror.json"))
+        blobs = [(member.name, tar.extractfile(member).read())
+                 for member in tar.getmembers() if member.name != "mirror.json"]
+
+    def archive_with(mode):
+        mirror["tasks"]["alpha"]["files"]["mcp/server.py"]["mode"] = mode
+        entries = [("mirror.json", json.dumps(mirror).encode("utf-8"))] + blobs
+        return io.BytesIO(b"".join(iter_tar(entries, "none")))
+
+    dest = tmp_path / "dest"
+    for mode in ("755", None, 0o10000):
+        with pytest.raises(ValueError, match="Invalid file mode"):
+            import_mirror(archive_with(mode), tasks_dir=dest / "tasks", store=make_store(dest))
+    assert not (dest / "tasks" / "alpha").exists()
+
+    import_mirror(archive_with(0o4755), tasks_dir=dest / "tasks", store=make_store(dest))
+    assert (dest / "tasks" / "alpha" / "mcp" / "server.py").stat().st_mode & 0o7000 == 0
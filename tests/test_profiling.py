@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+
+from agent_task import profiling
+from agent_task.profiling import span, timed
+
+@pytest.fixture
+def profiler():
+    """Record spans for the duration of a test."""
+    profiler = profiling.start()
+    yield profiler
+    profiling.stop()
+
+def test_spans_are_free_when_profiling_is_off():
+    """Test that disabled spans are a shared no-op."""
+    assert profiling._profiler is None
+    assert span("scan") is span("parse", "other", detail=1)
+
+    @timed("scan")
+    def work(value):
+        return value * 2
+
+    assert work(21) == 42
+
+def test_breakdown_uses_self_time(profiler):
+    """Test that nested spans are not counted twice."""
+    with span("task", "outer"):
+        time.sleep(0.02)
+        with span("http", "inner") as inner:
+            time.sleep(0.03)
+            inner.set(status=200)
+
+    rows = {row["phase"]: row for row in profiler.breakdown()}
+    assert rows["http"]["self"] >= 0.03
+    assert rows["task"]["total"] >= 0.05
+    assert rows["task"]["self"] < rows["task"]["total"] - 0.025
+    assert "wall time" in profiler.format_breakdown()
+
+def test_same_phase_nesting_counts_total_once(profiler):
+    """Test that a phase's total covers only its outermost spans."""
+    with span("parse"):
+        with span("parse"):
+            time.sleep(0.01)
+
+    row = profiler.breakdown()[0]
+    assert row["count"] == 2
+    assert row["total"] == pytest.approx(row["self"], rel=0.2)
+
+def test_timed_records_calls(profiler):
+    """Test that decorated functions are recorded under their phase."""
+    @timed("copy", "place files")
+    def place():
+        return "done"
+
+    assert place() == "done"
+    assert profiler.events[0]["name"] == "place files"
+    assert profiler.events[0]["cat"] == "copy"
+
+def test_imports_are_timed(profiler, tmp_path, monkeypatch):
+    """Test that modules imported while profiling show up as the import phase."""
+    (tmp_path / "profiled_module.py").write_text("VALUE = 1\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    import profiled_module
+    assert profiled_module.VALUE == 1
+    assert any(event["cat"] == "import" and event["name"] == "profiled_module"
+               for event in profiler.events)
+
+def test_chrome_trace(profiler, tmp_path):
+    """Test the trace event file format."""
+    with span("http", "GET /api/tasks", attempt=0):
+        pass
+
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(path)
+    trace = json.loads(path.read_text(encoding="utf-8"))
+
+    event = trace["traceEvents"][0]
+    assert event["ph"] == "X"
+    assert event["args"] == {"attempt": 0}
+    assert {"name", "cat", "ts", "dur", "pid", "tid"} <= set(event)
+
+def test_profile_option(tmp_path):
+    """Test the global options on a CLI command."""
+    from cleo.io.inputs.argv_input import ArgvInput
+    from cleo.io.outputs.buffered_output import BufferedOutput
+
+    from agent_task.cli import create_application
+
+    app = create_application()
+    app.auto_exits(False)
+    output, errors = BufferedOutput(), BufferedOutput()
+    trace = tmp_path / "trace.json"
+    cprofile = tmp_path / "profile.out"
+    exit_code = app.run(
+        ArgvInput(["agent-task", "path", "--profile", "--profile-trace", str(trace),
+                   "--profile-cprofile", str(cprofile)]),
+        output, errors
+    )
+
+    assert exit_code == 0
+    assert "Task archive directory" in output.fetch()
+    report = errors.fetch()
+    assert "Profile of 'path'" in report and "wall time" in report
+    assert "traceEvents" in json.loads(trace.read_text(encoding="utf-8"))
+    assert cprofile.stat().st_size > 0
+    assert profiling._profiler is None
@@ -1,3 +1,6 @@
+import io
+import tarfile
+import zlib
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -16,6 +19,10 @@ def sample_task_dir(tmp_path):
     with open(task_dir / "README.md", "w", encoding="utf-8") as f:
         f.write(readme_content)
     
+    # Create taskhub.yaml
+    with open(task_dir / "taskhub.yaml", "w", encoding="utf-8") as f:
+        f.write("name: test_task\nversion: 0.1.0\n")
+    
     # Create a sample file
     with open(task_dir / "main.py", "w", encoding="utf-8") as f:
         f.write('print("Hello, World!")')
@@ -36,9 +43,9 @@ def test_publish_task(sample_task_dir, api_client):
         "url": "https://taskhub.dev/tasks/test_user/test_task"
     }
     
-    # Mock the requests.post method
-    with patch('requests.post') as mock_post:
-        mock_response = Mock()
+    # Mock the pooled session
+    with patch.object(api_client.session, 'request') as mock_post:
+        mock_response = Mock(status_code=200)
         mock_response.json.return_value = expected_response
         mock_post.return_value = mock_response
         
@@ -61,6 +68,80 @@ def test_publish_task(sample_task_dir, api_client):
         assert isinstance(payload['files'], dict)
         assert "main.py" in payload["files"]
 
+def test_publish_task_delta_uploads_missing_blobs(sample_task_dir, api_client):
+    """Test that a delta publish only uploads blobs the server is missing."""
+    (sample_task_dir / "rules").mkdir()
+    (sample_task_dir / "rules" / "rule.mdc").write_text("# rule", encoding="utf-8")
+    
+    # Pretend the server already has main.py but not the rule
+    def fake_post(method, url, **kwargs):
+        response = Mock(status_code=200)
+        if url.endswith("/negotiate"):
+            manifest = kwargs["json"]["manifest"]
+            response.json.return_value = {"missing": [manifest["rules/rule.mdc"]]}
+        else:
+            response.json.return_value = {"url": "https://taskhub.dev/tasks/test_user/test_task"}
+        return response
+    
+    with patch.object(api_client.session, 'request', side_effect=fake_post) as mock_post:
+        result = api_client.publish_task_delta(sample_task_dir, "test_user")
+        
+        assert result["url"].endswith("/test_task")
+        assert mock_post.call_count == 2
+        assert mock_post.call_args_list[0][0][1].endswith("/api/tasks/negotiate")
+        payload = mock_post.call_args_list[1][1]['json']
+        assert set(payload["manifest"]) == {"main.py", "rules/rule.mdc"}
+        assert list(payload["blobs"].values()) == ["# rule"]
+
+def test_publish_task_delta_falls_back_to_full_upload(sample_task_dir, api_client):
+    """Test that servers without the negotiate endpoint get a full upload."""
+    
+    with patch.object(api_client.session, 'request') as mock_post:
+        not_found = Mock(status_code=404)
+        published = Mock(status_code=200)
+        published.json.return_value = {"url": "https://taskhub.dev/tasks/test_user/test_task"}
+        mock_post.side_effect = [not_found, published]
+        
+        api_client.publish_task_delta(sample_task_dir, "test_user")
+        
+        assert "files" in mock_post.call_args_list[1][1]['json']
+
+def test_publish_task_stream(sample_task_dir, api_client):
+    """Test that streamed publishes send a compressed tar generator."""
+    (sample_task_dir / "logo.png").write_bytes(b"\x89PNG\x00\xff")
+    
+    with patch.object(api_client.session, 'request') as mock_post:
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = {"url": "https://taskhub.dev/tasks/test_user/test_task"}
+        mock_post.return_value = mock_response
+        
+        api_client.publish_task_stream(sample_task_dir, "test_user")
+        
+        call_args = mock_post.call_args
+        assert call_args[0] == ("POST", f"{api_client.base_url}/api/tasks/upload")
+        assert call_args[1]['headers']['Content-Encoding'] == "gzip"
+        assert call_args[1]['params'] == {"userId": "test_user", "taskName": "test_task"}
+        body = zlib.decompress(b"".join(call_args[1]['data']), 31)
+        with tarfile.open(fileobj=io.BytesIO(body)) as tar:
+            assert tar.extractfile("logo.png").read() == b"\x89PNG\x00\xff"
+
+def test_publish_task_rejects_binary_files(sample_task_dir, api_client):
+    """Test that JSON publishes refuse files they cannot carry."""
+    (sample_task_dir / "logo.png").write_bytes(b"\x89PNG\x00\xff")
+    
+    with patch.object(api_client.session, 'request') as mock_post:
+        with pytest.raises(ValueError, match="binary file 'logo.png'"):
+            api_client.publish_task(sample_task_dir, "test_user")
+        mock_post.assert_not_called()
+
+def test_binary_tasks_are_streamed_by_default(sample_task_dir):
+    """Test that tasks with binary files pick the streamed upload."""
+    from agent_task.task_manager import _has_binary_files
+    
+    assert not _has_binary_files(sample_task_dir)
+    (sample_task_dir / "logo.png").write_bytes(b"\x89PNG\x00\xff")
+    assert _has_binary_files(sample_task_dir)
+
 def test_get_task(api_client):
     """Test task retrieval."""
     user_id = "test_user"
@@ -74,9 +155,9 @@ def test_get_task(api_client):
         }
     }
     
-    # Mock the requests.get method
-    with patch('requests.get') as mock_get:
-        mock_response = Mock()
+    # Mock the pooled session
+    with patch.object(api_client.session, 'request') as mock_get:
+        mock_response = Mock(status_code=200)
         mock_response.json.return_value = expected_response
         mock_get.return_value = mock_response
         
@@ -91,5 +172,42 @@ def test_get_task(api_client):
         call_args = mock_get.call_args
         
         # Check URL and params
-        assert f"/api/tasks/{user_id}/{task_name}" in call_args[0][0]
-        assert call_args[1]['params'] == {'files': 'false'} 
\ No newline at end of file
+        assert call_args[0][0] == "GET"
+        assert f"/api/tasks/{user_id}/{task_name}" in call_args[0][1]
+        assert call_args[1]['params'] == {'files': 'false'} 
+
+def test_retries_with_retry_after(api_client):
+    """Test that 429/5xx responses are retried, honouring Retry-After."""
+    throttled = Mock(status_code=429, headers={"Retry-After": "2"})
+    unavailable = Mock(status_code=503, headers={})
+    ok = Mock(status_code=200, headers={})
+    ok.json.return_value = {"metadata": {}}
+    
+    with patch.object(api_client.session, 'request', side_effect=[throttled, unavailable, ok]), \
+            patch('agent_task.api.time.sleep') as mock_sleep:
+        assert api_client.get_task("test_user", "test_task") == {"metadata": {}}
+    
+    delays = [call[0][0] for call in mock_sleep.call_args_list]
+    assert delays[0] == 2.0
+    assert 0 <= delays[1] <= api_client.backoff_factor * 2
+    assert api_client.connection_stats()["retries"] == 2
+
+def test_gives_up_after_max_retries(api_client):
+    """Test that persistent failures are reported after the retry budget."""
+    with patch.object(api_client.session, 'request',
+                      side_effect=requests.exceptions.ConnectionError("refused")) as mock_request, \
+            patch('agent_task.api.time.sleep'):
+        with pytest.raises(ValueError, match="API request failed"):
+            api_client.get_task("test_user", "test_task")
+    
+    assert mock_request.call_count == api_client.max_retries + 1
+
+def test_connection_stats_are_thread_safe(api_client):
+    """Test that requests from concurrent threads are all counted."""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with patch.object(api_client.session, 'request', return_value=Mock(status_code=200)):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: api_client._request("get", api_client.base_url), range(400)))
+    
+    assert api_client.connection_stats()["requests"] == 400
@@ -0,0 +1,34 @@
+import pytest
+from pathlib import Path
+
+from agent_task.scanner import scan_task_dir, scan_task_dirs
+
+@pytest.fixture
+def task_dirs(tmp_path):
+    """Create a set of task directories with READMEs and taskhub.yaml files."""
+    task_dirs = []
+    for i in range(20):
+        task_dir = tmp_path / f"task-{i:02d}"
+        (task_dir / "mcp").mkdir(parents=True)
+        (task_dir / "mcp" / "server.py").write_text("name = 'server'", encoding="utf-8")
+        (task_dir / "README.md").write_text(f"# task {i}\n\nTask number {i}\n", encoding="utf-8")
+        (task_dir / "taskhub.yaml").write_text(f"author: user{i}\n", encoding="utf-8")
+        task_dirs.append(task_dir)
+    return task_dirs
+
+def test_scan_task_dir(task_dirs):
+    """Test scanning a single task directory."""
+    task_info = scan_task_dir(task_dirs[3])
+
+    assert task_info["name"] == "task-03"
+    assert task_info["description"] == "Task number 3"
+    assert task_info["author"] == "user3"
+    assert task_info["files"] == ["mcp/server.py", "taskhub.yaml"]
+    assert task_info["has_mcp"] and task_info["has_readme"] and not task_info["has_rules"]
+
+@pytest.mark.parametrize("workers,processes", [(1, 0), (4, 0), (4, 2)])
+def test_scan_task_dirs_preserves_order(task_dirs, workers, processes):
+    """Test that parallel scans stream results back in input order."""
+    results = list(scan_task_dirs(task_dirs, workers=workers, processes=processes))
+
+    assert results == [scan_task_dir(task_dir) for task_dir in task_dirs]
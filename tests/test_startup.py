@@ -0,0 +1,75 @@
+"""
+Startup-time budget of the agent-task entry point.
+
+Each test runs a fresh interpreter and checks which modules the CLI
+imports. Wall-clock budgets are flaky on loaded machines, so the import
+time check only runs when ``AGENT_TASK_STARTUP_BUDGET_MS`` is set.
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+
+# Import time allowed for answering ``agent-task path`` (opt-in)
+BUDGET_MS = os.environ.get("AGENT_TASK_STARTUP_BUDGET_MS")
+
+# Modules only the commands that need them may import
+HEAVY_MODULES = {"cleo", "rich", "requests", "urllib3", "yaml", "asyncio", "sqlite3"}
+
+def _env(tmp_path: Path) -> dict:
+    return dict(os.environ, XDG_DATA_HOME=str(tmp_path / "data"),
+                XDG_CACHE_HOME=str(tmp_path / "cache"), AGENT_TASK_NO_DAEMON="1",
+                PYTHONPATH=str(Path(__file__).parent.parent))
+
+def loaded_modules(code: str, tmp_path: Path) -> set:
+    """Run code in a fresh interpreter and collect the top-level modules it loaded."""
+    code += "\nimport json, sys; print(json.dumps(sorted(sys.modules)), file=sys.stderr)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=_env(tmp_path), check=True)
+    return {name.split(".")[0] for name in json.loads(result.stderr.splitlines()[-1])}
+
+def import_times(code: str, tmp_path: Path) -> dict:
+    """Run code in a fresh interpreter and collect cumulative import times.
+
+    Returns:
+        Top-level modules imported after interpreter startup, mapped to
+        their cumulative import time in milliseconds
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=_env(tmp_path), check=True)
+    times = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        started = started or name.strip().startswith("agent_task")
+        if started:
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+PATH_COMMAND = "import sys; sys.argv = ['agent-task', 'path']\nfrom agent_task.cli import main; main()"
+
+def test_path_command_imports_nothing_heavy(tmp_path):
+    """Test that ``agent-task path`` leaves heavy modules out of sys.modules."""
+    assert not loaded_modules(PATH_COMMAND, tmp_path) & HEAVY_MODULES
+
+@pytest.mark.skipif(BUDGET_MS is None, reason="set AGENT_TASK_STARTUP_BUDGET_MS to check")
+def test_path_command_startup_budget(tmp_path):
+    """Test that the imports of ``agent-task path`` stay within the budget."""
+    times = import_times(PATH_COMMAND, tmp_path)
+
+    top_level = {name: ms for name, ms in times.items() if name == name.lstrip()}
+    total = sum(ms for name, ms in times.items() if name in top_level)
+    breakdown = ", ".join(f"{name} {ms:.1f}ms" for name, ms in sorted(times.items(), key=lambda t: -t[1]))
+    assert total <= float(BUDGET_MS), f"Startup imports took {total:.1f}ms: {breakdown}"
+
+def test_application_defers_heavy_imports(tmp_path):
+    """Test that building the CLI loads cleo but not rich, requests or yaml."""
+    imported = loaded_modules("from agent_task.cli import create_application; create_application()",
+                              tmp_path)
+
+    assert "cleo" in imported
+    assert not imported & (HEAVY_MODULES - {"cleo"})
@@ -0,0 +1,81 @@
+import os
+import pytest
+from pathlib import Path
+
+from agent_task.store import BlobStore, HashCache, hash_bytes
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a blob store in a temporary app directory."""
+    return BlobStore(tmp_path / "objects", tmp_path / "manifests", tmp_path / "tasks")
+
+def test_identical_files_are_stored_once(store, tmp_path):
+    """Test that identical contents share a single blob."""
+    for name in ["a.mdc", "b.mdc"]:
+        (tmp_path / name).write_text("same rule", encoding="utf-8")
+
+    digest_a, written_a = store.put_file(tmp_path / "a.mdc")
+    digest_b, written_b = store.put_file(tmp_path / "b.mdc")
+
+    assert digest_a == digest_b == hash_bytes(b"same rule")
+    assert written_a and not written_b
+
+def test_add_tree_paths(store, tmp_path):
+    """Test that manifest paths are relative to the tree without a './' prefix."""
+    (tmp_path / "tree" / "rules").mkdir(parents=True)
+    (tmp_path / "tree" / "README.md").write_text("readme", encoding="utf-8")
+    (tmp_path / "tree" / "rules" / "rule.mdc").write_text("rule", encoding="utf-8")
+
+    files, dirs = store.add_tree(tmp_path / "tree")
+    assert sorted(files) == ["README.md", "rules/rule.mdc"] and dirs == ["rules"]
+
+    files, dirs = store.add_tree(tmp_path / "tree", prefix="sub")
+    assert sorted(files) == ["sub/README.md", "sub/rules/rule.mdc"] and dirs == ["sub", "sub/rules"]
+
+def test_checkout_manifest_only_touches_changes(store, tmp_path):
+    """Test that checking out a new manifest relinks changed paths only."""
+    task_dir = store.tasks_dir / "task"
+    old = {"version": 1, "files": {"README.md": store.add_bytes(b"readme"),
+                                   "rules/old.mdc": store.add_bytes(b"old")}, "dirs": ["rules"]}
+    store.checkout_manifest(task_dir, {"version": 1, "files": {}, "dirs": []}, old)
+    readme_inode = os.stat(task_dir / "README.md").st_ino
+
+    new = {"version": 1, "files": {"README.md": old["files"]["README.md"],
+                                   "rules/new.mdc": store.add_bytes(b"new")}, "dirs": ["rules"]}
+    report = store.checkout_manifest(task_dir, old, new)
+
+    assert report == {"files_transferred": 1, "bytes_transferred": 3,
+                      "files_removed": 1, "files_unchanged": 1}
+    assert os.stat(task_dir / "README.md").st_ino == readme_inode
+    assert not (task_dir / "rules" / "old.mdc").exists()
+    assert (task_dir / "rules" / "new.mdc").read_bytes() == b"new"
+
+def test_gc_removes_unreferenced_blobs(store):
+    """Test that gc keeps referenced blobs and drops the rest."""
+    (store.tasks_dir / "task").mkdir(parents=True)
+    kept = store.add_bytes(b"kept")
+    orphan = store.add_bytes(b"orphan")
+    store.write_manifest("task", {"version": 1, "files": {"README.md": kept}, "dirs": []})
+    store.write_manifest("deleted-task", {"version": 1, "files": {"x": orphan}, "dirs": []})
+
+    result = store.gc()
+
+    assert result == {"blobs_removed": 1, "bytes_freed": 6, "manifests_removed": 1}
+    assert store.has(kept["hash"])
+    assert not store.has(orphan["hash"])
+
+def test_hash_cache_skips_unchanged_files(tmp_path):
+    """Test that files with unchanged stat data are not re-hashed."""
+    path = tmp_path / "rule.mdc"
+    path.write_text("rule", encoding="utf-8")
+    cache = HashCache(tmp_path / "cache.json")
+    digest = cache.hash(path, "rule.mdc")
+    cache.save()
+
+    reloaded = HashCache(tmp_path / "cache.json")
+    assert reloaded.hash(path, "rule.mdc") == digest
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+    path.write_text("changed rule", encoding="utf-8")
+    assert reloaded.hash(path, "rule.mdc") == hash_bytes(b"changed rule")
+    assert reloaded.misses == 1
@@ -0,0 +1,50 @@
+import io
+import tarfile
+import zlib
+import pytest
+from pathlib import Path
+
+from agent_task.tarstream import decompressor, iter_tar, open_tar_stream, task_entries
+
+@pytest.fixture
+def task_dir(tmp_path):
+    """Create a task with text and binary files."""
+    task_dir = tmp_path / "task"
+    (task_dir / "assets").mkdir(parents=True)
+    (task_dir / "README.md").write_text("# task", encoding="utf-8")
+    (task_dir / "assets" / "logo.png").write_bytes(bytes(range(256)) * 1000)
+    return task_dir
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_iter_tar_roundtrip(task_dir, compression):
+    """Test that the streamed archive contains every file unchanged."""
+    chunks = list(iter_tar(task_entries(task_dir), compression, chunk_size=4096))
+    d = decompressor(compression)
+    data = b"".join(d.decompress(chunk) for chunk in chunks)
+
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        assert tar.getnames() == ["README.md", "assets/logo.png"]
+        assert tar.extractfile("assets/logo.png").read() == bytes(range(256)) * 1000
+        assert tar.extractfile("README.md").read() == b"# task"
+
+def test_iter_tar_is_chunked(task_dir):
+    """Test that large files are streamed in several chunks."""
+    chunks = list(iter_tar(task_entries(task_dir), "none", chunk_size=4096))
+
+    assert len(chunks) > 10
+    # Only the end-of-archive record may exceed the read size
+    assert max(len(chunk) for chunk in chunks[:-1]) <= 4096 + tarfile.BLOCKSIZE
+
+def test_unknown_compression(task_dir):
+    """Test that unknown compressions are rejected."""
+    with pytest.raises(ValueError):
+        list(iter_tar(task_entries(task_dir), "lzma"))
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_open_tar_stream_reads_bytes_entries(compression):
+    """Test that in-memory entries stream back with the compression detected."""
+    data = b"".join(iter_tar([("a.txt", b"first"), ("b/c.bin", bytes(5000))], compression))
+
+    tar = open_tar_stream(io.BytesIO(data))
+    assert [(member.name, tar.extractfile(member).read()) for member in tar] == \
+        [("a.txt", b"first"), ("b/c.bin", bytes(5000))]
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from rich.console import Console
+
+from agent_task.tree import build_tree, index_files
+
+def render(tree) -> str:
+    """Render a tree to plain text."""
+    console = Console(width=80, record=True, color_system=None)
+    with console.capture() as capture:
+        console.print(tree)
+    return capture.get()
+
+FILES = [
+    Path("README.md"),
+    Path("rules/rule.mdc"),
+    Path("mcp/server.py"),
+    *[Path(f"mcp/vendor/pkg/module{i}.py") for i in range(30)],
+]
+
+def test_index_counts_files_per_directory():
+    """Test that every directory counts the files below it."""
+    root = index_files(FILES)
+
+    assert root.count == len(FILES)
+    assert root.files == ["README.md"]
+    assert root.dirs["mcp"].count == 31
+    assert root.dirs["mcp"].dirs["vendor"].dirs["pkg"].count == 30
+
+def test_full_tree_lists_directories_before_files():
+    """Test the uncollapsed tree."""
+    text = render(build_tree("task/", FILES))
+
+    lines = text.splitlines()
+    assert lines[0] == "task/"
+    assert lines[1].endswith("mcp/") and lines[-1].endswith("README.md")
+    assert text.count(".py") == 31
+
+def test_max_depth_collapses_deeper_directories():
+    """Test that directories at the depth limit show file counts."""
+    text = render(build_tree("task/", FILES, max_depth=1))
+
+    assert "mcp/ (31 files)" in text
+    assert "rules/ (1 file)" in text
+    assert "server.py" not in text
+
+def test_summary_collapses_large_directories():
+    """Test that only directories over the summary limit are collapsed."""
+    text = render(build_tree("task/", FILES, summary=True, summary_limit=20))
+
+    assert "mcp/ (31 files)" in text
+    assert "rule.mdc" in text
+
+    text = render(build_tree("task/", FILES, summary=True, summary_limit=31))
+    assert "module29.py" in text
+    assert "files)" not in text
+
+def test_names_are_not_markup():
+    """Test that file names containing brackets are shown verbatim."""
+    assert "[draft].md" in render(build_tree("task/", ["notes/[draft].md"]))